@@ -1,32 +1,101 @@
 # app.py
+import argparse
 import logging
 import sys
 # Ensure unicodedata is available early (required by idna/requests)
 import unicodedata  # noqa: F401
 from config import setup_logger, APP_NAME
-from ui import run_app
-from ui.messages import msg_info
-from single_instance import enforce_single_instance
+from single_instance import enforce_single_instance, handoff
+
+# Commands a script can send with --ctl; see ui/control_api.py
+CTL_COMMANDS = ("status", "login-now", "start", "stop", "metrics")
+# "stop" waits for the worker thread to finish its iteration
+CTL_TIMEOUT_S = 5.0
+# startup.ELEVATED_FLAGS, repeated so a normal launch does not import startup
+ELEVATED_FLAGS = ("--elevate-autostart", "--disable-autostart")
+
+
+def _parse_args(argv=None):
+    p = argparse.ArgumentParser(prog="mdi-autologin", description=f"{APP_NAME} tray app")
+    p.add_argument("--login-now", action="store_true",
+                   help="ask the running instance for a manual login instead of opening its control panel")
+    p.add_argument("--ctl", choices=CTL_COMMANDS,
+                   help="send a command to the running instance, print its JSON reply and exit")
+    p.add_argument("--headless", action="store_true",
+                   help="run auto-login without the tray icon or any window (no Tk, pystray or PIL)")
+    p.add_argument("--no-log-file", action="store_true",
+                   help="log to stdout only, e.g. under systemd")
+    # Elevated autostart helper (startup.relaunch_as_admin); main() acts on these before parsing.
+    for flag in ELEVATED_FLAGS:
+        p.add_argument(flag, nargs="?", const="", metavar="RESUME_TARGET", help=argparse.SUPPRESS)
+    return p.parse_args(argv)
+
+
+def _ctl(command: str) -> int:
+    """Exit status: 0 ok, 1 the command failed, 2 no running instance."""
+    import json
+    from ipc import send_command
+    reply = send_command(command, timeout=CTL_TIMEOUT_S)
+    if reply is None:
+        print(json.dumps({"ok": False, "error": f"{APP_NAME} is not running"}))
+        return 2
+    print(json.dumps(reply, indent=2))
+    return 0 if reply.get("ok") else 1
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # relaunch_as_admin starts an elevated copy of us just to change autostart.
+    if any(flag in argv for flag in ELEVATED_FLAGS):
+        from startup import handle_elevated_flags
+        handle_elevated_flags(argv)
+        return
+
+    args = _parse_args(argv)
+    if args.ctl:
+        # No logger and no lock: scripts may poll this every few seconds.
+        sys.exit(_ctl(args.ctl))
 
-if __name__ == "__main__":
     # Initialize rotating file logger before anything else
-    setup_logger()
+    setup_logger(to_file=not args.no_log_file)
     log = logging.getLogger("mdi.app")
-    
+
+    # A running instance of this version takes the request over its control channel.
+    if args.headless:
+        command = "start"
+    else:
+        command = "login" if args.login_now else "show"
+    if handoff(command):
+        log.info("➡️ Passed '%s' to the running instance. Exiting.", command)
+        return
+
     # Enforce single instance
     is_first, mutex_handle = enforce_single_instance()
     if not is_first:
         log.warning("Another instance is already running. Exiting.")
+        if args.headless:
+            sys.exit(1)
+        from ui.messages import msg_info
         msg_info(APP_NAME, "Another instance of MDI AutoLogin is already running.\n\nPlease use the existing instance from the system tray.")
         sys.exit(0)
-    
+
+    # Tk, pystray, PIL and requests load only once we know this instance stays.
+    if args.headless:
+        from headless import run_headless as run_app
+    else:
+        from ui import run_app
+
     # Store mutex handle for cleanup (we'll release it in a try/finally)
     try:
         # No basicConfig here; setup_logger already attaches handlers.
         run_app()
     finally:
-        # Release mutex on exit
-        if mutex_handle:
-            from single_instance import _release_mutex
-            _release_mutex(mutex_handle)
-            log.debug("Single-instance mutex released")
+        # Drop the instance record and release the mutex on exit
+        if mutex_handle is not None:
+            from single_instance import release_single_instance
+            release_single_instance(mutex_handle)
+            log.debug("Single-instance lock released")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: login-response classification, per-call re.search vs LoginClassifier.
+
+The corpus is a set of 24online-style result pages (success, quota, device
+limit, bad password, still-intercepting) padded with the portal's usual
+markup. Run from the app directory:
+    python benchmarks/bench_classifier.py
+"""
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import net  # noqa: E402
+from config import load_config  # noqa: E402
+
+_CHROME = (
+    '<html><head><title>24online Client</title>'
+    '<script src="/24online/js/common.js"></script>'
+    '<link rel="stylesheet" href="/24online/css/style.css"></head><body>'
+    + '<div class="menu"><a href="#">Home</a><a href="#">Usage</a><a href="#">Help</a></div>\n' * 200
+)
+_MESSAGES = [
+    "You have successfully logged in. Welcome to MDI network.",
+    "Your data quota has been exceeded for this billing cycle.",
+    "Maximum login limit reached: too many devices are logged in.",
+    "Invalid username or password. Authentication failed.",
+    "Your account has expired. Contact the administrator.",
+    "Please login to continue. 24online",
+]
+CORPUS = [_CHROME + f"<div class='msg'>{m}</div></body></html>" for m in _MESSAGES]
+
+
+def legacy_analyze(cfg, http_status, url, text):
+    """The pre-LoginClassifier implementation, kept here for comparison."""
+    if 200 <= http_status < 400:
+        patterns = cfg.get("login_error_patterns") or {}
+        low = (text or "").lower()
+        for code, rx in patterns.items():
+            try:
+                if re.search(rx, low, re.I | re.M):
+                    return code, code.replace("_", " ").title()
+            except re.error:
+                pass
+        if "success" in low or "logged in" in low:
+            return "ok", "Login success"
+        if "24online" in low or "172.16." in (url or ""):
+            return "unknown", "Portal still intercepting"
+        return "unknown", "Unrecognized response"
+    return "unknown", f"HTTP {http_status}"
+
+
+def _run(fn, cfg, number):
+    def _once():
+        for page in CORPUS:
+            fn(cfg, 200, "https://172.16.16.16/24online/servlet/E24onlineHTTPClient", page)
+    return timeit.timeit(_once, number=number) / (number * len(CORPUS)) * 1e6
+
+
+def main():
+    cfg = load_config()
+    for page in CORPUS:
+        assert legacy_analyze(cfg, 200, "", page)[0] == net.analyze_login_response(cfg, 200, "", page)[0]
+    legacy_us = _run(legacy_analyze, cfg, 200)
+    new_us = _run(net.analyze_login_response, cfg, 200)
+    print(f"page size      : {len(CORPUS[0]) / 1024:.1f} KiB x {len(CORPUS)} pages")
+    print(f"legacy         : {legacy_us:8.1f} us/response")
+    print(f"LoginClassifier: {new_us:8.1f} us/response")
+    print(f"speedup        : {legacy_us / new_us:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Microbenchmark: default-gateway lookup via /proc/net/route vs `ip route`.
+
+Run from the app directory:
+    python benchmarks/bench_gateway.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import net  # noqa: E402
+
+
+def _per_call_ms(fn, number: int) -> float:
+    return timeit.timeit(fn, number=number) / number * 1000
+
+
+def main():
+    if net._default_gateways_proc() is None:
+        print("/proc/net/route not available on this machine; nothing to compare.")
+        return
+    proc_ms = _per_call_ms(net._default_gateways_proc, 2000)
+    cmd_ms = _per_call_ms(net._default_gateways_ip_route, 50)
+    print(f"/proc/net/route : {proc_ms:8.3f} ms/call  -> {net._default_gateways_proc()}")
+    print(f"ip route        : {cmd_ms:8.3f} ms/call  -> {net._default_gateways_ip_route()}")
+    if proc_ms > 0:
+        print(f"speedup         : {cmd_ms / proc_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
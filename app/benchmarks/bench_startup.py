@@ -0,0 +1,143 @@
+"""
+Cold-start benchmark: import cost per startup stage (from `python -X importtime`)
+and wall time from process spawn to the tray icon.
+
+Stages:
+  second_instance  what app.py imports before the single-instance check can exit
+  tray             + Tk, pystray, PIL and the tray module
+  worker           + net (requests/urllib3) and the auto-login worker
+  headless         what --headless loads: the worker without Tk, pystray or PIL
+
+Run from the app directory; every stage runs in a fresh interpreter:
+    python benchmarks/bench_startup.py --runs 5 --out startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+STAGES = {
+    "second_instance": "import config, single_instance",
+    "tray": "import config, ui.tray",
+    "worker": "import config, ui.tray, ui.worker",
+    "headless": "import config, single_instance, headless",
+}
+
+# Mirrors app.main() up to the point the tray icon thread is running.
+_TRAY_DRIVER = """
+import threading, tkinter as tk
+from config import setup_logger
+from single_instance import enforce_single_instance
+setup_logger()
+enforce_single_instance()
+try:
+    root = tk.Tk()
+except tk.TclError:
+    print("NO_DISPLAY", flush=True)
+    raise SystemExit(0)
+root.withdraw()
+from ui.tray import TrayApp
+app = TrayApp(root)
+threading.Thread(target=app.icon.run, daemon=True).start()
+print("READY", flush=True)
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["LOCALAPPDATA"] = tempfile.mkdtemp(prefix="mdi-bench-start-")
+    env.setdefault("PYSTRAY_BACKEND", "dummy")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """(total ms of top-level imports, [(module, cumulative ms)] sorted slowest first)."""
+    total_us, modules = 0, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        try:
+            cum_us = int(cumulative.strip())
+        except ValueError:
+            continue  # header row
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        if depth == 0:
+            total_us += cum_us
+        modules.append((name.strip(), cum_us / 1000))
+    modules.sort(key=lambda m: m[1], reverse=True)
+    return total_us / 1000, modules
+
+
+def import_stage(code: str) -> Tuple[float, List[Tuple[str, float]]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR, env=_env(), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return parse_importtime(proc.stderr)
+
+
+def time_to_tray_ms() -> float:
+    """Spawn to READY, or -1 when Tk has no display or startup fails."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _TRAY_DRIVER], cwd=APP_DIR, env=_env(),
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        line = proc.stdout.readline().strip()
+        elapsed = (time.perf_counter() - t0) * 1000
+    finally:
+        proc.kill()
+        proc.wait()
+    return elapsed if line == "READY" else -1.0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=8, help="slowest modules to list per stage")
+    ap.add_argument("--out", help="write results as JSON")
+    args = ap.parse_args(argv)
+
+    results: Dict[str, dict] = {}
+    for stage, code in STAGES.items():
+        try:
+            runs = [import_stage(code) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{stage:16} failed: {e}")
+            continue
+        totals = sorted(t for t, _ in runs)
+        median = totals[len(totals) // 2]
+        top = next(mods for t, mods in runs if t == median)[: args.top]
+        results[f"startup.import.{stage}"] = {"unit": "ms", "n": len(totals), "min": totals[0], "median": median}
+        print(f"{stage:16} imports median {median:8.1f} ms  (min {totals[0]:.1f})")
+        for name, ms in top:
+            print(f"    {ms:8.1f} ms  {name}")
+
+    tray = [time_to_tray_ms() for _ in range(args.runs)]
+    if min(tray) < 0:
+        print("time-to-tray     skipped: no display, or startup failed")
+    else:
+        tray.sort()
+        results["startup.time_to_tray"] = {"unit": "ms", "n": len(tray), "min": tray[0], "median": tray[len(tray) // 2]}
+        print(f"time-to-tray     median {tray[len(tray) // 2]:8.1f} ms  (min {tray[0]:.1f})")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({"results": results}, indent=2), encoding="utf-8")
+        print(f"\nWrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
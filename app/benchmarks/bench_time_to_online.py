@@ -0,0 +1,70 @@
+"""
+End-to-end time-to-online against the portal simulator, for tuning retry,
+settle_max and post_grace_s.
+
+Each scenario is a SimProfile (latency, drops, delayed online, fatal pages). The
+worker is started against a captive simulator and timed until it logs "online".
+Config overrides are given as --set key=value, with JSON values:
+
+    python benchmarks/bench_time_to_online.py --runs 5 --set settle_max=4 --set post_grace_s=2
+    python benchmarks/bench_time_to_online.py --scenario drops --set 'retry={"backoff_initial_s": 1}'
+"""
+import argparse
+import json
+import statistics
+import sys
+
+import run_benchmarks as rb  # sets up sys.path and a throwaway LOCALAPPDATA
+from portal_sim import PortalSimulator, SimProfile
+
+SCENARIOS = {
+    "clean": SimProfile(),
+    "slow": SimProfile(latency_s=0.2, jitter_s=0.1, seed=1),
+    "drops": SimProfile(drop_rate=0.2, seed=1),
+    "late_online": SimProfile(online_delay_s=2.0),
+    "hiccup": SimProfile(fail_first=2),
+    "quota": SimProfile(outcome="quota_exceeded"),
+}
+
+
+def _parse_set(items):
+    out = {}
+    for item in items:
+        key, _, raw = item.partition("=")
+        try:
+            out[key] = json.loads(raw)
+        except ValueError:
+            out[key] = raw
+    return out
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="default: all")
+    ap.add_argument("--engine", default="thread", choices=("thread", "asyncio"))
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--timeout", type=float, default=20.0, help="seconds before a run counts as failed")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=JSON", help="config override")
+    args = ap.parse_args(argv)
+
+    print(f"{'scenario':12} {'median s':>9} {'max s':>8} {'ok':>5} {'logins':>7} {'drops':>6}")
+    with PortalSimulator() as sim:
+        cfg = rb.bench_cfg(sim)
+        cfg.update(_parse_set(args.set))
+        for name in args.scenario or list(SCENARIOS):
+            times, logins, drops = [], 0, 0
+            for _ in range(args.runs):
+                sim.reset(profile=SCENARIOS[name])
+                ms = rb.captive_to_online_ms(args.engine, sim, cfg, timeout=args.timeout)
+                logins += sim.stats.logins
+                drops += sim.stats.drops
+                if ms is not None:
+                    times.append(ms / 1000)
+            med = f"{statistics.median(times):9.2f}" if times else f"{'-':>9}"
+            worst = f"{max(times):8.2f}" if times else f"{'-':>8}"
+            print(f"{name:12} {med} {worst} {len(times):>2}/{args.runs:<2} {logins / args.runs:7.1f} {drops:6d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
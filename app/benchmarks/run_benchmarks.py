@@ -0,0 +1,249 @@
+"""
+Offline benchmark suite for the net, worker and control-panel hot paths.
+
+Every network call goes to a local portal simulator (portal_sim.py), never
+the real campus network. Results are written as JSON so two runs, for example two
+releases, can be compared:
+
+    python benchmarks/run_benchmarks.py --out before.json
+    python benchmarks/run_benchmarks.py --out after.json --compare before.json
+
+Run from the app directory. --quick cuts the repetitions for a smoke run.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# Keep the benchmark away from the user's real config, keyring entry and log file,
+# and from a tray backend that needs a display.
+os.environ["LOCALAPPDATA"] = tempfile.mkdtemp(prefix="mdi-bench-")
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")
+
+import net  # noqa: E402
+from bench_classifier import CORPUS  # noqa: E402
+from config import APP_VERSION, load_config  # noqa: E402
+from portal_sim import PortalSimulator  # noqa: E402
+from ui.log_tail import LogTailer  # noqa: E402
+
+SCHEMA = 1
+
+
+def _summary(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "unit": "ms",
+        "n": len(ordered),
+        "min": round(ordered[0], 4),
+        "median": round(statistics.median(ordered), 4),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "mean": round(statistics.fmean(ordered), 4),
+    }
+
+
+def _measure(fn: Callable[[], object], n: int, warmup: int = 2, setup: Optional[Callable[[], None]] = None):
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    samples = []
+    for _ in range(n):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return _summary(samples)
+
+
+def bench_cfg(sim: PortalSimulator) -> dict:
+    cfg = load_config()
+    cfg.update(sim.config_overrides())
+    cfg.update({
+        "username": "bench",
+        "probe_timeout_s": 2,
+        "post_timeout": 2,
+        "post_grace_s": 0,
+        "post_probe_delay_s": 0.02,
+        "settle_max": 5,
+        "settle_step": 0.1,
+        "base_interval": 1,
+        "snapshot_ttl_s": 0,
+    })
+    return cfg
+
+
+# ---- net ----
+def bench_net(sim: PortalSimulator, cfg: dict, scale: float) -> Dict[str, dict]:
+    net.apply_net_config(cfg)
+    out = {}
+    sim.reset(online=True)
+    out["net.probe.online"] = _measure(net._probe, int(300 * scale))
+    sim.reset(online=False)
+    out["net.probe.captive"] = _measure(net._probe, int(150 * scale))
+
+    pages = iter(CORPUS * 10000)
+    out["net.analyze_login_response"] = _measure(
+        lambda: net.analyze_login_response(cfg, 200, sim.login_url, next(pages)), int(3000 * scale)
+    )
+    out["net.login_with_diagnostics"] = _measure(
+        lambda: net.login_with_diagnostics(cfg, "bench", "secret"), int(150 * scale),
+        setup=lambda: sim.reset(online=False),
+    )
+    return out
+
+
+# ---- worker ----
+def captive_to_online_ms(engine: str, sim: PortalSimulator, cfg: dict, timeout: float = 30) -> Optional[float]:
+    """Start a worker against a captive sim; ms until it logs "online", or None on timeout."""
+    from ui.worker import create_worker
+
+    sim.reset(online=False)
+    net.invalidate_network_caches()
+    tray = SimpleNamespace(update_tooltip=lambda running: None)
+    with patch("ui.worker.load_config", return_value=cfg), \
+            patch("ui.worker.get_password", return_value="secret"):
+        worker = create_worker(tray, engine)
+        t0 = time.perf_counter()
+        worker.start()
+        try:
+            while worker.last_online_state != "online":
+                if time.perf_counter() - t0 > timeout:
+                    return None
+                time.sleep(0.001)
+            return (time.perf_counter() - t0) * 1000
+        finally:
+            worker.stop()
+            worker.join(timeout=5)
+
+
+def bench_worker(sim: PortalSimulator, cfg: dict, scale: float) -> Dict[str, dict]:
+    out = {}
+    for engine in ("thread", "asyncio"):
+        samples = []
+        for _ in range(max(3, int(10 * scale))):
+            ms = captive_to_online_ms(engine, sim, cfg)
+            if ms is None:
+                raise RuntimeError(f"{engine} worker did not reach online")
+            samples.append(ms)
+        out[f"worker.captive_to_online.{engine}"] = _summary(samples)
+    return out
+
+
+# ---- control panel log ----
+def _write_log(path: Path, lines: int):
+    row = "2025-01-01 12:00:00,000 [INFO] 🛂 Captive portal detected. probe=%06d\n"
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(lines):
+            fh.write(row % i)
+
+
+def _tk_text():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        return root, tk.Text(root)
+    except Exception:
+        return None, None
+
+
+def bench_log(scale: float) -> Dict[str, dict]:
+    from ui.controls import ControlPanel
+
+    out = {}
+    tmp = Path(tempfile.mkdtemp(prefix="mdi-bench-log-"))
+    log_path = tmp / "big.log"
+    _write_log(log_path, 100_000)  # ~8 MB, well past the rotating handler's 512 KiB
+    out["panel.log_tail.first_read"] = _measure(lambda: LogTailer(log_path).read_new(), int(100 * scale))
+
+    tailer = LogTailer(log_path)
+    tailer.read_new()
+    appended = "2025-01-01 12:00:01,000 [INFO] ✅ Online.\n" * 20
+
+    def append():
+        with open(log_path, "a", encoding="utf-8") as fh:
+            fh.write(appended)
+
+    out["panel.log_tail.incremental"] = _measure(tailer.read_new, int(1000 * scale), setup=append)
+
+    root, txt = _tk_text()
+    if txt is not None:
+        panel = SimpleNamespace(txt=txt, _log_has_text=False)
+        batch = ["2025-01-01 12:00:01,000 [INFO] ✅ Online."] * 20
+        out["panel.refresh_log.append"] = _measure(
+            lambda: ControlPanel._append_log(panel, False, batch), int(500 * scale)
+        )
+        root.destroy()
+    return out
+
+
+# ---- driver ----
+def run(scale: float = 1.0) -> dict:
+    results: Dict[str, dict] = {}
+    with PortalSimulator() as sim:
+        cfg = bench_cfg(sim)
+        results.update(bench_net(sim, cfg, scale))
+        results.update(bench_worker(sim, cfg, scale))
+    results.update(bench_log(scale))
+    return {
+        "schema": SCHEMA,
+        "app_version": APP_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Print median ratios against baseline; returns the names that regressed past threshold."""
+    regressed = []
+    print(f"\n{'benchmark':40} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for name, now in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median"):
+            print(f"{name:40} {'-':>10} {now['median']:10.3f} {'new':>7}")
+            continue
+        ratio = now["median"] / base["median"]
+        flag = "  <-- slower" if ratio > threshold else ""
+        print(f"{name:40} {base['median']:10.3f} {now['median']:10.3f} {ratio:7.2f}{flag}")
+        if ratio > threshold:
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", default=f"bench-{APP_VERSION}.json", help="where to write the JSON results")
+    ap.add_argument("--compare", help="earlier results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=1.25, help="median ratio that counts as a regression")
+    ap.add_argument("--quick", action="store_true", help="fewer repetitions (smoke run)")
+    args = ap.parse_args(argv)
+
+    report = run(scale=0.1 if args.quick else 1.0)
+    Path(args.out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    for name, r in report["results"].items():
+        print(f"{name:40} median {r['median']:9.3f} ms   p95 {r['p95']:9.3f} ms   (n={r['n']})")
+    print(f"\nWrote {args.out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
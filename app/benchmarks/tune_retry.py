@@ -0,0 +1,115 @@
+"""
+Sweep retry settings over simulated reconnects (reconnect.simulate, virtual clock).
+
+Each scenario is a captive portal that rejects the first few POSTs, sometimes
+with a "too_many_devices" answer that clears once the old session expires. Every
+policy in the grid sees the same scenarios, so the table compares like with like.
+
+    python benchmarks/tune_retry.py --scenarios 5000
+    python benchmarks/tune_retry.py --grid 'backoff_initial_s=[0.5,1,2]' --grid 'post_grace_s=[2,6]'
+"""
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from reconnect import Probe, ReconnectMachine, RetryPolicy, VirtualClock, simulate  # noqa: E402
+
+DEFAULT_GRID = {
+    "backoff_initial_s": [0.5, 1, 2],
+    "backoff_max_s": [5, 10],
+    "post_grace_s": [2, 6],
+    "max_consecutive": [3, 5],
+}
+
+
+def make_scenario(rng: random.Random) -> dict:
+    return {
+        "failures": min(int(rng.expovariate(0.8)), 8),  # rejected POSTs before one sticks
+        "post_s": rng.uniform(0.2, 1.5),  # POST + settle time
+        "session_expires_s": rng.choice([0, 0, 0, 20, 60]),  # >0: old session blocks logins until then
+        "seed": rng.randrange(2 ** 32),
+    }
+
+
+def run_scenario(policy: RetryPolicy, sc: dict, horizon_s: float):
+    clock = VirtualClock()
+    left = {"failures": sc["failures"]}
+
+    def prober():
+        return Probe(False, True, True)
+
+    def transport():
+        clock.sleep(sc["post_s"])
+        if clock.now < sc["session_expires_s"]:
+            return False, "too_many_devices"
+        if left["failures"]:
+            left["failures"] -= 1
+            return False, "unknown"
+        return True, "ok"
+
+    machine = ReconnectMachine(policy, clock=clock, rng=random.Random(sc["seed"]))
+    return simulate(machine, prober, transport, clock, horizon_s=horizon_s)
+
+
+def _pct(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenarios", type=int, default=2000)
+    ap.add_argument("--horizon", type=float, default=600.0, help="simulated seconds before giving up")
+    ap.add_argument("--grid", action="append", default=[], metavar="KEY=JSON_LIST",
+                    help="replace one grid axis, e.g. post_grace_s=[1,3,6]")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--out", help="write all rows as JSON")
+    args = ap.parse_args(argv)
+
+    grid: Dict[str, list] = dict(DEFAULT_GRID)
+    for item in args.grid:
+        key, _, value = item.partition("=")
+        grid[key] = json.loads(value)
+
+    rng = random.Random(args.seed)
+    scenarios = [make_scenario(rng) for _ in range(args.scenarios)]
+
+    rows = []
+    t0 = time.perf_counter()
+    for values in itertools.product(*grid.values()):
+        policy = replace(RetryPolicy(), **dict(zip(grid.keys(), values)))
+        results = [run_scenario(policy, sc, args.horizon) for sc in scenarios]
+        times = sorted(r.time_to_online_s for r in results if r.time_to_online_s is not None)
+        rows.append({
+            "policy": dict(zip(grid.keys(), values)),
+            "ok": len(times) / len(results),
+            "mean_s": sum(times) / len(times) if times else None,
+            "p95_s": _pct(times, 0.95) if times else None,
+            "posts": sum(r.posts for r in results) / len(results),
+        })
+    elapsed = time.perf_counter() - t0
+    runs = len(rows) * len(scenarios)
+
+    rows.sort(key=lambda r: (-r["ok"], r["p95_s"] if r["p95_s"] is not None else float("inf")))
+    print(f"{'policy':60} {'ok':>6} {'mean s':>8} {'p95 s':>8} {'posts':>6}")
+    for r in rows[: args.top]:
+        policy = " ".join(f"{k}={v}" for k, v in r["policy"].items())
+        print(f"{policy:60} {r['ok']:6.1%} {r['mean_s'] or 0:8.2f} {r['p95_s'] or 0:8.2f} {r['posts']:6.2f}")
+    print(f"\n{runs} simulated reconnects in {elapsed:.2f}s ({runs / elapsed:,.0f}/s)")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"Wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,38 +1,69 @@
 # config.py
+import atexit
+import copy
 import json
 import logging
 import os
 import sys
+import tempfile
+import threading
+import time
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
-from startup import (
-    current_executable,
-    enable_startup,
-    disable_startup,
-    startup_status,
-)
-
-import keyring
 import platform
 
-# Explicitly set keyring backend for Windows to ensure it works in PyInstaller bundles
-if platform.system() == "Windows":
-    try:
-        from keyring.backends.Windows import WinVaultKeyring
-        keyring.set_keyring(WinVaultKeyring())
-    except ImportError:
-        # Backend not available, will use default
-        pass
-    except Exception:
-        # Other error, will use default
-        pass
+# keyring (backend discovery, ~50 ms) and startup (ctypes, winreg, plistlib) are
+# imported on first use so a second launch that only checks for a running
+# instance does not pay for them.
+_keyring_mod = None
+
+
+def _keyring():
+    global _keyring_mod
+    if _keyring_mod is None:
+        import keyring
+        # Explicitly set keyring backend for Windows to ensure it works in PyInstaller bundles
+        if platform.system() == "Windows":
+            try:
+                from keyring.backends.Windows import WinVaultKeyring
+                keyring.set_keyring(WinVaultKeyring())
+            except ImportError:
+                # Backend not available, will use default
+                pass
+            except Exception:
+                # Other error, will use default
+                pass
+        _keyring_mod = keyring
+    return _keyring_mod
+
+
+def current_executable(*args, **kwargs):
+    from startup import current_executable as _impl
+    return _impl(*args, **kwargs)
+
+
+def enable_startup(*args, **kwargs):
+    from startup import enable_startup as _impl
+    return _impl(*args, **kwargs)
+
+
+def disable_startup(*args, **kwargs):
+    from startup import disable_startup as _impl
+    return _impl(*args, **kwargs)
+
+
+def startup_status(*args, **kwargs):
+    from startup import startup_status as _impl
+    return _impl(*args, **kwargs)
+
 
 APP_NAME = "MDI AutoLogin"
 APP_VERSION = "0.1.6"  # Update this when releasing new versions
 DEVELOPER_NAME = "Pawas Aggarwal"  # Update with your name/username
 SERVICE_NAME = "MDI_AutoLogin"
 DEFAULT_SSID = "MDI"
+ENGINES = ("thread", "asyncio")  # worker implementations, see ui.worker.create_worker
 
 def app_dir() -> Path:
     base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA") or str(Path.home())
@@ -43,12 +74,135 @@ def app_dir() -> Path:
 CONFIG_PATH = app_dir() / "config.json"
 LOG_PATH = app_dir() / "mdi_autologin.log"
 
-def load_config():
-    if CONFIG_PATH.exists():
+# save_config calls closer together than this are merged into one trailing write...
+SAVE_DEBOUNCE_S = 0.5
+# ...but a steady stream of saves is written at least this often.
+SAVE_MAX_DELAY_S = 2.0
+
+
+def atomic_write(path: Path, text: str):
+    """Write via a temp file in the same directory, fsync, then rename over path."""
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(text)
+            fh.flush()
+            os.fsync(fh.fileno())
+        for attempt in range(5):
+            try:
+                os.replace(tmp, path)
+                break
+            except PermissionError:
+                # Windows refuses the rename while another process has the file open.
+                if attempt == 4:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    except BaseException:
         try:
-            return json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
-        except Exception:
+            os.unlink(tmp)
+        except OSError:
             pass
+        raise
+
+
+class _ConfigWriter:
+    """
+    Serialises config saves. A save is written debounce_s after the last one of
+    a burst, and never later than max_delay_s after the first, so a burst costs
+    one write of the newest config. Unchanged content is not rewritten, so the
+    worker's mtime check does not reload for nothing.
+    """
+
+    def __init__(self, debounce_s: float = SAVE_DEBOUNCE_S, max_delay_s: float = SAVE_MAX_DELAY_S):
+        self.debounce_s = debounce_s
+        self.max_delay_s = max_delay_s
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._pending = None  # JSON text waiting for the timer
+        self._first_pending = 0.0  # monotonic() of the oldest save not yet written
+        self._timer = None
+        self._last_text = None
+        self._last_mtime_ns = None
+
+    def save(self, cfg):
+        text = json.dumps(cfg, indent=2)
+        with self._lock:
+            now = time.monotonic()
+            if self._pending is None:
+                self._first_pending = now
+            self._pending = text
+            due = min(now + self.debounce_s, self._first_pending + self.max_delay_s)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(max(0.0, due - now), self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def pending(self):
+        """The config waiting to be written, if any (so readers see their own saves)."""
+        with self._lock:
+            text = self._pending
+        return json.loads(text) if text is not None else None
+
+    def flush(self):
+        written = None
+        with self._lock:
+            text, self._pending = self._pending, None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if text is not None:
+                written = self._write(text)
+        if written:
+            _store._written(*written)
+
+    def discard(self):
+        """Drop any pending save and forget write history."""
+        with self._lock:
+            self._pending = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._last_text = self._last_mtime_ns = None
+
+    def reset(self):
+        self.flush()
+        self.discard()
+
+    def _write(self, text: str):
+        """Returns (text, mtime_ns) for the store, or None when nothing was written."""
+        try:
+            unchanged = text == self._last_text and CONFIG_PATH.stat().st_mtime_ns == self._last_mtime_ns
+        except OSError:
+            unchanged = False
+        if unchanged:
+            return None
+        atomic_write(CONFIG_PATH, text)
+        self._last_text = text
+        self._last_mtime_ns = CONFIG_PATH.stat().st_mtime_ns
+        self.writes += 1
+        return text, self._last_mtime_ns
+
+
+_writer = _ConfigWriter()
+atexit.register(_writer.flush)
+
+
+def flush_config():
+    """Write out a debounced save now."""
+    _writer.flush()
+
+
+def delete_config():
+    """Remove config.json, dropping any save still waiting to be written."""
+    _writer.discard()
+    if CONFIG_PATH.exists():
+        CONFIG_PATH.unlink()
+    _credentials.invalidate()
+    _store._deleted()
+
+
+def default_config() -> dict:
     return {
         "ssid": DEFAULT_SSID,
         "username": "",
@@ -60,6 +214,24 @@ def load_config():
         "post_probe_delay_s": 1.5,
         "settle_max": 10,
         "settle_step": 0.5,
+        "snapshot_ttl_s": 1.5,
+        "campus_network": "172.16.0.0/16",
+        "force_on_target": False,
+        "ssid_cache_ttl_s": 20,
+        "connection_mode": "keepalive",
+        "probe_endpoints": [
+            "http://clients3.google.com/generate_204",
+            "http://connectivitycheck.gstatic.com/generate_204",
+            "http://www.gstatic.com/generate_204",
+        ],
+        "probe_timeout_s": 3,
+        "login_scan_max_chars": 65536,
+        "login_stream": True,
+        "login_max_bytes": 65536,
+        "engine": "thread",
+        "metrics_enabled": False,
+        "metrics_log_interval_s": 900,
+        "lock_credentials_in_memory": False,
         "first_run": True,
         "auto_start_on_launch": True,
         "minimize_on_start": True,
@@ -80,28 +252,329 @@ def load_config():
         },
     }
 
+
+# Keys that must be numbers; a bad value (hand edit) falls back to the default.
+_NUMERIC_KEYS = (
+    "base_interval", "retry_wait", "post_timeout", "post_grace_s", "post_probe_delay_s",
+    "settle_max", "settle_step", "snapshot_ttl_s", "ssid_cache_ttl_s", "probe_timeout_s",
+    "login_scan_max_chars", "login_max_bytes", "metrics_log_interval_s",
+)
+_STRING_KEYS = ("ssid", "username", "login_url", "engine", "connection_mode", "campus_network")
+_DICT_KEYS = ("retry", "login_error_patterns")
+
+
+def validate_config(cfg) -> dict:
+    """
+    Type-check a parsed config. Missing keys are left missing (callers use
+    cfg.get with a default); keys of the wrong type are reset to the default.
+    """
+    if not isinstance(cfg, dict):
+        return default_config()
+    defaults = default_config()
+    bad = []
+    for key in _NUMERIC_KEYS:
+        if key in cfg and (isinstance(cfg[key], bool) or not isinstance(cfg[key], (int, float))):
+            bad.append(key)
+    for key in _STRING_KEYS:
+        if key in cfg and not isinstance(cfg[key], str):
+            bad.append(key)
+    for key in _DICT_KEYS:
+        if key in cfg and not isinstance(cfg[key], dict):
+            bad.append(key)
+    for key in bad:
+        cfg[key] = defaults[key]
+    if bad:
+        logging.getLogger("mdi.config").warning("⚠️ Invalid config values reset to defaults: %s", ", ".join(bad))
+    return cfg
+
+
+def _read_config_file():
+    """(parsed config or None, mtime_ns or None). None config means missing or unreadable."""
+    try:
+        mtime_ns = CONFIG_PATH.stat().st_mtime_ns
+        return json.loads(CONFIG_PATH.read_text(encoding="utf-8")), mtime_ns
+    except FileNotFoundError:
+        return None, None
+    except Exception:
+        try:
+            return None, CONFIG_PATH.stat().st_mtime_ns
+        except OSError:
+            return None, None
+
+
+# How often the watcher stats config.json for hand edits; matches the worker's base_interval.
+CONFIG_WATCH_INTERVAL_S = 5.0
+
+
+class ConfigStore:
+    """
+    Process-wide parsed and validated config. Reads are served from memory; the
+    file is re-read only after our own saves or when the watcher notices an
+    external edit. Subscribers get (cfg, version) after every change; the
+    watcher thread only runs while there is at least one subscriber.
+    """
+
+    def __init__(self, watch_interval_s: float = CONFIG_WATCH_INTERVAL_S):
+        self.watch_interval_s = watch_interval_s
+        self.version = 0
+        self.credentials_version = 0  # bumped by set_password
+        self._lock = threading.Lock()
+        self._cfg = None  # loaded lazily
+        self._mtime_ns = None
+        self._subs = []
+        self._watcher = None
+        self._stop = threading.Event()
+
+    def get(self) -> dict:
+        """The shared snapshot. Treat it as read-only; use load_config() for a copy to edit."""
+        cfg = self._cfg
+        if cfg is None:
+            with self._lock:
+                if self._cfg is None:
+                    self._load_locked()
+                cfg = self._cfg
+        return cfg
+
+    def _load_locked(self):
+        cfg, self._mtime_ns = _read_config_file()
+        self._cfg = validate_config(cfg) if cfg is not None else default_config()
+        self.version += 1
+
+    def reload(self):
+        """Re-read the file and notify subscribers."""
+        with self._lock:
+            self._load_locked()
+            cfg, version = self._cfg, self.version
+        self._notify(cfg, version)
+
+    def invalidate(self):
+        """Forget the snapshot; the next get() reads the file again."""
+        with self._lock:
+            self._cfg = None
+            self._mtime_ns = None
+
+    def _written(self, text: str, mtime_ns: int):
+        """Called by the writer after a successful save."""
+        with self._lock:
+            self._cfg = validate_config(json.loads(text))
+            self._mtime_ns = mtime_ns
+            self.version += 1
+            cfg, version = self._cfg, self.version
+        self._notify(cfg, version)
+
+    def _deleted(self):
+        with self._lock:
+            self._cfg = default_config()
+            self._mtime_ns = None
+            self.version += 1
+            cfg, version = self._cfg, self.version
+        self._notify(cfg, version)
+
+    def credentials_changed(self):
+        with self._lock:
+            self.credentials_version += 1
+        self._notify(self.get(), self.version)
+
+    def check_for_external_edit(self) -> bool:
+        """One watcher tick: reload if the file changed behind our back."""
+        try:
+            mtime_ns = CONFIG_PATH.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if self._cfg is None or mtime_ns == self._mtime_ns:
+            return False
+        self.reload()
+        return True
+
+    def subscribe(self, callback):
+        """callback(cfg, version) runs on the saving or watcher thread. Returns an unsubscribe function."""
+        with self._lock:
+            self._subs.append(callback)
+            if self._watcher is None and self.watch_interval_s > 0:
+                self._stop.clear()
+                self._watcher = threading.Thread(target=self._watch, name="config-watch", daemon=True)
+                self._watcher.start()
+
+        def _unsubscribe():
+            with self._lock:
+                if callback in self._subs:
+                    self._subs.remove(callback)
+
+        return _unsubscribe
+
+    def _notify(self, cfg, version):
+        with self._lock:
+            subs = list(self._subs)
+        for cb in subs:
+            try:
+                cb(cfg, version)
+            except Exception as e:
+                logging.getLogger("mdi.config").debug("Config subscriber failed: %s", e)
+
+    def _watch(self):
+        while not self._stop.wait(self.watch_interval_s):
+            with self._lock:
+                if not self._subs:
+                    self._watcher = None
+                    return
+            try:
+                self.check_for_external_edit()
+            except Exception as e:
+                logging.getLogger("mdi.config").debug("Config watch failed: %s", e)
+
+    def stop(self):
+        self._stop.set()
+        self._watcher = None
+
+
+_store = ConfigStore()
+
+
+def get_config_store() -> ConfigStore:
+    return _store
+
+
+def load_config():
+    """A private, editable copy of the current config (including a save still being debounced)."""
+    pending = _writer.pending()
+    if pending is not None:
+        return pending
+    return copy.deepcopy(_store.get())
+
 def save_config(cfg):
-    CONFIG_PATH.write_text(json.dumps(cfg, indent=2), encoding="utf-8")
+    _writer.save(cfg)
+
+def _mlock(buf: bytearray) -> bool:
+    """Best effort: keep buf out of swap. False when the OS or the process limit refuses."""
+    if not buf:
+        return False
+    try:
+        import ctypes
+        import ctypes.util
+        c_buf = (ctypes.c_char * len(buf)).from_buffer(buf)
+        addr, size = ctypes.addressof(c_buf), ctypes.c_size_t(len(buf))
+        if platform.system() == "Windows":
+            return bool(ctypes.windll.kernel32.VirtualLock(ctypes.c_void_p(addr), size))
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        return libc.mlock(ctypes.c_void_p(addr), size) == 0
+    except Exception:
+        return False
+
+
+class _Secret:
+    """
+    A cached password held in a bytearray (optionally mlock'ed) that can be zeroed
+    on invalidation. The str handed to callers is an ordinary Python string.
+    """
+
+    __slots__ = ("_buf", "locked")
+
+    def __init__(self, value: str, lock: bool = False):
+        self._buf = bytearray(value.encode("utf-8"))
+        self.locked = _mlock(self._buf) if lock else False
+
+    def reveal(self) -> str:
+        return self._buf.decode("utf-8")
+
+    def wipe(self):
+        for i in range(len(self._buf)):
+            self._buf[i] = 0
+
+
+class CredentialCache:
+    """
+    In-process cache of keyring lookups keyed by (service, username), so the
+    login path does not go to WinVault / Secret Service on every call. Entries
+    are replaced by set_password and dropped by delete_password, invalidate() and
+    config resets. Backend errors are not cached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            secret = self._entries.get(key)
+            if secret is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return secret.reveal()
+
+    def put(self, key, value: str):
+        lock = bool(_store.get().get("lock_credentials_in_memory", False))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                old.wipe()
+            self._entries[key] = _Secret(value, lock)
+
+    def invalidate(self, username=None):
+        """Drop one user's entry, or everything when username is None."""
+        with self._lock:
+            if username is None:
+                dropped = list(self._entries.values())
+                self._entries.clear()
+            else:
+                dropped = [self._entries.pop((SERVICE_NAME, username), None)]
+        for secret in dropped:
+            if secret is not None:
+                secret.wipe()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_credentials = CredentialCache()
+
+
+def invalidate_credentials(username=None):
+    _credentials.invalidate(username)
+
 
 def get_password(username: str) -> str:
     if not username:
         return ""
+    key = (SERVICE_NAME, username)
+    cached = _credentials.get(key)
+    if cached is not None:
+        return cached
     try:
-        return keyring.get_password(SERVICE_NAME, username) or ""
+        password = _keyring().get_password(SERVICE_NAME, username) or ""
     except Exception as e:
         log = logging.getLogger("mdi.config")
         log.error("Failed to get password from keyring: %s", e)
         return ""
+    _credentials.put(key, password)
+    return password
 
 def set_password(username: str, password: str):
     if not username:
         return
     try:
-        keyring.set_password(SERVICE_NAME, username, password)
+        _keyring().set_password(SERVICE_NAME, username, password)
     except Exception as e:
+        _credentials.invalidate(username)
         log = logging.getLogger("mdi.config")
         log.error("Failed to set password in keyring: %s", e)
         raise
+    _credentials.put((SERVICE_NAME, username), password)
+    _store.credentials_changed()
+
+def delete_password(username: str):
+    """Remove the stored password for username (used by the reset actions)."""
+    _credentials.invalidate(username)
+    if not username:
+        return
+    try:
+        _keyring().delete_password(SERVICE_NAME, username)
+    except Exception as e:
+        logging.getLogger("mdi.config").info("No stored password removed for %s: %s", username, e)
+    _store.credentials_changed()
 
 def is_autostart_enabled() -> bool:
     return startup_status()
@@ -112,10 +585,11 @@ def set_autostart(enable: bool, exe_path: str = "") -> bool:
         return enable_startup(exe)
     return disable_startup()
 
-def setup_logger():
+def setup_logger(to_file: bool = True):
+    """Log to LOG_PATH (rotating) and stdout; to_file=False is stdout only, e.g. under systemd."""
     lg = logging.getLogger("mdi")
     lg.setLevel(logging.INFO)
-    if not any(isinstance(h, RotatingFileHandler) for h in lg.handlers):
+    if to_file and not any(isinstance(h, RotatingFileHandler) for h in lg.handlers):
         fh = RotatingFileHandler(LOG_PATH, maxBytes=512 * 1024, backupCount=3, encoding="utf-8", delay=True)
         fh.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
         lg.addHandler(fh)
@@ -123,5 +597,6 @@ def setup_logger():
         sh = logging.StreamHandler(sys.stdout)
         sh.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
         lg.addHandler(sh)
-    lg.info("Log file: %s", LOG_PATH)
+    if to_file:
+        lg.info("Log file: %s", LOG_PATH)
     return lg
\ No newline at end of file
@@ -0,0 +1,96 @@
+# app/headless.py
+"""
+Headless mode: the auto-login worker and the control channel, without Tk,
+pystray or PIL. For machines without a display and for running under systemd:
+
+    python app.py --headless [--no-log-file]
+
+Stops on SIGTERM or Ctrl+C. `python app.py --ctl status` works as with the tray.
+"""
+import logging
+import signal
+import threading
+
+from config import get_password, load_config
+from ipc import serve
+from ui.control_api import build_handlers
+from ui.worker import create_worker
+
+log = logging.getLogger("mdi.headless")
+
+
+class NullReporter:
+    """Stands in for TrayApp as the worker's tray_ref; there is no icon to update."""
+
+    def update_tooltip(self, running: bool):
+        pass
+
+
+class HeadlessApp:
+    """Same surface as TrayApp for ui.control_api: worker, start/stop_worker, manual_login."""
+
+    def __init__(self):
+        self.worker = None
+        self.control = None
+        self.reporter = NullReporter()
+        self.stop_event = threading.Event()
+
+    def start_worker(self, _=None):
+        if self.worker and self.worker.is_alive():
+            return
+        engine = load_config().get("engine", "thread")
+        self.worker = create_worker(self.reporter, engine)
+        self.worker.start()
+        log.info("▶️ Auto-login started (%s engine, headless).", engine)
+
+    def stop_worker(self, _=None):
+        if self.worker:
+            self.worker.stop()
+            self.worker.join(timeout=2.0)
+            self.worker = None
+        log.info("⏹️ Auto-login stopped.")
+
+    def manual_login(self, _=None):
+        """No dialogs to show: make sure the worker runs and have it check now."""
+        if self.worker and self.worker.running:
+            self.worker.login_now()
+        else:
+            self.start_worker()
+
+    def control_handlers(self):
+        def _show(_req):
+            log.info("Control panel requested, but running headless.")
+            return {"headless": True}
+
+        def _login(_req):
+            self.manual_login()
+            return {}
+
+        return {**build_handlers(self), "show": _show, "login": _login}
+
+    def quit(self, *_):
+        self.stop_event.set()
+
+    def run(self):
+        """Block until quit() (SIGTERM/SIGINT), then shut down cleanly."""
+        cfg = load_config()
+        if not cfg.get("username") or not get_password(cfg.get("username", "")):
+            log.info("⚠️ No credentials configured. Set them once from the tray app's Settings.")
+        signal.signal(signal.SIGTERM, self.quit)
+        signal.signal(signal.SIGINT, self.quit)
+        self.control = serve(self.control_handlers())
+        self.start_worker()
+        try:
+            # Short waits so signal handlers run promptly on every platform.
+            while not self.stop_event.wait(1.0):
+                pass
+        finally:
+            self.stop_worker()
+            if self.control:
+                self.control.stop()
+                self.control = None
+            log.info("👋 Headless instance exiting.")
+
+
+def run_headless():
+    HeadlessApp().run()
@@ -0,0 +1,218 @@
+# app/ipc.py
+"""
+Local control channel of the running instance.
+
+The instance that holds the single-instance lock listens on a Unix-domain socket
+in app_dir(). Windows builds of Python have no AF_UNIX, so there it listens on
+127.0.0.1 instead and writes the port and a per-run token to control.json in
+app_dir(); requests without that token are dropped. A request is one JSON object
+per connection, e.g. {"cmd": "show"}, answered with one JSON object that always
+carries "ok", "pid" and "version". Commands are registered by the UI; "ping" is
+built in.
+
+Only the standard library is imported, so a second launch can hand off its
+request without loading requests, Tk or pystray.
+"""
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from config import APP_VERSION, atomic_write, app_dir
+
+log = logging.getLogger("mdi.ipc")
+
+SOCKET_PATH = app_dir() / "control.sock"
+# Port and token of the TCP channel. Readable only by this user: mkstemp mode 0600
+# on POSIX; on Windows it inherits the ACL of the per-user %LOCALAPPDATA% folder.
+ENDPOINT_PATH = app_dir() / "control.json"
+
+# "unix" where AF_UNIX exists; "tcp" on 127.0.0.1 otherwise (Windows)
+TRANSPORT = "unix" if hasattr(socket, "AF_UNIX") else "tcp"
+LOOPBACK = "127.0.0.1"
+
+CONNECT_TIMEOUT_S = 1.0
+MAX_REQUEST_BYTES = 64 * 1024
+
+Handler = Callable[[dict], dict]
+
+
+def _recv_json(conn: socket.socket) -> dict:
+    buf = bytearray()
+    while b"\n" not in buf and len(buf) < MAX_REQUEST_BYTES:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        buf += chunk
+    line = bytes(buf).split(b"\n", 1)[0]
+    msg = json.loads(line.decode("utf-8"))
+    if not isinstance(msg, dict):
+        raise ValueError("expected a JSON object")
+    return msg
+
+
+def _send_json(conn: socket.socket, msg: dict):
+    conn.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+
+
+def _connect(path: Optional[Path], timeout: float) -> Tuple[socket.socket, dict]:
+    """Connected socket, plus the fields every request must carry on this transport."""
+    if TRANSPORT == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(path or SOCKET_PATH))
+        except OSError:
+            sock.close()
+            raise
+        return sock, {}
+    endpoint = json.loads(Path(path or ENDPOINT_PATH).read_text(encoding="utf-8"))
+    sock = socket.create_connection((LOOPBACK, int(endpoint["port"])), timeout=timeout)
+    return sock, {"token": str(endpoint["token"])}
+
+
+def send_command(cmd: str, timeout: float = CONNECT_TIMEOUT_S, path: Optional[Path] = None, **args) -> Optional[dict]:
+    """Send one command to the running instance. None if nothing is listening."""
+    try:
+        sock, auth = _connect(path, timeout)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        log.debug("Control channel %s: %s", cmd, e)
+        return None
+    try:
+        _send_json(sock, {"cmd": cmd, **args, **auth})
+        return _recv_json(sock)
+    except (OSError, ValueError) as e:
+        log.debug("Control channel %s: %s", cmd, e)
+        return None
+    finally:
+        sock.close()
+
+
+class ControlServer(threading.Thread):
+    """
+    Accept loop for the control socket. Handlers run on this thread, so they must
+    return quickly and hand real work to the Tk thread or a worker thread.
+    """
+
+    def __init__(self, handlers: Dict[str, Handler], path: Optional[Path] = None):
+        super().__init__(name="mdi-control", daemon=True)
+        self.transport = TRANSPORT
+        # The socket itself, or the endpoint file of the TCP channel
+        self.path = Path(path or (SOCKET_PATH if self.transport == "unix" else ENDPOINT_PATH))
+        self._token: Optional[str] = None
+        self.handlers: Dict[str, Handler] = {"ping": lambda _req: {}}
+        self.handlers.update(handlers)
+        self.stop_event = threading.Event()
+        self._sock: Optional[socket.socket] = None
+
+    def start(self):
+        """Bind and start serving. Only call while holding the single-instance lock."""
+        sock = self._bind_unix() if self.transport == "unix" else self._bind_tcp()
+        self._sock = sock
+        super().start()
+        where = self.path if self.transport == "unix" else "%s:%d" % sock.getsockname()[:2]
+        log.info("🔌 Control channel listening on %s", where)
+
+    def _bind_unix(self) -> socket.socket:
+        try:
+            self.path.unlink()  # left behind by an instance that crashed
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(str(self.path))
+            # Owner-only before listen(), so no one else can ever connect. Not via umask:
+            # that is process-wide and other threads are creating files.
+            os.chmod(self.path, 0o600)
+            sock.listen(8)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _bind_tcp(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.bind((LOOPBACK, 0))
+            sock.listen(8)
+            self._token = secrets.token_hex(16)
+            # Keep the token out of other users' reach (see ENDPOINT_PATH)
+            atomic_write(self.path, json.dumps({"port": sock.getsockname()[1], "token": self._token, "pid": os.getpid()}))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                if self.stop_event.is_set():
+                    break
+                continue
+            with conn:
+                if self.stop_event.is_set():
+                    break
+                self._serve(conn)
+
+    def _serve(self, conn: socket.socket):
+        conn.settimeout(CONNECT_TIMEOUT_S)
+        try:
+            req = _recv_json(conn)
+        except (OSError, ValueError) as e:
+            log.debug("Bad control request: %s", e)
+            return
+        token = req.pop("token", None)
+        if self._token is not None and not hmac.compare_digest(str(token).encode(), self._token.encode()):
+            log.debug("Control request without a valid token dropped")
+            return
+        reply = self.dispatch(req)
+        try:
+            _send_json(conn, reply)
+        except OSError as e:
+            log.debug("Control reply failed: %s", e)
+
+    def dispatch(self, req: dict) -> dict:
+        cmd = str(req.get("cmd", ""))
+        handler = self.handlers.get(cmd)
+        if handler is None:
+            reply = {"ok": False, "error": f"unknown command: {cmd}"}
+        else:
+            try:
+                reply = {"ok": True, **(handler(req) or {})}
+            except Exception as e:
+                log.exception("Control command %s failed", cmd)
+                reply = {"ok": False, "error": str(e)}
+        reply.update(pid=os.getpid(), version=APP_VERSION)
+        return reply
+
+    def stop(self):
+        if self._sock is None:
+            return
+        self.stop_event.set()
+        # accept() does not reliably wake up on close(); a dummy connection does.
+        send_command("ping", timeout=0.2, path=self.path)
+        self._sock.close()
+        self.join(timeout=1.0)
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+        log.info("🔌 Control channel closed.")
+
+
+def serve(handlers: Dict[str, Handler]) -> Optional[ControlServer]:
+    """Start the control channel for this instance; None (logged) if it cannot bind."""
+    server = ControlServer(handlers)
+    try:
+        server.start()
+    except OSError:
+        log.exception("Control channel unavailable.")
+        return None
+    return server
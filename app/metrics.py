@@ -0,0 +1,276 @@
+# app/metrics.py
+"""
+In-process metrics: counters and fixed-bucket latency histograms.
+
+Hot paths are wrapped with @timed("name") or `with timer("name"):`. While metrics
+are disabled (the default) the wrapper is one attribute check and a direct call,
+so the hooks can stay in place in production. snapshot() returns call counts and
+p50/p95/p99 per histogram.
+
+Modules that keep their own counters (net's SSID cache, connection pool and
+probe racer) register them with register_stats(); they are collected whether or
+not metrics are enabled and appear in snapshot()["stats"] and the log summary.
+"""
+import bisect
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+log = logging.getLogger("mdi.metrics")
+
+# Upper bounds in milliseconds; anything slower lands in the overflow bucket.
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class _State:
+    enabled = False
+
+
+_state = _State()
+
+
+def set_enabled(enabled: bool):
+    _state.enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _state.enabled
+
+
+class Counter:
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n: int = 1):
+        with self._lock:
+            self.value += n
+
+
+class Histogram:
+    """Counts per bucket plus count/sum/min/max. Percentiles are interpolated within a bucket."""
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.name = name
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            seen = 0
+            for i, n in enumerate(self.counts):
+                if n and seen + n >= rank:
+                    lo = self.bounds[i - 1] if i > 0 else 0.0
+                    hi = self.bounds[i] if i < len(self.bounds) else self.max
+                    lo, hi = max(lo, self.min), min(hi, self.max)
+                    return lo + (hi - lo) * ((rank - seen) / n)
+                seen += n
+            return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3),
+            "min_ms": round(self.min, 3),
+            "max_ms": round(self.max, 3),
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Counter] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def counter(self, name: str) -> Counter:
+        c = self.counters.get(name)
+        if c is None:
+            with self._lock:
+                c = self.counters.setdefault(name, Counter(name))
+        return c
+
+    def histogram(self, name: str) -> Histogram:
+        h = self.histograms.get(name)
+        if h is None:
+            with self._lock:
+                h = self.histograms.setdefault(name, Histogram(name))
+        return h
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        return {
+            "enabled": _state.enabled,
+            "counters": {k: c.value for k, c in sorted(counters.items())},
+            "histograms": {k: h.summary() for k, h in sorted(histograms.items())},
+        }
+
+
+REGISTRY = Registry()
+
+_stats_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_stats(name: str, source: Callable[[], Dict[str, Any]]):
+    """Report source() under snapshot()["stats"][name]. Sources must be cheap: no I/O."""
+    _stats_sources[name] = source
+
+
+def _collect_stats() -> Dict[str, Any]:
+    out = {}
+    for name, source in sorted(_stats_sources.items()):
+        try:
+            out[name] = source()
+        except Exception as e:
+            log.debug("Stats source %s failed: %s", name, e)
+    return out
+
+
+def inc(name: str, n: int = 1):
+    if _state.enabled:
+        REGISTRY.counter(name).inc(n)
+
+
+def observe(name: str, value_ms: float):
+    if _state.enabled:
+        REGISTRY.histogram(name).observe(value_ms)
+
+
+def snapshot() -> Dict[str, Any]:
+    return {**REGISTRY.snapshot(), "stats": _collect_stats()}
+
+
+def reset():
+    REGISTRY.reset()
+
+
+def timed(name: str) -> Callable:
+    """Decorator: record each call's duration in histogram `name`, and raised exceptions in `name.errors`."""
+
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                REGISTRY.counter(name + ".errors").inc()
+                raise
+            finally:
+                REGISTRY.histogram(name).observe((time.perf_counter() - t0) * 1000)
+
+        return wrapper
+
+    return deco
+
+
+class _Timer:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        REGISTRY.histogram(self.name).observe((time.perf_counter() - self.t0) * 1000)
+        if exc_type is not None:
+            REGISTRY.counter(self.name + ".errors").inc()
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """Context manager form of @timed, for loop bodies."""
+    return _Timer(name) if _state.enabled else _NULL_TIMER
+
+
+def format_summary(snap: Optional[Dict[str, Any]] = None) -> str:
+    """One line per histogram, for the log."""
+    snap = snap or snapshot()
+    parts = []
+    for name, h in snap["histograms"].items():
+        if h.get("count"):
+            parts.append(f"{name} n={h['count']} p50={h['p50_ms']:.1f} p95={h['p95_ms']:.1f} p99={h['p99_ms']:.1f}ms")
+    for name, stats in snap.get("stats", {}).items():
+        # Top-level numbers only; per-endpoint detail stays in the control reply.
+        fields = " ".join(f"{k}={v}" for k, v in stats.items() if isinstance(v, (int, float, str)))
+        if fields:
+            parts.append(f"{name} {fields}")
+    return "; ".join(parts) or "no samples"
+
+
+class _Reporter:
+    """Logs format_summary() at most every interval_s seconds."""
+
+    def __init__(self):
+        self.last = time.monotonic()
+
+    def maybe_log(self, interval_s: float):
+        if not _state.enabled or interval_s <= 0:
+            return
+        now = time.monotonic()
+        if now - self.last >= interval_s:
+            self.last = now
+            log.info("📊 Metrics: %s", format_summary())
+
+
+_reporter = _Reporter()
+
+
+def configure(cfg):
+    """Apply metrics_enabled from config."""
+    set_enabled(bool(cfg.get("metrics_enabled", False)))
+
+
+def maybe_log_summary(cfg):
+    _reporter.maybe_log(float(cfg.get("metrics_log_interval_s", 900)))
@@ -1,28 +1,146 @@
 # net.py
+import codecs
+import concurrent.futures
+import functools
+import ipaddress
 import platform
 import re
+import socket
+import struct
 import subprocess
+import threading
 import time
 import logging
-from typing import Any, Dict, List, Tuple
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+
+import metrics
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 log = logging.getLogger("mdi.net")
 
+_PROBE_URL = "http://clients3.google.com/generate_204"
+DEFAULT_PROBE_ENDPOINTS = (
+    _PROBE_URL,
+    "http://connectivitycheck.gstatic.com/generate_204",
+    "http://www.gstatic.com/generate_204",
+)
+PROBE_TIMEOUT_S = 3.0
+
+# "keepalive" pools one connection per host and reuses it; "close" opens a new
+# TCP (and TLS) connection for every request like older versions did.
+CONNECTION_MODES = ("keepalive", "close")
+_POOL_HOSTS = 4  # probe host, portal, spare
+_POOL_PER_HOST = 2
+
+_conn_lock = threading.Lock()
+_conn_stats = {"requests": 0, "new_connections": 0, "resets": 0}
+
+
+def _count(key: str):
+    with _conn_lock:
+        _conn_stats[key] += 1
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _count("new_connections")
+        super().connect()
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _count("new_connections")
+        super().connect()
+
+
+class _CountingHTTPPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with a small per-host pool that counts fresh vs reused connections."""
+
+    def __init__(self):
+        super().__init__(pool_connections=_POOL_HOSTS, pool_maxsize=_POOL_PER_HOST, max_retries=0)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _CountingHTTPPool, "https": _CountingHTTPSPool}
+
+    def send(self, request, *args, **kwargs):
+        _count("requests")
+        return super().send(request, *args, **kwargs)
+
+    def drop_host(self, host: str):
+        pools = self.poolmanager.pools
+        for key in list(pools.keys()):
+            if key.key_host == host:
+                try:
+                    del pools[key]  # disposing the pool closes its sockets
+                except KeyError:
+                    pass
+
+
 _session = requests.Session()
 _session.headers.update(
     {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AutoLogin",
         "Accept": "*/*",
-        "Connection": "close",
+        "Connection": "keep-alive",
     }
 )
+_adapter = _PooledAdapter()
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+_connection_mode = "keepalive"
+
+
+def configure_connections(mode: str):
+    """Switch between pooled keep-alive and one-connection-per-request."""
+    global _connection_mode
+    if mode not in CONNECTION_MODES:
+        log.info("⚠️ Unknown connection_mode %r; using keepalive.", mode)
+        mode = "keepalive"
+    if mode == _connection_mode:
+        return
+    _connection_mode = mode
+    _session.headers["Connection"] = "keep-alive" if mode == "keepalive" else "close"
+    reset_connections()
+
+
+def reset_connections():
+    """Close every pooled socket, e.g. after the network changed underneath us."""
+    _adapter.poolmanager.clear()
+    _count("resets")
+
+
+def connection_stats() -> Dict[str, Any]:
+    with _conn_lock:
+        stats = dict(_conn_stats)
+    stats["reused"] = max(0, stats["requests"] - stats["new_connections"])
+    stats["mode"] = _connection_mode
+    return stats
+
+
+metrics.register_stats("net.connections", connection_stats)
 
-_PROBE_URL = "http://clients3.google.com/generate_204"
 SYSTEM = platform.system()
+SNAPSHOT_TTL_S = 1.5
+CAMPUS_NETWORK = "172.16.0.0/16"
+SETTLE_INITIAL_STEP_S = 0.05
+SETTLE_PORTAL_GRACE_S = 3.0
+SSID_CACHE_TTL_S = 20.0
 
 if SYSTEM == "Windows":
     _si = subprocess.STARTUPINFO()
@@ -34,6 +152,7 @@ else:
     _NO_WINDOW = 0
 
 
+@metrics.timed("net.run_cmd")
 def _run_cmd(cmd: List[str]) -> str:
     try:
         return subprocess.run(
@@ -48,8 +167,159 @@ def _run_cmd(cmd: List[str]) -> str:
         return ""
 
 
-def _probe():
-    return _session.get(_PROBE_URL, timeout=3, verify=False, allow_redirects=True)
+class _ProbeRacer:
+    """
+    Sends the connectivity check to every endpoint at once and returns the
+    first HTTP answer (204 or an intercepted page are both conclusive).
+    Requests that have not started are cancelled; ones already in flight are
+    abandoned and only update the per-endpoint timings when they finish.
+    An endpoint with an abandoned request still running sits out later races,
+    so a hung endpoint holds at most one executor worker however often settle
+    probes.
+    """
+
+    def __init__(self, endpoints=DEFAULT_PROBE_ENDPOINTS, timeout: float = PROBE_TIMEOUT_S):
+        self.endpoints: Tuple[str, ...] = tuple(endpoints)
+        self.timeout = timeout
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._inflight: set = set()  # endpoints with a race request still running
+        self.races = 0
+        self.race_ms_total = 0.0
+        self.busy_skips = 0  # endpoints left out of a race because their last request was still running
+
+    def configure(self, endpoints, timeout: float):
+        self.endpoints = tuple(endpoints) or DEFAULT_PROBE_ENDPOINTS
+        self.timeout = timeout
+
+    def _record(self, url: str, key: str, elapsed_ms: Optional[float] = None):
+        with self._lock:
+            st = self._stats.setdefault(url, {"ok": 0, "errors": 0, "wins": 0, "ms_total": 0.0, "last_ms": 0.0})
+            st[key] += 1
+            if elapsed_ms is not None:
+                st["ms_total"] += elapsed_ms
+                st["last_ms"] = elapsed_ms
+
+    def _get(self, url: str, timeout: float):
+        t0 = time.perf_counter()
+        try:
+            r = _session.get(url, timeout=timeout, verify=False, allow_redirects=True)
+        except Exception:
+            self._record(url, "errors")
+            raise
+        self._record(url, "ok", (time.perf_counter() - t0) * 1000)
+        if r.status_code != 204:
+            # An intercepted connection would keep answering with the portal page
+            # after login; never hand it back out.
+            _adapter.drop_host(urllib3.util.parse_url(url).host)
+        return r
+
+    def _race_get(self, url: str, timeout: float):
+        try:
+            return self._get(url, timeout)
+        finally:
+            with self._lock:
+                self._inflight.discard(url)
+
+    def _pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="probe")
+        return self._executor
+
+    def probe(self, timeout: Optional[float] = None):
+        endpoints = self.endpoints
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        t0 = time.perf_counter()
+        if len(endpoints) == 1:
+            r = self._get(endpoints[0], timeout)
+            winner = endpoints[0]
+        else:
+            with self._lock:
+                idle = [url for url in endpoints if url not in self._inflight]
+                self._inflight.update(idle)
+                self.busy_skips += len(endpoints) - len(idle)
+            if not idle:
+                raise requests.ConnectionError("every probe endpoint still has a request in flight")
+            futures = {self._pool().submit(self._race_get, url, timeout): url for url in idle}
+            r, winner, error = None, None, None
+            try:
+                for fut in concurrent.futures.as_completed(futures, timeout=timeout + 1):
+                    try:
+                        r = fut.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    winner = futures[fut]
+                    break
+            except concurrent.futures.TimeoutError as e:
+                error = e
+            finally:
+                for fut, url in futures.items():
+                    if fut.cancel():
+                        with self._lock:
+                            self._inflight.discard(url)
+            if r is None:
+                raise error or requests.ConnectionError("no probe endpoint answered")
+        self._record(winner, "wins")
+        with self._lock:
+            self.races += 1
+            self.race_ms_total += (time.perf_counter() - t0) * 1000
+        return r
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            for url, st in self._stats.items():
+                endpoints[url] = {
+                    "ok": int(st["ok"]),
+                    "errors": int(st["errors"]),
+                    "wins": int(st["wins"]),
+                    "avg_ms": round(st["ms_total"] / st["ok"], 2) if st["ok"] else None,
+                    "last_ms": round(st["last_ms"], 2),
+                }
+            avg = round(self.race_ms_total / self.races, 2) if self.races else None
+            return {"races": self.races, "avg_ms": avg, "busy_skips": self.busy_skips, "endpoints": endpoints}
+
+
+_racer = _ProbeRacer()
+
+
+def configure_probe(endpoints=None, timeout: Optional[float] = None):
+    _racer.configure(endpoints or DEFAULT_PROBE_ENDPOINTS, float(timeout or PROBE_TIMEOUT_S))
+
+
+def probe_stats() -> Dict[str, Any]:
+    return _racer.stats()
+
+
+metrics.register_stats("net.probes", probe_stats)
+
+
+# host:port of the configured login servlet; redirects there count as the portal
+# even off 172.16.x (e.g. a local portal_sim instance).
+_portal_netloc = ""
+
+
+def configure_portal(login_url: Optional[str]):
+    global _portal_netloc
+    _portal_netloc = urlsplit(login_url or "").netloc
+
+
+def _is_portal_url(url: str) -> bool:
+    return "172.16." in url or (bool(_portal_netloc) and urlsplit(url).netloc == _portal_netloc)
+
+
+def apply_net_config(cfg):
+    """Push the network-related settings from a (re)loaded config into this module."""
+    configure_connections(cfg.get("connection_mode", "keepalive"))
+    configure_probe(cfg.get("probe_endpoints"), cfg.get("probe_timeout_s"))
+    configure_portal(cfg.get("login_url"))
+
+
+@metrics.timed("net.probe")
+def _probe(timeout: Optional[float] = None):
+    return _racer.probe(timeout)
 
 
 def _current_ssids_windows() -> List[str]:
@@ -94,45 +364,157 @@ def _current_ssids() -> List[str]:
     return _current_ssids_linux()
 
 
-def any_connected_ssid(ssid: str) -> bool:
+class SsidCache:
+    """
+    Remembers the last SSID lookup until a network event invalidates it or it
+    is older than the TTL, so a stable network costs no netsh/nmcli calls.
+    """
+
+    def __init__(self, ttl_s: float = SSID_CACHE_TTL_S):
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._ssids: Optional[List[str]] = None
+        self._taken_at = 0.0
+        self._gen = 0
+
+    def get(self, max_age: Optional[float] = None) -> List[str]:
+        if max_age is None:
+            max_age = self.ttl_s
+        with self._lock:
+            if self._ssids is not None and time.monotonic() - self._taken_at <= max_age:
+                self.hits += 1
+                return list(self._ssids)
+            self.misses += 1
+            gen = self._gen
+            ssids = _current_ssids()
+            if gen == self._gen:
+                self._ssids, self._taken_at = ssids, time.monotonic()
+            return list(ssids)
+
+    def invalidate(self):
+        # Lock-free so event callbacks never wait behind a slow lookup.
+        self._gen += 1
+        self._ssids = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "cached": self._ssids is not None}
+
+
+_ssid_cache = SsidCache()
+
+
+def ssid_cache_stats() -> Dict[str, Any]:
+    return _ssid_cache.stats()
+
+
+metrics.register_stats("net.ssid_cache", ssid_cache_stats)
+
+
+def any_connected_ssid(ssid: str, max_age: Optional[float] = None) -> bool:
     target = ssid.lower()
-    for s in _current_ssids():
+    for s in _ssid_cache.get(max_age):
         if target in s.lower():
             return True
     return False
 
 
-def _gateway_is_campus_windows() -> bool:
-    out = _run_cmd(["ipconfig"])
-    for gw in re.findall(r"Default Gateway[^\r\n]*:\s*([\d\.]+)", out, re.I):
-        if gw.startswith("172.16."):
-            return True
-    return False
+# Gateway backends return the default gateway(s) as dotted strings, or None when
+# the backend cannot answer on this machine so the next one is tried.
+GatewayBackend = Callable[[], Optional[List[str]]]
 
+_PROC_NET_ROUTE = "/proc/net/route"
+_RTF_GATEWAY = 0x2
 
-def _gateway_is_campus_mac() -> bool:
-    out = _run_cmd(["netstat", "-rn"])
-    for line in out.splitlines():
+
+def _default_gateways_proc() -> Optional[List[str]]:
+    """Read the kernel routing table directly; no fork/exec."""
+    try:
+        with open(_PROC_NET_ROUTE, encoding="ascii") as fh:
+            lines = fh.readlines()[1:]
+    except OSError:
+        return None
+    gws = []
+    for line in lines:
         parts = line.split()
-        if len(parts) >= 2 and parts[0] == "default" and parts[1].startswith("172.16."):
-            return True
-    return False
+        if len(parts) < 4 or parts[1] != "00000000":
+            continue
+        try:
+            if not int(parts[3], 16) & _RTF_GATEWAY:
+                continue
+            gws.append(socket.inet_ntoa(struct.pack("=I", int(parts[2], 16))))
+        except (ValueError, struct.error):
+            continue
+    return gws
 
 
-def _gateway_is_campus_linux() -> bool:
+def _default_gateways_ip_route() -> Optional[List[str]]:
     out = _run_cmd(["ip", "route"])
+    return re.findall(r"^default\s+via\s+([\d\.]+)", out, re.M)
+
+
+def _default_gateways_ipconfig() -> Optional[List[str]]:
+    out = _run_cmd(["ipconfig"])
+    return re.findall(r"Default Gateway[^\r\n]*:\s*([\d\.]+)", out, re.I)
+
+
+def _default_gateways_netstat() -> Optional[List[str]]:
+    out = _run_cmd(["netstat", "-rn"])
+    gws = []
     for line in out.splitlines():
-        if line.startswith("default") and " via 172.16." in line:
-            return True
-    return False
+        parts = line.split()
+        if len(parts) >= 2 and parts[0] == "default":
+            gws.append(parts[1])
+    return gws
 
 
-def gateway_is_campus() -> bool:
+def _platform_gateway_backends() -> List[GatewayBackend]:
     if SYSTEM == "Windows":
-        return _gateway_is_campus_windows()
+        return [_default_gateways_ipconfig]
     if SYSTEM == "Darwin":
-        return _gateway_is_campus_mac()
-    return _gateway_is_campus_linux()
+        return [_default_gateways_netstat]
+    return [_default_gateways_proc, _default_gateways_ip_route]
+
+
+_gateway_backends: List[GatewayBackend] = _platform_gateway_backends()
+
+
+def set_gateway_backends(backends: Optional[List[GatewayBackend]] = None):
+    """Replace the gateway lookup chain (None restores the platform default)."""
+    global _gateway_backends
+    _gateway_backends = list(backends) if backends is not None else _platform_gateway_backends()
+
+
+def default_gateways() -> List[str]:
+    for backend in _gateway_backends:
+        try:
+            gws = backend()
+        except Exception:
+            gws = None
+        if gws is not None:
+            return gws
+    return []
+
+
+@functools.lru_cache(maxsize=8)
+def _campus_network(network) -> ipaddress.IPv4Network:
+    try:
+        return ipaddress.ip_network(network or CAMPUS_NETWORK, strict=False)
+    except ValueError:
+        log.info("⚠️ Invalid campus_network %r; using %s.", network, CAMPUS_NETWORK)
+        return ipaddress.ip_network(CAMPUS_NETWORK)
+
+
+def gateway_is_campus(network=None) -> bool:
+    net = _campus_network(network)
+    for gw in default_gateways():
+        try:
+            if ipaddress.ip_address(gw) in net:
+                return True
+        except ValueError:
+            continue
+    return False
 
 
 def target_network_available(cfg) -> bool:
@@ -140,14 +522,23 @@ def target_network_available(cfg) -> bool:
     True only when we can see the target SSID or the campus gateway.
     Prevents login attempts while Wi-Fi is off or on another network.
     """
-    return any_connected_ssid(cfg["ssid"]) or gateway_is_campus()
+    if cfg.get("force_on_target"):
+        return True  # testing against portal_sim, off campus
+    ssid_ttl = cfg.get("ssid_cache_ttl_s")
+    return (
+        any_connected_ssid(cfg["ssid"], float(ssid_ttl) if ssid_ttl is not None else None)
+        or gateway_is_campus(cfg.get("campus_network"))
+    )
+
+def _is_captive_response(r) -> bool:
+    redirected = r.url not in _racer.endpoints
+    captive_markers = _is_portal_url(r.url) or ("24online" in r.text.lower())
+    return (r.status_code != 204) or redirected or captive_markers
+
 
 def portal_intercept_present() -> bool:
     try:
-        r = _probe()
-        redirected = r.url != _PROBE_URL
-        captive_markers = ("172.16." in r.url) or ("24online" in r.text.lower())
-        return (r.status_code != 204) or redirected or captive_markers
+        return _is_captive_response(_probe())
     except Exception:
         return True
 
@@ -163,6 +554,80 @@ def online_now() -> bool:
         return False
 
 
+@dataclass(frozen=True)
+class NetworkSnapshot:
+    """Result of one probe plus one SSID/gateway lookup, shared between callers."""
+
+    online: bool
+    captive: bool
+    on_target: bool
+    redirect_url: str
+    taken_at: float  # time.monotonic() when the probe finished
+
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+
+_snapshot_lock = threading.Lock()
+_snapshot: Optional[NetworkSnapshot] = None
+_snapshot_ssid: Optional[str] = None
+_snapshot_gen = 0
+
+
+def _take_snapshot(cfg) -> NetworkSnapshot:
+    try:
+        r = _probe()
+        online = r.status_code == 204
+        captive = _is_captive_response(r)
+        redirect_url = r.url if r.url not in _racer.endpoints else ""
+    except Exception:
+        online, captive, redirect_url = False, True, ""
+    on_target = target_network_available(cfg)
+    return NetworkSnapshot(online, captive, on_target, redirect_url, time.monotonic())
+
+
+def network_snapshot(cfg, max_age: Optional[float] = None) -> NetworkSnapshot:
+    """
+    Return the shared network state, probing only when the cached one is older
+    than max_age (defaults to cfg["snapshot_ttl_s"]). Concurrent callers wait
+    for the in-flight probe instead of starting their own.
+    """
+    global _snapshot, _snapshot_ssid
+    if max_age is None:
+        max_age = float(cfg.get("snapshot_ttl_s", SNAPSHOT_TTL_S))
+    ssid = cfg.get("ssid")
+    with _snapshot_lock:
+        snap = _snapshot
+        if snap is not None and _snapshot_ssid == ssid and snap.age() <= max_age:
+            return snap
+        gen = _snapshot_gen
+        snap = _take_snapshot(cfg)
+        # A network event during the probe makes this result stale for everyone else.
+        if gen == _snapshot_gen:
+            _snapshot, _snapshot_ssid = snap, ssid
+        return snap
+
+
+def cached_snapshot() -> Optional[NetworkSnapshot]:
+    """The last shared snapshot, however old, without probing. None after a network event."""
+    return _snapshot
+
+
+def invalidate_snapshot():
+    """Drop the cached snapshot so the next caller probes again. Never blocks."""
+    global _snapshot, _snapshot_gen
+    _snapshot_gen += 1
+    _snapshot = None
+
+
+def invalidate_network_caches():
+    """Call on any network change: drops the snapshot, cached SSIDs and pooled sockets."""
+    invalidate_snapshot()
+    _ssid_cache.invalidate()
+    reset_connections()
+
+
+@metrics.timed("net.send_login")
 def send_login(cfg, username: str, password: str) -> bool:
     payload = {"mode": "191", "username": username, "password": password}
     try:
@@ -180,37 +645,158 @@ def send_login(cfg, username: str, password: str) -> bool:
         return False
 
 
-def settle_until_online(max_s: float, step: float) -> bool:
-    waited = 0.0
-    while waited < max_s:
-        if online_now():
+def _settle_probe(timeout: float) -> str:
+    """One settle check: "online", "portal" (still redirected to the portal) or "pending"."""
+    try:
+        r = _probe(timeout)
+    except Exception:
+        return "pending"
+    if r.status_code == 204:
+        return "online"
+    if r.url not in _racer.endpoints and _is_portal_url(r.url):
+        return "portal"
+    return "pending"
+
+
+@metrics.timed("net.settle")
+def settle_until_online(
+    max_s: float,
+    step: float,
+    initial_step: float = SETTLE_INITIAL_STEP_S,
+    portal_grace_s: Optional[float] = SETTLE_PORTAL_GRACE_S,
+) -> bool:
+    """
+    Poll until online, starting at initial_step and doubling up to step, against a
+    monotonic deadline of max_s (probe time counts too). Gives up early when the
+    portal is still redirecting us after portal_grace_s, since the login did not take.
+    """
+    start = time.monotonic()
+    deadline = start + max_s
+    interval = min(initial_step, step)
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        state = _settle_probe(remaining)
+        if state == "online":
             return True
-        time.sleep(step)
-        waited += step
-    return False
+        if state == "portal" and portal_grace_s is not None and time.monotonic() - start >= portal_grace_s:
+            log.info("↩️ Portal still redirecting after %.1fs; login did not take.", time.monotonic() - start)
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+        interval = min(interval * 2, step)
 
 
-def analyze_login_response(cfg, http_status: int, url: str, text: str) -> Tuple[str, str]:
-    if 200 <= http_status < 400:
-        patterns = cfg.get("login_error_patterns") or {}
-        low = (text or "").lower()
+LOGIN_SCAN_MAX_CHARS = 64 * 1024
+
+
+class LoginClassifier:
+    """
+    login_error_patterns compiled once, kept in config order so the first
+    matching code still wins. Only the first max_chars of a page are scanned.
+    Pages are lowercased before matching, so all-lowercase patterns skip re.I
+    (several times cheaper in the regex engine); others keep it.
+    """
+
+    def __init__(self, patterns: Dict[str, str], max_chars: int = LOGIN_SCAN_MAX_CHARS):
+        self.max_chars = max_chars
+        self.rules: List[Tuple[str, "re.Pattern[str]"]] = []
         for code, rx in patterns.items():
             try:
-                if re.search(rx, low, re.I | re.M):
-                    return code, code.replace("_", " ").title()
-            except re.error:
-                pass
+                flags = re.M if rx == rx.lower() else re.I | re.M
+                self.rules.append((code, re.compile(rx, flags)))
+            except re.error as e:
+                log.info("⚠️ Ignoring invalid login_error_patterns[%s]: %s", code, e)
+
+    def match(self, low: str) -> Optional[str]:
+        for code, rx in self.rules:
+            if rx.search(low):
+                return code
+        return None
+
+    def match_top(self, low: str) -> Optional[str]:
+        """The first code in config order, if it matches; nothing later in the page can outrank it."""
+        if self.rules and self.rules[0][1].search(low):
+            return self.rules[0][0]
+        return None
+
+    def classify(self, http_status: int, url: str, text: str) -> Tuple[str, str]:
+        if not 200 <= http_status < 400:
+            return "unknown", f"HTTP {http_status}"
+        low = (text or "")[: self.max_chars].lower()
+        code = self.match(low)
+        if code:
+            return code, code.replace("_", " ").title()
         if "success" in low or "logged in" in low:
             return "ok", "Login success"
         if "24online" in low or "172.16." in (url or ""):
             return "unknown", "Portal still intercepting"
         return "unknown", "Unrecognized response"
-    else:
-        return "unknown", f"HTTP {http_status}"
 
 
+@functools.lru_cache(maxsize=4)
+def _cached_classifier(patterns: Tuple[Tuple[str, str], ...], max_chars: int) -> LoginClassifier:
+    return LoginClassifier(dict(patterns), max_chars)
+
+
+def login_classifier(cfg) -> LoginClassifier:
+    """Classifier for cfg; recompiled only when the patterns or scan cap change."""
+    patterns = cfg.get("login_error_patterns") or {}
+    max_chars = int(cfg.get("login_scan_max_chars", LOGIN_SCAN_MAX_CHARS))
+    return _cached_classifier(tuple(patterns.items()), max_chars)
+
+
+def analyze_login_response(cfg, http_status: int, url: str, text: str) -> Tuple[str, str]:
+    return login_classifier(cfg).classify(http_status, url, text)
+
+
+LOGIN_MAX_BYTES = 64 * 1024
+LOGIN_CHUNK_BYTES = 4096
+LOGIN_SCAN_OVERLAP = 1024  # rescan this much old text so matches across chunk edges are found
+
+
+def _read_login_page(r, cfg) -> Tuple[str, Optional[str], int]:
+    """
+    Read a streamed portal response in chunks, at most login_max_bytes and no
+    further than the classifier's login_scan_max_chars. Returns (text,
+    decisive_code, bytes_read); decisive_code is set when the top-priority error
+    pattern matched and reading stopped early. Any other code is left to
+    classify() on the whole text, so config order still decides.
+    """
+    classifier = login_classifier(cfg)
+    max_bytes = int(cfg.get("login_max_bytes", LOGIN_MAX_BYTES))
+    encoding = r.encoding if isinstance(r.encoding, str) else "utf-8"
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    scan = 200 <= r.status_code < 400
+    text, read, scanned = "", 0, 0
+    for chunk in r.iter_content(chunk_size=LOGIN_CHUNK_BYTES):
+        if not chunk:
+            continue
+        chunk = chunk[: max_bytes - read]
+        read += len(chunk)
+        text += decoder.decode(chunk)
+        if scan:
+            start = max(0, scanned - LOGIN_SCAN_OVERLAP)
+            code = classifier.match_top(text[start: classifier.max_chars].lower())
+            scanned = len(text)
+            if code:
+                return text, code, read
+        if read >= max_bytes or len(text) >= classifier.max_chars:
+            break
+    text += decoder.decode(b"", final=True)
+    return text, None, read
+
+
+@metrics.timed("net.login")
 def login_with_diagnostics(cfg, username: str, password: str) -> Dict[str, Any]:
     payload = {"mode": "191", "username": username, "password": password}
+    stream = bool(cfg.get("login_stream", True))
     try:
         r = _session.post(
             cfg["login_url"],
@@ -218,19 +804,42 @@ def login_with_diagnostics(cfg, username: str, password: str) -> Dict[str, Any]:
             timeout=cfg["post_timeout"],
             verify=False,
             allow_redirects=True,
+            stream=stream,
         )
-        code, text = analyze_login_response(cfg, r.status_code, r.url, r.text)
+        if stream:
+            try:
+                body, early, read = _read_login_page(r, cfg)
+            finally:
+                # Unread data means we stopped early: this drops the socket instead of draining it.
+                r.close()
+            if early:
+                code, text = early, early.replace("_", " ").title()
+            else:
+                code, text = analyze_login_response(cfg, r.status_code, r.url, body)
+        else:
+            body = r.text
+            read = len(r.content)
+            code, text = analyze_login_response(cfg, r.status_code, r.url, body)
         ok = code == "ok"
+        metrics.inc("net.login.reason." + code)
         if code == "unknown":
-            log.info("📝 Portal page (excerpt): %s | url=%s", _excerpt(r.text), r.url)
-        return {"ok": ok, "http_status": r.status_code, "reason_code": code, "reason_text": text, "url": r.url}
+            log.info("📝 Portal page (excerpt): %s | url=%s", _excerpt(body), r.url)
+        return {
+            "ok": ok, "http_status": r.status_code, "reason_code": code, "reason_text": text,
+            "url": r.url, "bytes_read": read,
+        }
     except Exception as e:
         log.info("❌ Error sending login POST: %s", e)
-        return {"ok": False, "http_status": 0, "reason_code": "network_error", "reason_text": str(e), "url": ""}
+        metrics.inc("net.login.reason.network_error")
+        return {
+            "ok": False, "http_status": 0, "reason_code": "network_error", "reason_text": str(e),
+            "url": "", "bytes_read": 0,
+        }
 
 
 def _excerpt(txt: str, n: int = 240) -> str:
     if not txt:
         return ""
-    s = re.sub(r"\s+", " ", txt).strip()
-    return (s[:n] + "…") if len(s) > n else s
\ No newline at end of file
+    head = txt[: n * 4]
+    s = re.sub(r"\s+", " ", head).strip()
+    return (s[:n] + "…") if len(s) > n or len(txt) > len(head) else s
@@ -1,8 +1,12 @@
 # app/net_events.py
+import errno
 import logging
 import platform
+import socket
+import struct
 import threading
-from typing import Callable, List, Optional
+import time
+from typing import Callable, Dict, List, Optional
 
 log = logging.getLogger("mdi.net.events")
 SYSTEM = platform.system()
@@ -53,6 +57,8 @@ class NetworkEventBus:
 def _create_watcher(bus: NetworkEventBus):
     if SYSTEM == "Windows":
         return _WindowsWifiWatcher(bus)
+    if SYSTEM == "Linux":
+        return _LinuxNetlinkWatcher(bus)
     return None
 
 
@@ -157,4 +163,178 @@ class _WindowsWifiWatcher(threading.Thread):
         if data.NotificationCode == WLAN_NOTIFICATION_ACM_CONNECTION_COMPLETE:
             self.bus.publish("connected")
         elif data.NotificationCode == WLAN_NOTIFICATION_ACM_DISCONNECTED:
-            self.bus.publish("disconnected")
\ No newline at end of file
+            self.bus.publish("disconnected")
+
+
+# ---------- Linux rtnetlink notifications ----------
+_NLMSG_HDR = struct.Struct("=IHHII")  # len, type, flags, seq, pid
+_IFINFOMSG = struct.Struct("=BxHiII")  # family, type, index, flags, change
+_IFADDRMSG = struct.Struct("=BBBBI")  # family, prefixlen, flags, scope, index
+_RTMSG = struct.Struct("=BBBBBBBBI")  # family, dst_len, src_len, tos, table, protocol, scope, type, flags
+_RTATTR = struct.Struct("=HH")  # len, type
+
+_NLMSG_DONE = 3
+_RTM_NEWLINK, _RTM_DELLINK = 16, 17
+_RTM_NEWADDR, _RTM_DELADDR = 20, 21
+_RTM_NEWROUTE, _RTM_DELROUTE = 24, 25
+
+_RTMGRP_LINK = 0x1
+_RTMGRP_IPV4_IFADDR = 0x10
+_RTMGRP_IPV4_ROUTE = 0x40
+
+_IFF_UP = 0x1
+_IFF_LOOPBACK = 0x8
+_IFF_RUNNING = 0x40
+_IFA_ADDRESS = 1
+_RT_SCOPE_HOST = 254
+_RT_TABLE_MAIN = 254
+
+NETLINK_DEBOUNCE_S = 0.25
+NETLINK_MAX_HOLD_S = 1.0
+
+
+def _open_netlink_socket():
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+    sock.bind((0, _RTMGRP_LINK | _RTMGRP_IPV4_IFADDR | _RTMGRP_IPV4_ROUTE))
+    return sock
+
+
+def _ifa_address(data: bytes, off: int, end: int) -> Optional[bytes]:
+    """IFA_ADDRESS attribute of an RTM_*ADDR message, if present."""
+    while off + _RTATTR.size <= end:
+        length, attr_type = _RTATTR.unpack_from(data, off)
+        if length < _RTATTR.size:
+            break
+        if attr_type == _IFA_ADDRESS:
+            return bytes(data[off + _RTATTR.size:off + length])
+        off += (length + 3) & ~3  # RTA_ALIGN
+    return None
+
+
+def _parse_netlink_events(data: bytes, seen: Optional[Dict[tuple, bool]] = None) -> List[str]:
+    """
+    Turn one rtnetlink datagram into "connected"/"disconnected" reasons.
+    Loopback links, host-scope addresses and non-default routes are ignored.
+
+    Links only count when they go up or down, and addresses only when they are
+    new: wireless scans, stats updates and DHCP renewals re-send the same state.
+    `seen` keeps what earlier datagrams reported, per interface and address; a
+    link not seen before counts only when ifi_change covers IFF_UP/IFF_RUNNING.
+    """
+    if seen is None:
+        seen = {}
+    reasons = []
+    off = 0
+    while off + _NLMSG_HDR.size <= len(data):
+        length, msg_type, _flags, _seq, _pid = _NLMSG_HDR.unpack_from(data, off)
+        if length < _NLMSG_HDR.size or msg_type == _NLMSG_DONE:
+            break
+        body = off + _NLMSG_HDR.size
+        end = off + length
+        if msg_type in (_RTM_NEWLINK, _RTM_DELLINK) and body + _IFINFOMSG.size <= end:
+            _family, _type, index, flags, change = _IFINFOMSG.unpack_from(data, body)
+            if not flags & _IFF_LOOPBACK:
+                key = ("link", index)
+                was_up = seen.pop(key, None)
+                up = msg_type == _RTM_NEWLINK and flags & _IFF_UP and flags & _IFF_RUNNING
+                if msg_type == _RTM_NEWLINK:
+                    seen[key] = bool(up)
+                if was_up is None:
+                    moved = msg_type == _RTM_DELLINK or change & (_IFF_UP | _IFF_RUNNING)
+                else:
+                    moved = was_up != bool(up)
+                if moved:
+                    reasons.append("connected" if up else "disconnected")
+        elif msg_type in (_RTM_NEWADDR, _RTM_DELADDR) and body + _IFADDRMSG.size <= end:
+            _family, prefix, _flags, scope, index = _IFADDRMSG.unpack_from(data, body)
+            if scope != _RT_SCOPE_HOST:
+                key = ("addr", index, prefix, _ifa_address(data, body + _IFADDRMSG.size, end))
+                if msg_type == _RTM_DELADDR:
+                    seen.pop(key, None)
+                    reasons.append("disconnected")
+                elif key not in seen:
+                    seen[key] = True
+                    reasons.append("connected")
+        elif msg_type in (_RTM_NEWROUTE, _RTM_DELROUTE) and body + _RTMSG.size <= end:
+            fields = _RTMSG.unpack_from(data, body)
+            dst_len, table = fields[1], fields[4]
+            if dst_len == 0 and table == _RT_TABLE_MAIN:
+                reasons.append("connected" if msg_type == _RTM_NEWROUTE else "disconnected")
+        off += (length + 3) & ~3  # NLMSG_ALIGN
+    return reasons
+
+
+class _LinuxNetlinkWatcher(threading.Thread):
+    """
+    Listens for link, IPv4 address and default-route changes on a NETLINK_ROUTE
+    socket. A burst of messages (link up, DHCP address, default route) is
+    collapsed into one publish of the last reason once it has been quiet for
+    debounce_s, but never held back longer than max_hold_s.
+    """
+
+    def __init__(
+        self,
+        bus: NetworkEventBus,
+        sock_factory: Callable[[], socket.socket] = _open_netlink_socket,
+        debounce_s: float = NETLINK_DEBOUNCE_S,
+        max_hold_s: float = NETLINK_MAX_HOLD_S,
+    ):
+        super().__init__(name="netlink-events", daemon=True)
+        self.bus = bus
+        self._sock_factory = sock_factory
+        self._debounce_s = debounce_s
+        self._max_hold_s = max_hold_s
+        self._seen: Dict[tuple, bool] = {}  # last reported link state and addresses
+        self.stop_event = threading.Event()
+
+    def run(self):
+        try:
+            sock = self._sock_factory()
+        except OSError as e:
+            log.warning("Netlink socket unavailable (%s); falling back to polling.", e)
+            return
+
+        log.info("Netlink watcher started.")
+        pending: Optional[str] = None
+        first_ts = deadline = 0.0
+        try:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                if pending is None:
+                    sock.settimeout(0.5)
+                else:
+                    sock.settimeout(max(0.001, deadline - now))
+                try:
+                    data = sock.recv(65536)
+                    reasons = _parse_netlink_events(data, self._seen)
+                except socket.timeout:
+                    reasons = []
+                except OSError as e:
+                    if self.stop_event.is_set():
+                        break
+                    if e.errno != errno.ENOBUFS:
+                        log.warning("Netlink receive failed: %s", e)
+                        break
+                    # The kernel dropped messages during a burst: forget what we knew
+                    # and have subscribers re-probe rather than falling back to polling.
+                    log.debug("Netlink queue overflowed; resyncing.")
+                    self._seen.clear()
+                    reasons = ["connected"]
+                now = time.monotonic()
+                if reasons:
+                    if pending is None:
+                        first_ts = now
+                    pending = reasons[-1]
+                    deadline = min(now + self._debounce_s, first_ts + self._max_hold_s)
+                if pending is not None and now >= deadline:
+                    self.bus.publish(pending)
+                    pending = None
+        finally:
+            try:
+                sock.close()
+            except OSError:
+                pass
+            log.info("Netlink watcher stopped.")
+
+    def stop(self):
+        self.stop_event.set()
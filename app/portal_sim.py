@@ -0,0 +1,281 @@
+# app/portal_sim.py
+"""
+Local 24online portal simulator, for tuning retry/settle/grace settings and
+measuring time-to-online without the campus network.
+
+It serves the login servlet and a captive generate_204 endpoint from one HTTP/1.1
+server. A SimProfile adds latency, dropped connections, fatal portal pages and a
+delay between a successful login and the probe turning 204. To point the app at it,
+merge PortalSimulator.config_overrides() into config.json:
+
+    python portal_sim.py --port 8204 --latency 0.2 --drop-rate 0.1 --online-delay 2
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+log = logging.getLogger("mdi.sim")
+
+PROBE_PATH = "/generate_204"
+PORTAL_PATH = "/24online/webpages/client.jsp"
+LOGIN_PATH = "/24online/servlet/E24onlineHTTPClient"
+
+_CHROME = (
+    "<html><head><title>24online Client</title>"
+    '<link rel="stylesheet" href="/24online/css/style.css"></head><body>'
+    + '<div class="menu"><a href="#">Home</a><a href="#">Usage</a><a href="#">Help</a></div>\n' * 40
+)
+
+
+def _page(message: str) -> str:
+    return _CHROME + f"<div class='msg'>{message}</div></body></html>"
+
+
+PORTAL_PAGE = _page("<form method='post'>Please login to continue. 24online</form>")
+# Wording taken from real 24online result pages; each matches the default login_error_patterns.
+PAGES = {
+    "ok": _page("You have successfully logged in."),
+    "quota_exceeded": _page("Your data quota has been exceeded for this billing cycle."),
+    "too_many_devices": _page("Maximum login limit reached: too many devices are logged in."),
+    "bad_credentials": _page("Invalid username or password. Authentication failed."),
+    "account_expired": _page("Your account has expired. Contact the administrator."),
+    "unknown": _page("Please login to continue. 24online"),
+}
+OUTCOMES = tuple(PAGES)
+
+
+@dataclass
+class SimProfile:
+    """How the simulated portal misbehaves. All delays are in seconds."""
+
+    latency_s: float = 0.0  # added before every reply
+    jitter_s: float = 0.0  # uniform 0..jitter_s on top of latency_s
+    drop_rate: float = 0.0  # fraction of requests answered by closing the connection
+    outcome: str = "ok"  # login result page, one of OUTCOMES
+    fail_first: int = 0  # this many logins get the "unknown" page before `outcome` applies
+    online_delay_s: float = 0.0  # after a good login the probe stays captive this long
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        if self.outcome not in PAGES:
+            raise ValueError(f"outcome must be one of {OUTCOMES}, not {self.outcome!r}")
+
+
+@dataclass
+class SimStats:
+    probes: int = 0
+    logins: int = 0
+    drops: int = 0
+    login_outcomes: Dict[str, int] = field(default_factory=dict)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real portal
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def log_message(self, fmt, *args):
+        log.debug("sim %s", fmt % args)
+
+    def _send(self, status: int, body: str = "", headers: Optional[dict] = None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if data:
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def _misbehave(self) -> bool:
+        """Apply latency; returns True when this request should be dropped."""
+        sim: "PortalSimulator" = self.server.sim
+        delay = sim.next_delay()
+        if delay > 0:
+            time.sleep(delay)
+        if sim.should_drop():
+            self.close_connection = True
+            return True
+        return False
+
+    def do_GET(self):
+        sim: "PortalSimulator" = self.server.sim
+        path = self.path.split("?", 1)[0]
+        if self._misbehave():
+            return
+        if path == PROBE_PATH:
+            sim.count("probes")
+            if sim.online:
+                self._send(204)
+            else:
+                self._send(302, headers={"Location": sim.url(PORTAL_PATH)})
+        elif path == PORTAL_PATH:
+            self._send(200, PORTAL_PAGE)
+        else:
+            self._send(404, "not found")
+
+    def do_POST(self):
+        sim: "PortalSimulator" = self.server.sim
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode("utf-8", errors="replace"))
+        if self.path.split("?", 1)[0] != LOGIN_PATH:
+            self._send(404, "not found")
+            return
+        if self._misbehave():
+            return
+        outcome = sim.login(bool(form.get("username") and form.get("password")))
+        self._send(200, PAGES[outcome])
+
+
+class PortalSimulator:
+    """
+    The simulated portal on a daemon thread. It starts captive; a successful login
+    turns the probe into a 204 after profile.online_delay_s. Use as a context
+    manager, or start()/stop().
+    """
+
+    def __init__(self, profile: Optional[SimProfile] = None, host: str = "127.0.0.1", port: int = 0):
+        self.profile = profile or SimProfile()
+        self.stats = SimStats()
+        self._rng = random.Random(self.profile.seed)
+        self._lock = threading.Lock()
+        self._online_at: Optional[float] = None  # monotonic time the probe flips to 204
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.sim = self
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- addresses ----
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def url(self, path: str) -> str:
+        host = self._server.server_address[0]
+        return f"http://{host}:{self.port}{path}"
+
+    @property
+    def probe_url(self) -> str:
+        return self.url(PROBE_PATH)
+
+    @property
+    def login_url(self) -> str:
+        return self.url(LOGIN_PATH)
+
+    def config_overrides(self) -> Dict[str, Any]:
+        """Config keys that point net.py and the worker at this simulator."""
+        return {
+            "login_url": self.login_url,
+            "probe_endpoints": [self.probe_url],
+            "force_on_target": True,
+        }
+
+    # ---- state ----
+    @property
+    def online(self) -> bool:
+        at = self._online_at
+        return at is not None and time.monotonic() >= at
+
+    def reset(self, online: bool = False, profile: Optional[SimProfile] = None):
+        """Back to captive (or straight online) with fresh stats."""
+        with self._lock:
+            if profile is not None:
+                self.profile = profile
+                self._rng = random.Random(profile.seed)
+            self.stats = SimStats()
+            self._online_at = time.monotonic() if online else None
+
+    def logout(self):
+        """Drop the session, as an idle timeout on the real portal would."""
+        self._online_at = None
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
+
+    def next_delay(self) -> float:
+        p = self.profile
+        with self._lock:
+            return p.latency_s + (self._rng.uniform(0, p.jitter_s) if p.jitter_s else 0.0)
+
+    def should_drop(self) -> bool:
+        with self._lock:
+            drop = self.profile.drop_rate > 0 and self._rng.random() < self.profile.drop_rate
+            if drop:
+                self.stats.drops += 1
+            return drop
+
+    def login(self, has_credentials: bool) -> str:
+        with self._lock:
+            self.stats.logins += 1
+            p = self.profile
+            if not has_credentials:
+                outcome = "bad_credentials"
+            elif self.stats.logins <= p.fail_first:
+                outcome = "unknown"
+            else:
+                outcome = p.outcome
+            self.stats.login_outcomes[outcome] = self.stats.login_outcomes.get(outcome, 0) + 1
+            if outcome == "ok" and self._online_at is None:
+                self._online_at = time.monotonic() + p.online_delay_s
+            return outcome
+
+    # ---- lifecycle ----
+    def start(self) -> "PortalSimulator":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="portal-sim", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "PortalSimulator":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local 24online portal simulator.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8204)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds added to every reply")
+    ap.add_argument("--jitter", type=float, default=0.0, help="extra random 0..N seconds per reply")
+    ap.add_argument("--drop-rate", type=float, default=0.0, help="fraction of requests dropped")
+    ap.add_argument("--outcome", choices=OUTCOMES, default="ok", help="login result page")
+    ap.add_argument("--fail-first", type=int, default=0, help="logins answered with an unrecognized page first")
+    ap.add_argument("--online-delay", type=float, default=0.0, help="seconds from good login to 204")
+    ap.add_argument("--seed", type=int)
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    profile = SimProfile(
+        latency_s=args.latency, jitter_s=args.jitter, drop_rate=args.drop_rate, outcome=args.outcome,
+        fail_first=args.fail_first, online_delay_s=args.online_delay, seed=args.seed,
+    )
+    sim = PortalSimulator(profile, args.host, args.port)
+    print("Merge into config.json to use the simulator:")
+    print(json.dumps(sim.config_overrides(), indent=2))
+    sim.start()
+    try:
+        while True:
+            time.sleep(5)
+            log.info("📊 %s online=%s", sim.stats, sim.online)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.stop()
+
+
+if __name__ == "__main__":
+    main()
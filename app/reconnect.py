@@ -0,0 +1,223 @@
+# app/reconnect.py
+"""
+Reconnect policy as a pure state machine: cooldowns, the post grace period,
+exponential backoff and fatal portal answers.
+
+ReconnectMachine does no I/O. It reads time from an injected clock and jitter
+from an injected RNG, and only answers "what now?" for each probe and each login
+result. The workers (ui.worker, ui.async_worker) do the probing, POSTing and
+waiting around it; simulate() drives it with a virtual clock, a scripted prober
+and a scripted login transport, so retry settings can be compared over
+thousands of reconnects per second.
+"""
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, NamedTuple, Optional, Tuple
+
+# Portal answers that retrying will not fix; they pause retries for cooldown_on_fatal_s.
+FATAL_REASONS = {"quota_exceeded", "too_many_devices", "account_expired", "bad_credentials"}
+
+# Decision kinds
+COOLDOWN = "cooldown"  # paused after a fatal answer or too many failures
+ONLINE = "online"
+NOT_CAPTIVE = "not_captive"  # offline or not on the target network; nothing to do
+NO_CREDENTIALS = "no_credentials"
+GRACE = "grace"  # posted recently; give the portal time before posting again
+LOGIN = "login"  # post credentials now
+LOGGED_IN = "logged_in"
+RETRY = "retry"  # login failed; back off
+FATAL = "fatal"  # login failed with a FATAL_REASONS answer; cool down
+EXHAUSTED = "exhausted"  # max_consecutive failures in a row; cool down
+
+_AT_PORTAL = (NO_CREDENTIALS, GRACE, LOGIN)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    base_interval: float = 5.0
+    jitter_s: float = 1.0
+    post_grace_s: float = 6.0
+    backoff_initial_s: float = 2.0
+    backoff_max_s: float = 10.0
+    max_consecutive: int = 3
+    cooldown_on_fatal_s: float = 10.0
+    cooldown_poll_s: float = 3.0  # how often to look at the network while cooling down
+
+    @classmethod
+    def from_config(cls, cfg) -> "RetryPolicy":
+        retry = cfg.get("retry", {})
+        return cls(
+            base_interval=float(cfg.get("base_interval", 5)),
+            post_grace_s=float(cfg.get("post_grace_s", 6)),
+            backoff_initial_s=float(retry.get("backoff_initial_s", 2)),
+            backoff_max_s=float(retry.get("backoff_max_s", 10)),
+            max_consecutive=int(retry.get("max_consecutive", 3)),
+            cooldown_on_fatal_s=float(retry.get("cooldown_on_fatal_s", 10)),
+        )
+
+
+@dataclass(frozen=True)
+class Decision:
+    kind: str
+    delay: Optional[float] = None  # seconds until the next probe; None = machine.idle_delay()
+
+    @property
+    def at_portal(self) -> bool:
+        """The probe saw the portal and no cooldown was in force."""
+        return self.kind in _AT_PORTAL
+
+
+class ReconnectMachine:
+    """
+    Reconnect state for one worker. Feed it each probe with decide() and, after a
+    LOGIN decision, the outcome with login_result(). Network events reset it.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ):
+        self.policy = policy or RetryPolicy()
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.fail_count = 0
+        self.backoff_s: Optional[float] = None
+        self.cooldown_until = 0.0
+        self.last_post_ts: Optional[float] = None  # clock() of the last POST
+
+    def cooling_down(self) -> bool:
+        return bool(self.cooldown_until) and self.clock() < self.cooldown_until
+
+    def idle_delay(self) -> float:
+        """Backoff while failing, otherwise base_interval with jitter."""
+        if self.backoff_s:
+            return self.backoff_s
+        p = self.policy
+        return max(1.0, p.base_interval + self.rng.uniform(-p.jitter_s, p.jitter_s))
+
+    def _reset(self):
+        self.fail_count = 0
+        self.backoff_s = None
+
+    def decide(self, online: bool, captive: bool, on_target: bool, has_credentials: bool = True) -> Decision:
+        now = self.clock()
+        p = self.policy
+        if self.cooldown_until and now < self.cooldown_until:
+            return Decision(COOLDOWN, min(p.cooldown_poll_s, self.cooldown_until - now))
+
+        if not (captive and on_target and not online):
+            self._reset()
+            return Decision(ONLINE if online else NOT_CAPTIVE)
+
+        if not has_credentials:
+            return Decision(NO_CREDENTIALS, p.base_interval)
+
+        if self.last_post_ts is not None:
+            grace_left = p.post_grace_s - (now - self.last_post_ts)
+            if grace_left > 0:
+                return Decision(GRACE, min(grace_left, p.base_interval))
+
+        self.last_post_ts = now
+        return Decision(LOGIN)
+
+    def login_result(self, settled: bool, reason_code: str = "unknown") -> Decision:
+        if settled:
+            self._reset()
+            self.last_post_ts = self.clock()
+            return Decision(LOGGED_IN, 0.0)
+        return self.record_failure(fatal=reason_code in FATAL_REASONS)
+
+    def record_failure(self, fatal: bool = False) -> Decision:
+        p = self.policy
+        if fatal:
+            self.cooldown_until = self.clock() + p.cooldown_on_fatal_s
+            self._reset()
+            return Decision(FATAL)
+
+        self.fail_count += 1
+        if self.backoff_s is None:
+            self.backoff_s = p.backoff_initial_s
+        else:
+            self.backoff_s = min(self.backoff_s * 2, p.backoff_max_s)
+
+        if self.fail_count >= p.max_consecutive:
+            self.cooldown_until = self.clock() + p.backoff_max_s
+            self._reset()
+            return Decision(EXHAUSTED)
+        return Decision(RETRY)
+
+    def network_event(self):
+        """Something changed on the network: retry at once, whatever the backoff said."""
+        self.backoff_s = None
+        self.cooldown_until = 0.0
+
+
+# ---- simulation ----
+
+SIM_MIN_STEP_S = 1e-3
+
+
+class Probe(NamedTuple):
+    online: bool
+    captive: bool
+    on_target: bool
+
+
+@dataclass
+class VirtualClock:
+    now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += max(0.0, seconds)
+
+
+@dataclass
+class SimResult:
+    time_to_online_s: Optional[float]  # None if still offline at the horizon
+    posts: int = 0
+    decisions: list = field(default_factory=list)
+
+
+def simulate(
+    machine: ReconnectMachine,
+    prober: Callable[[], Probe],
+    transport: Callable[[], Tuple[bool, str]],
+    clock: VirtualClock,
+    horizon_s: float = 600.0,
+    has_credentials: bool = True,
+    record: bool = False,
+) -> SimResult:
+    """
+    Run the worker loop against a scripted portal until online or horizon_s.
+    prober and transport may read and advance clock (a POST that takes 300 ms
+    should clock.sleep(0.3)); transport returns (settled, reason_code).
+    """
+    start = clock.now
+    result = SimResult(None)
+    while clock.now - start < horizon_s:
+        probe = prober()
+        d = machine.decide(probe.online, probe.captive, probe.on_target, has_credentials)
+        if record:
+            result.decisions.append((clock.now - start, d.kind))
+        if d.kind == ONLINE:
+            result.time_to_online_s = clock.now - start
+            return result
+        if d.kind == LOGIN:
+            result.posts += 1
+            settled, reason = transport()
+            d = machine.login_result(settled, reason)
+            if record:
+                result.decisions.append((clock.now - start, d.kind))
+            if d.kind == LOGGED_IN:
+                result.time_to_online_s = clock.now - start
+                return result
+        delay = machine.idle_delay() if d.delay is None else d.delay
+        # A float remainder like 1e-15 would not move a clock at 65.7; real waits always do.
+        clock.sleep(max(delay, SIM_MIN_STEP_S))
+    return result
@@ -2,14 +2,23 @@
 """
 Single-instance enforcement for MDI AutoLogin.
 Prevents multiple instances from running and handles old version cleanup.
+
+The running instance records itself in instance.json (PID, exe path, process
+start time), so finding it is one file read and one process lookup. The full
+process scan only runs when there is no usable record.
 """
+import json
 import logging
 import os
 import platform
 import sys
+import time
 from pathlib import Path
 from typing import Optional, Tuple
 
+import ipc
+from config import APP_VERSION, atomic_write, app_dir
+
 log = logging.getLogger("mdi.single_instance")
 
 IS_WINDOWS = platform.system() == "Windows"
@@ -17,6 +26,9 @@ IS_WINDOWS = platform.system() == "Windows"
 if IS_WINDOWS:
     import ctypes
     from ctypes import wintypes
+    fcntl = None
+else:
+    import fcntl
 
 try:
     import psutil
@@ -28,8 +40,20 @@ except ImportError:
 # Mutex name for single-instance enforcement
 MUTEX_NAME = "Global\\MDI_AutoLogin_SingleInstance"
 
+# flock()ed by the running instance on Linux/macOS, where there is no named mutex
+LOCK_PATH = app_dir() / "instance.lock"
+
+# Record of the running instance; see _write_registry
+INSTANCE_PATH = app_dir() / "instance.json"
+
+# A registered PID whose start time differs by more than this was reused by another process
+START_TIME_TOLERANCE_S = 1.0
+
+# How long to keep retrying the lock after terminating the instance that held it
+MUTEX_WAIT_S = 1.0
 
-def _create_mutex() -> Optional[ctypes.wintypes.HANDLE]:
+
+def _create_mutex() -> Optional[int]:
     """Create a named mutex. Returns handle if successful, None if already exists."""
     if not IS_WINDOWS:
         return None
@@ -56,7 +80,7 @@ def _create_mutex() -> Optional[ctypes.wintypes.HANDLE]:
         return None
 
 
-def _release_mutex(mutex_handle: ctypes.wintypes.HANDLE):
+def _release_mutex(mutex_handle: Optional[int]):
     """Release the mutex handle."""
     if not IS_WINDOWS or not mutex_handle:
         return
@@ -66,10 +90,130 @@ def _release_mutex(mutex_handle: ctypes.wintypes.HANDLE):
         log.error("Failed to release mutex: %s", e)
 
 
+def _acquire_lock() -> Optional[int]:
+    """Take an exclusive flock on LOCK_PATH. Returns the fd, or None if another process holds it."""
+    if fcntl is None:
+        return None
+    try:
+        fd = os.open(str(LOCK_PATH), os.O_RDWR | os.O_CREAT, 0o600)
+    except OSError as e:
+        log.error("Failed to open lock file: %s", e)
+        return None
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _acquire_instance_lock() -> Optional[int]:
+    """Named mutex on Windows, flock elsewhere. The kernel drops either when the process dies."""
+    return _create_mutex() if IS_WINDOWS else _acquire_lock()
+
+
+def _release_instance_lock(handle: Optional[int]):
+    if IS_WINDOWS:
+        _release_mutex(handle)
+        return
+    if handle is None:
+        return
+    try:
+        os.close(handle)
+    except OSError as e:
+        log.error("Failed to release lock: %s", e)
+
+
+def _acquire_lock_after_exit(timeout: float = MUTEX_WAIT_S) -> Optional[int]:
+    """
+    Take the instance lock once terminated instances have let go of it.
+
+    _kill_old_instances has already waited on each process handle, so the first
+    attempt normally succeeds; the retries only cover the OS closing handles late.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while True:
+        handle = _acquire_instance_lock()
+        if handle is not None or time.monotonic() >= deadline:
+            return handle
+        time.sleep(delay)
+        delay = min(delay * 2, 0.1)
+
+
+def _read_registry() -> Optional[dict]:
+    """The recorded instance, or None if there is no usable record."""
+    try:
+        record = json.loads(INSTANCE_PATH.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.debug("Unreadable instance record %s: %s", INSTANCE_PATH, e)
+        return None
+    if not isinstance(record, dict) or not isinstance(record.get("pid"), int):
+        return None
+    return record
+
+
+def _write_registry(current_exe: str):
+    """Record this process as the running instance."""
+    try:
+        record = {
+            "pid": os.getpid(),
+            "exe": str(Path(current_exe).resolve()),
+            "started": psutil.Process().create_time() if psutil else None,
+            "version": APP_VERSION,
+        }
+        atomic_write(INSTANCE_PATH, json.dumps(record))
+    except (OSError, TypeError, ValueError) as e:
+        log.debug("Could not write instance record: %s", e)
+
+
+def _clear_registry():
+    """Remove the record on clean shutdown, unless another process has rewritten it."""
+    record = _read_registry()
+    if record is None or record["pid"] != os.getpid():
+        return
+    try:
+        INSTANCE_PATH.unlink()
+    except OSError as e:
+        log.debug("Could not remove instance record: %s", e)
+
+
+def _is_same_build(record: dict, current_exe: str) -> bool:
+    """The record was written by this executable at this version: nothing to replace."""
+    return record.get("exe") == str(Path(current_exe).resolve()) and record.get("version") == APP_VERSION
+
+
+def _registered_instances(record: dict, current_exe: str) -> list:
+    """
+    The process named by the record, if it is still the one that wrote it.
+
+    The start time guards against the PID having been reused after a crash.
+    """
+    pid = record["pid"]
+    if pid == os.getpid():
+        return []
+    try:
+        proc = psutil.Process(pid)
+        started = record.get("started")
+        if started is None or abs(proc.create_time() - float(started)) > START_TIME_TOLERANCE_S:
+            log.debug("Instance record for PID %d is stale", pid)
+            return []
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, TypeError, ValueError):
+        log.debug("Instance record for PID %d is stale", pid)
+        return []
+
+    if not _is_same_build(record, current_exe):
+        log.info("Found old instance: PID %d, path: %s, version %s", pid, record.get("exe"), record.get("version"))
+    return [proc]
+
+
 def _find_old_instances(current_exe: str) -> list:
-    """Find running instances of the app (including old versions).
+    """Find running instances of the app (including old versions) by scanning every process.
     
-    Returns list of Process objects for other instances.
+    Fallback for when instance.json is missing, e.g. an older version without the
+    registry is running. Returns list of Process objects for other instances.
     """
     if not psutil:
         return []
@@ -148,19 +292,36 @@ def _kill_old_instances(old_instances: list) -> int:
     return killed
 
 
-def _bring_existing_to_front():
-    """Try to bring the existing instance window to front."""
-    if not IS_WINDOWS:
-        return
-    
-    try:
-        # Find window by class name or title
-        # This is a simple approach - we could enhance it to find the actual tkinter window
-        hwnd = ctypes.windll.user32.FindWindowW(None, None)  # This won't work well
-        # For now, we'll just show a message - the user can manually bring it to front
-        pass
-    except Exception as e:
-        log.debug("Could not bring window to front: %s", e)
+def _terminate(old_instances: list) -> int:
+    if not old_instances:
+        return 0
+    log.info("Found %d old instance(s), terminating...", len(old_instances))
+    killed = _kill_old_instances(old_instances)
+    if killed > 0:
+        log.info("Terminated %d old instance(s)", killed)
+    return killed
+
+
+def _bring_existing_to_front() -> bool:
+    """Ask the existing instance to show its control panel."""
+    return ipc.send_command("show") is not None
+
+
+def handoff(command: str = "show") -> bool:
+    """
+    Pass command ("show" or "login") to a running instance of this version.
+
+    True means the request was delivered and this process can exit. An instance
+    of another version is left to enforce_single_instance, which replaces it.
+    """
+    reply = ipc.send_command("ping")
+    if not reply:
+        return False
+    if reply.get("version") != APP_VERSION:
+        log.info("Running instance is version %s, not handing off", reply.get("version"))
+        return False
+    reply = ipc.send_command(command)
+    return bool(reply and reply.get("ok"))
 
 
 def enforce_single_instance(current_exe: Optional[str] = None) -> Tuple[bool, Optional[object]]:
@@ -173,7 +334,8 @@ def enforce_single_instance(current_exe: Optional[str] = None) -> Tuple[bool, Op
     Returns:
         Tuple of (is_first_instance: bool, mutex_handle: Optional[object])
         - If is_first_instance is False, another instance is already running
-        - mutex_handle should be stored and released on exit
+        - mutex_handle (mutex on Windows, flock fd elsewhere) should be stored and
+          passed to _release_instance_lock on exit
     """
     if current_exe is None:
         if getattr(sys, 'frozen', False):
@@ -184,19 +346,30 @@ def enforce_single_instance(current_exe: Optional[str] = None) -> Tuple[bool, Op
             current_exe = __file__  # This will be the .py file, but that's okay for detection
     
     # First, check for and kill old instances
+    killed = 0
+    scanned = False
     if psutil:
-        old_instances = _find_old_instances(current_exe)
-        if old_instances:
-            log.info("Found %d old instance(s), terminating...", len(old_instances))
-            killed = _kill_old_instances(old_instances)
-            if killed > 0:
-                log.info("Terminated %d old instance(s)", killed)
-                # Give processes time to fully terminate
-                import time
-                time.sleep(0.5)
-    
+        record = _read_registry()
+        if record is not None:
+            old_instances = _registered_instances(record, current_exe)
+            if old_instances and _is_same_build(record, current_exe):
+                # Same exe, same version: that instance is the one to keep.
+                log.warning("This version is already running: PID %d", record["pid"])
+                _bring_existing_to_front()
+                return False, None
+        else:
+            old_instances = _find_old_instances(current_exe)
+            scanned = True
+        killed = _terminate(old_instances)
+
     # Now check for current instance using mutex
-    mutex_handle = _create_mutex()
+    mutex_handle = _acquire_lock_after_exit() if killed else _acquire_instance_lock()
+
+    if mutex_handle is None and psutil and not scanned:
+        # The mutex holder is not in the registry (an older version); find it the slow way
+        killed = _terminate(_find_old_instances(current_exe))
+        if killed:
+            mutex_handle = _acquire_lock_after_exit()
     
     if mutex_handle is None:
         # Another instance is already running
@@ -205,5 +378,12 @@ def enforce_single_instance(current_exe: Optional[str] = None) -> Tuple[bool, Op
         return False, None
     
     log.debug("Single-instance mutex acquired")
+    _write_registry(current_exe)
     return True, mutex_handle
 
+
+def release_single_instance(handle: Optional[object]):
+    """Counterpart of enforce_single_instance, for clean shutdown: drop the record, then the lock."""
+    _clear_registry()
+    _release_instance_lock(handle)
+
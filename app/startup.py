@@ -216,34 +216,36 @@ def startup_status() -> bool:
         return LAUNCH_AGENT_PATH.exists()
     return False
     
-def _resume_target_for(flag: str) -> Optional[str]:
-    try:
-        idx = sys.argv.index(flag)
-        if len(sys.argv) > idx + 1 and not sys.argv[idx + 1].startswith("--"):
-            return sys.argv[idx + 1]
-    except ValueError:
-        pass
+# Flags relaunch_as_admin passes to the elevated copy of the app.
+ELEVATED_FLAGS = ("--elevate-autostart", "--disable-autostart")
+
+
+def _resume_target_for(argv, flag: str) -> Optional[str]:
+    idx = argv.index(flag)
+    if len(argv) > idx + 1 and not argv[idx + 1].startswith("--"):
+        return argv[idx + 1]
     return None
 
 
-if "--elevate-autostart" in sys.argv:
-    resume_target = _resume_target_for("--elevate-autostart")
-    success = enable_startup(current_executable(), prefer_task=True)
-    if success:
-        LOG.info("Startup registered from elevated helper.")
-        if resume_target:
-            ctypes.windll.shell32.ShellExecuteW(None, "open", resume_target, "", None, 1)
+def handle_elevated_flags(argv) -> bool:
+    """
+    Run the elevated helper started by relaunch_as_admin if argv asks for it,
+    then reopen resume_target. Returns True when it ran; the caller should exit.
+    """
+    flag = next((f for f in ELEVATED_FLAGS if f in argv), None)
+    if flag is None:
+        return False
+    resume_target = _resume_target_for(argv, flag)
+    if flag == "--elevate-autostart":
+        success = enable_startup(current_executable(), prefer_task=True)
+        action = "registered"
     else:
-        LOG.error("Elevated helper could not register startup.")
-    sys.exit(0)
-
-if "--disable-autostart" in sys.argv:
-    resume_target = _resume_target_for("--disable-autostart")
-    success = disable_startup()
+        success = disable_startup()
+        action = "disabled"
     if success:
-        LOG.info("Startup disabled from elevated helper.")
+        LOG.info("Startup %s from elevated helper.", action)
         if resume_target:
             ctypes.windll.shell32.ShellExecuteW(None, "open", resume_target, "", None, 1)
     else:
-        LOG.error("Elevated helper could not disable startup.")
-    sys.exit(0)
\ No newline at end of file
+        LOG.error("Elevated helper could not change startup (%s).", flag)
+    return True
@@ -72,3 +72,39 @@ def mock_keyring(monkeypatch):
     
     return keyring_store
 
+
+
+@pytest.fixture(autouse=True)
+def reset_net_caches():
+    """Keep cached snapshots/SSIDs from leaking between tests"""
+    import net
+    net.invalidate_network_caches()
+    yield
+    net.invalidate_network_caches()
+
+
+@pytest.fixture(autouse=True)
+def reset_config_writer():
+    """Each test starts with no debounced save pending and the config re-read from disk"""
+    import config
+    config._writer.reset()
+    config._store.invalidate()
+    yield
+    config._writer.reset()
+    config._store.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def reset_credential_cache():
+    """Cached keyring lookups must not leak between tests"""
+    import config
+    config.invalidate_credentials()
+    yield
+    config.invalidate_credentials()
+
+
+@pytest.fixture(autouse=True)
+def isolate_instance_registry(tmp_path, monkeypatch):
+    """The running-instance record lives in a per-test directory"""
+    import single_instance
+    monkeypatch.setattr(single_instance, "INSTANCE_PATH", tmp_path / "instance.json")
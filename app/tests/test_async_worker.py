@@ -0,0 +1,100 @@
+"""
+Tests for ui/async_worker.py - asyncio engine for the auto-login worker
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from net import NetworkSnapshot
+from ui.async_worker import AsyncAutoLoginWorker
+
+ONLINE = NetworkSnapshot(True, False, True, "", 0.0)
+CAPTIVE = NetworkSnapshot(False, True, True, "http://172.16.16.16/", 0.0)
+
+
+@pytest.fixture
+def async_worker(temp_config_dir, sample_config, mock_keyring):
+    """Create an async worker without touching the real network or keyring"""
+    cfg = dict(sample_config, settle_max=1, settle_step=0.05, post_probe_delay_s=0)
+    with patch("ui.worker.load_config", return_value=cfg):
+        with patch("ui.worker.get_password", return_value="test_pass"):
+            with patch("ui.worker.get_event_bus"):
+                with patch("ui.worker.apply_net_config"):
+                    worker = AsyncAutoLoginWorker(MagicMock())
+    worker._refresh_config_if_needed = lambda: None
+    return worker
+
+
+@patch("ui.async_worker.network_snapshot", return_value=ONLINE)
+def test_iteration_online_resets_backoff(_mock_snapshot, async_worker):
+    """Test an online pass clears failure state"""
+    async_worker.fail_count = 2
+    async_worker.backoff_s = 4
+    assert async_worker._run_loop(async_worker._iteration()) is None
+    assert async_worker.fail_count == 0
+    assert async_worker.backoff_s is None
+    assert async_worker.last_online_state == "online"
+
+
+@patch("ui.async_worker.invalidate_snapshot")
+@patch("ui.async_worker.settle_until_online", return_value=True)
+@patch("ui.async_worker.login_with_diagnostics")
+@patch("ui.async_worker.network_snapshot", return_value=CAPTIVE)
+def test_iteration_captive_logs_in(_snap, mock_login, _online, _inval, async_worker):
+    """Test a captive pass posts credentials and confirms online"""
+    mock_login.return_value = {"ok": True, "reason_code": "ok", "reason_text": "ok"}
+    assert async_worker._run_loop(async_worker._iteration()) == 0.0
+    mock_login.assert_called_once()
+    assert async_worker.fail_count == 0
+
+
+@patch("ui.async_worker.invalidate_snapshot")
+@patch("ui.async_worker.settle_until_online", return_value=False)
+@patch("ui.async_worker.login_with_diagnostics")
+@patch("ui.async_worker.network_snapshot", return_value=CAPTIVE)
+def test_iteration_fatal_reason_cools_down(_snap, mock_login, _online, _inval, async_worker):
+    """Test a fatal portal answer pauses retries"""
+    mock_login.return_value = {"ok": False, "reason_code": "bad_credentials", "reason_text": "Bad"}
+    async_worker._run_loop(async_worker._iteration())
+    assert async_worker.cooldown_until > time.time()
+
+
+@patch("ui.async_worker.network_snapshot")
+def test_step_timeout_does_not_hang(mock_snapshot, async_worker):
+    """Test a stuck probe is abandoned after its timeout"""
+    release = threading.Event()
+    mock_snapshot.side_effect = lambda _cfg: release.wait(5)
+    async_worker.cfg = dict(async_worker.cfg, probe_timeout_s=-1.9)  # 0.1 s step budget
+    t0 = time.perf_counter()
+    with pytest.raises(asyncio.TimeoutError):
+        async_worker._run_loop(async_worker._iteration())
+    release.set()
+    assert time.perf_counter() - t0 < 2
+
+
+@patch("ui.async_worker.network_snapshot", return_value=ONLINE)
+def test_network_event_wakes_and_stop_is_immediate(mock_snapshot, async_worker):
+    """Test events wake the engine at once and stop() does not wait out the interval"""
+    async_worker.cfg = dict(async_worker.cfg, base_interval=60)
+    async_worker.start()
+    deadline = time.time() + 2
+    while mock_snapshot.call_count < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert async_worker.running is True
+
+    with patch("ui.worker.invalidate_network_caches"):
+        async_worker._on_network_event("connected")
+    deadline = time.time() + 2
+    while mock_snapshot.call_count < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert mock_snapshot.call_count >= 2
+
+    t0 = time.perf_counter()
+    async_worker.stop()
+    async_worker.join(timeout=2)
+    assert not async_worker.is_alive()
+    assert time.perf_counter() - t0 < 1
+    assert async_worker.running is False
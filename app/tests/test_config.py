@@ -40,7 +40,9 @@ def test_load_config_from_file(temp_config_dir, sample_config):
 
 def test_save_config(temp_config_dir, sample_config):
     """Test saving config to file"""
+    import config
     save_config(sample_config)
+    config.flush_config()
     assert CONFIG_PATH.exists()
     loaded = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
     assert loaded["ssid"] == sample_config["ssid"]
@@ -93,7 +95,9 @@ def test_load_config_missing_keys(temp_config_dir):
 
 def test_save_config_preserves_all_keys(temp_config_dir, sample_config):
     """Test that save_config preserves all keys"""
+    import config
     save_config(sample_config)
+    config.flush_config()
     loaded = json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
     assert loaded.keys() == sample_config.keys()
 
@@ -159,3 +163,216 @@ def test_set_autostart_disable(mock_disable):
     assert result is True
     mock_disable.assert_called_once()
 
+
+
+def test_save_config_atomic_leaves_no_temp_files(temp_config_dir, sample_config):
+    """Saves go through a temp file that is renamed into place"""
+    import config
+    save_config(sample_config)
+    config.flush_config()
+    leftovers = [p.name for p in CONFIG_PATH.parent.iterdir() if p.name.endswith(".tmp")]
+    assert leftovers == []
+    assert json.loads(CONFIG_PATH.read_text(encoding="utf-8")) == sample_config
+
+
+def test_save_config_failed_write_keeps_old_file(temp_config_dir, sample_config):
+    """A crash mid-save leaves the previous config intact"""
+    import config
+    save_config(sample_config)
+    config._writer.reset()
+    with patch("config.os.replace", side_effect=OSError("disk full")):
+        save_config(dict(sample_config, ssid="Broken"))
+        with pytest.raises(OSError):
+            config.flush_config()
+    assert load_config()["ssid"] == sample_config["ssid"]
+    assert not [p for p in CONFIG_PATH.parent.iterdir() if p.name.endswith(".tmp")]
+
+
+def test_save_config_burst_is_merged(temp_config_dir, sample_config):
+    """A burst of saves costs one trailing write of the newest config"""
+    import config
+    before = config._writer.writes
+    for i in range(5):
+        save_config(dict(sample_config, ssid=f"MDI-{i}"))
+    # Readers see the newest save before it reaches the disk.
+    assert load_config()["ssid"] == "MDI-4"
+    assert config._writer.writes == before
+
+    config.flush_config()
+    assert config._writer.writes == before + 1
+    assert json.loads(CONFIG_PATH.read_text(encoding="utf-8"))["ssid"] == "MDI-4"
+
+
+def test_save_config_debounce_timer_flushes(temp_config_dir, sample_config):
+    """The trailing write happens on its own once the window passes"""
+    import time
+    import config
+    config._writer.debounce_s = 0.05
+    try:
+        save_config(sample_config)
+        save_config(dict(sample_config, ssid="Later"))
+        time.sleep(0.3)
+        assert json.loads(CONFIG_PATH.read_text(encoding="utf-8"))["ssid"] == "Later"
+    finally:
+        config._writer.debounce_s = config.SAVE_DEBOUNCE_S
+
+
+def test_save_config_steady_stream_flushed_by_max_delay(temp_config_dir, sample_config):
+    """Saves that keep restarting the debounce still reach the disk within max_delay_s"""
+    import time
+    import config
+    config._writer.debounce_s, config._writer.max_delay_s = 0.2, 0.3
+    try:
+        for i in range(8):
+            save_config(dict(sample_config, ssid=f"S{i}"))
+            time.sleep(0.1)
+        assert CONFIG_PATH.exists()
+        assert json.loads(CONFIG_PATH.read_text(encoding="utf-8"))["ssid"] != "S7"
+    finally:
+        config._writer.debounce_s = config.SAVE_DEBOUNCE_S
+        config._writer.max_delay_s = config.SAVE_MAX_DELAY_S
+
+
+def test_save_config_unchanged_skips_write(temp_config_dir, sample_config):
+    """Saving identical content does not touch the file (no worker reload)"""
+    import config
+    save_config(sample_config)
+    config.flush_config()
+    mtime = CONFIG_PATH.stat().st_mtime_ns
+    writes = config._writer.writes
+    save_config(dict(sample_config))
+    config.flush_config()
+    assert config._writer.writes == writes
+    assert CONFIG_PATH.stat().st_mtime_ns == mtime
+
+
+def test_delete_config_drops_pending_save(temp_config_dir, sample_config):
+    """Resetting settings is not undone by a debounced save"""
+    import config
+    save_config(sample_config)
+    save_config(dict(sample_config, ssid="Pending"))
+    config.delete_config()
+    config.flush_config()
+    assert not CONFIG_PATH.exists()
+
+
+def test_config_store_serves_reads_from_memory(temp_config_dir, sample_config):
+    """Repeated load_config calls parse the file once and return private copies"""
+    import config
+    CONFIG_PATH.write_text(json.dumps(sample_config), encoding="utf-8")
+    with patch("config._read_config_file", wraps=config._read_config_file) as reader:
+        first = load_config()
+        for _ in range(50):
+            load_config()
+    assert reader.call_count == 1
+    first["retry"]["max_consecutive"] = 99
+    assert load_config()["retry"]["max_consecutive"] == sample_config["retry"]["max_consecutive"]
+
+
+def test_config_store_notifies_on_save(temp_config_dir, sample_config):
+    """Subscribers see each written version; a merged burst notifies once"""
+    import config
+    store = config.get_config_store()
+    seen = []
+    unsubscribe = store.subscribe(lambda cfg, version: seen.append((cfg["ssid"], version)))
+    try:
+        for i in range(4):
+            save_config(dict(sample_config, ssid=f"S{i}"))
+        config.flush_config()
+    finally:
+        unsubscribe()
+    assert [ssid for ssid, _ in seen] == ["S3"]
+    assert store.get()["ssid"] == "S3"
+
+
+def test_config_store_picks_up_external_edit(temp_config_dir, sample_config):
+    """A hand edit is noticed by the watcher tick and reloaded"""
+    import os
+    import config
+    store = config.get_config_store()
+    save_config(sample_config)
+    config.flush_config()
+    assert store.check_for_external_edit() is False
+
+    CONFIG_PATH.write_text(json.dumps(dict(sample_config, ssid="Edited")), encoding="utf-8")
+    st = CONFIG_PATH.stat()
+    os.utime(CONFIG_PATH, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert store.check_for_external_edit() is True
+    assert load_config()["ssid"] == "Edited"
+
+
+def test_validate_config_resets_bad_types(sample_config):
+    """Wrongly typed values fall back to defaults; unknown and missing keys are left alone"""
+    from config import validate_config
+    cfg = dict(sample_config, settle_max="ten", ssid=5, retry=[], custom="x")
+    del cfg["post_timeout"]
+    out = validate_config(cfg)
+    assert out["settle_max"] == 10 and out["ssid"] == DEFAULT_SSID and isinstance(out["retry"], dict)
+    assert out["custom"] == "x" and "post_timeout" not in out
+
+
+def test_set_password_bumps_credentials_version(mock_keyring):
+    """Stored-password changes are announced through the store"""
+    import config
+    before = config.get_config_store().credentials_version
+    set_password("test_user", "new")
+    assert config.get_config_store().credentials_version == before + 1
+
+
+def test_get_password_cached(mock_keyring):
+    """Only the first lookup per user reaches the keyring backend"""
+    mock_keyring[("MDI_AutoLogin", "test_user")] = "test_pass"
+    with patch("keyring.get_password", wraps=lambda s, u: mock_keyring.get((s, u))) as backend:
+        assert [get_password("test_user") for _ in range(5)] == ["test_pass"] * 5
+    assert backend.call_count == 1
+
+
+def test_set_password_updates_cache(mock_keyring):
+    """set_password replaces the cached secret without a backend read"""
+    get_password("test_user")
+    set_password("test_user", "fresh")
+    with patch("keyring.get_password", side_effect=AssertionError("backend hit")):
+        assert get_password("test_user") == "fresh"
+
+
+def test_get_password_error_not_cached(mock_keyring):
+    """A failing backend is retried on the next call"""
+    with patch("keyring.get_password", side_effect=Exception("locked")):
+        assert get_password("test_user") == ""
+    mock_keyring[("MDI_AutoLogin", "test_user")] = "later"
+    assert get_password("test_user") == "later"
+
+
+def test_delete_password_and_reset_invalidate(mock_keyring, temp_config_dir, sample_config):
+    """delete_password and delete_config drop cached secrets"""
+    import config
+    set_password("test_user", "secret")
+    config.delete_password("test_user")
+    assert ("MDI_AutoLogin", "test_user") not in mock_keyring
+    assert get_password("test_user") == ""
+
+    set_password("test_user", "again")
+    config.delete_config()
+    assert config._credentials.stats()["entries"] == 0
+
+
+def test_secret_wiped_on_invalidate():
+    """Invalidated secrets are zeroed in memory"""
+    from config import _Secret
+    s = _Secret("hunter2", lock=True)
+    s.wipe()
+    assert s.reveal() == "\x00" * 7
+
+
+def test_config_store_watcher_stops_without_subscribers(temp_config_dir):
+    """The watcher thread exits once the last subscriber is gone"""
+    from config import ConfigStore
+    store = ConfigStore(watch_interval_s=0.02)
+    unsubscribe = store.subscribe(lambda cfg, version: None)
+    watcher = store._watcher
+    assert watcher.is_alive()
+    unsubscribe()
+    watcher.join(1)
+    assert not watcher.is_alive() and store._watcher is None
+    store.stop()
@@ -0,0 +1,114 @@
+"""
+Tests for ui/control_api.py - scripting commands on the control channel
+"""
+import json
+import socket
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import ipc
+from ui.control_api import build_handlers
+
+
+@pytest.fixture
+def tray():
+    app = MagicMock()
+    app.worker.running = True
+    app.worker.state.return_value = {"engine": "thread", "state": "online"}
+    return app
+
+
+@patch("ui.control_api.cached_snapshot", return_value=None)
+@patch("ui.control_api.load_config", return_value={"ssid": "MDI", "username": "u1"})
+def test_status_uses_cached_state(mock_cfg, mock_snap, tray):
+    """status reads the worker and the shared snapshot; it never probes"""
+    with patch("net._take_snapshot") as mock_probe:
+        reply = build_handlers(tray)["status"]({})
+    mock_probe.assert_not_called()
+    assert reply["running"] is True
+    assert reply["worker"] == {"engine": "thread", "state": "online"}
+    assert reply["network"] is None
+    assert reply["username"] == "u1"
+    json.dumps(reply)
+
+
+@patch("ui.control_api.cached_snapshot")
+@patch("ui.control_api.load_config", return_value={})
+def test_status_network_snapshot(mock_cfg, mock_snap, tray):
+    """A cached snapshot is reported with its age"""
+    from net import NetworkSnapshot
+    import time
+    mock_snap.return_value = NetworkSnapshot(False, True, True, "http://172.16.16.16/", time.monotonic() - 3)
+    net_ = build_handlers(tray)["status"]({})["network"]
+    assert net_["captive"] is True and 2.5 <= net_["age_s"] <= 4
+
+
+def test_login_now_wakes_running_worker(tray):
+    """With auto-login running the worker is poked, no dialogs"""
+    assert build_handlers(tray)["login-now"]({}) == {"via": "worker"}
+    tray.worker.login_now.assert_called_once()
+    tray.manual_login.assert_not_called()
+
+
+@patch("ui.control_api.threading.Thread")
+def test_login_now_without_worker(mock_thread, tray):
+    """With auto-login stopped a manual login runs in the background"""
+    tray.worker = None
+    assert build_handlers(tray)["login-now"]({}) == {"via": "manual"}
+    assert mock_thread.call_args.kwargs["target"] is tray.manual_login
+
+
+def test_start_stop(tray):
+    """start/stop drive the app's own menu actions"""
+    handlers = build_handlers(tray)
+    handlers["start"]({})
+    tray.start_worker.assert_called_once()
+    tray.worker = None
+    assert handlers["stop"]({}) == {"running": False}
+    tray.stop_worker.assert_called_once()
+
+
+@pytest.mark.parametrize("transport", ["unix", "tcp"])
+def test_ctl_round_trip(transport, tray, tmp_path, monkeypatch, capsys):
+    """app.py --ctl prints the running instance's reply, on either transport"""
+    import app
+    if transport == "unix" and not hasattr(socket, "AF_UNIX"):
+        pytest.skip("Unix-domain sockets only")
+    monkeypatch.setattr(ipc, "TRANSPORT", transport)
+    monkeypatch.setattr(ipc, "SOCKET_PATH", tmp_path / "c.sock")
+    monkeypatch.setattr(ipc, "ENDPOINT_PATH", tmp_path / "control.json")
+    server = ipc.ControlServer(build_handlers(tray))
+    server.start()
+    try:
+        assert app._ctl("metrics") == 0
+    finally:
+        server.stop()
+    reply = json.loads(capsys.readouterr().out)
+    assert reply["ok"] is True and "histograms" in reply
+    assert "net.ssid_cache" in reply["stats"]
+
+    assert app._ctl("status") == 2
+
+
+@patch("ui.worker.get_event_bus")
+@patch("ui.worker.get_password", return_value="")
+@patch("ui.worker.load_config", return_value={})
+def test_start_reply_reports_running(mock_cfg, mock_pw, mock_bus, tray):
+    """start answers running=True even before the new worker thread gets going"""
+    import threading
+    from ui.worker import AutoLoginWorker
+    release = threading.Event()
+    tray.worker = None
+
+    def _start_worker():
+        tray.worker = AutoLoginWorker(tray)
+        tray.worker.start()
+
+    tray.start_worker.side_effect = _start_worker
+    with patch.object(AutoLoginWorker, "run", lambda self: release.wait(2)):
+        try:
+            assert build_handlers(tray)["start"]({}) == {"running": True}
+        finally:
+            release.set()
+            tray.worker.join(2)
@@ -0,0 +1,71 @@
+"""
+Tests for headless.py - auto-login without Tk, pystray or PIL
+"""
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from headless import HeadlessApp, NullReporter
+
+APP_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_headless_imports_no_gui_toolkits():
+    """Importing the headless entry point leaves Tk, pystray and PIL unloaded"""
+    code = "import sys, headless; print(sorted(m for m in ('tkinter', 'pystray', 'PIL') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=APP_DIR, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+@patch("headless.create_worker")
+@patch("headless.load_config", return_value={"engine": "asyncio"})
+def test_start_worker_uses_null_reporter(mock_cfg, mock_create):
+    """The worker gets a reporter with a no-op update_tooltip"""
+    app = HeadlessApp()
+    app.start_worker()
+    reporter, engine = mock_create.call_args.args
+    assert isinstance(reporter, NullReporter) and engine == "asyncio"
+    reporter.update_tooltip(True)
+    mock_create.return_value.start.assert_called_once()
+
+
+def test_manual_login_pokes_running_worker():
+    """A manual login never opens a dialog; it wakes the worker"""
+    app = HeadlessApp()
+    app.worker = MagicMock(running=True)
+    app.manual_login()
+    app.worker.login_now.assert_called_once()
+
+
+def test_show_is_answered_headless():
+    """A second tray launch is told there is no panel instead of replacing us"""
+    handlers = HeadlessApp().control_handlers()
+    assert handlers["show"]({}) == {"headless": True}
+    assert {"status", "login-now", "start", "stop", "metrics"} <= set(handlers)
+
+
+@patch("headless.signal.signal")
+@patch("headless.serve", return_value=None)
+@patch("headless.get_password", return_value="pw")
+@patch("headless.load_config", return_value={"username": "u"})
+def test_run_until_quit(mock_cfg, mock_pw, mock_serve, mock_signal):
+    """run() starts the worker and stops it again once quit() is called"""
+    app = HeadlessApp()
+    app.start_worker = MagicMock()
+    app.stop_worker = MagicMock()
+    app.quit()
+    app.run()
+    app.start_worker.assert_called_once()
+    app.stop_worker.assert_called_once()
+
+
+@patch("headless.create_worker")
+@patch("headless.load_config", return_value={})
+def test_start_worker_skips_live_worker(mock_cfg, mock_create):
+    """A second start while the worker thread is alive does not spawn another"""
+    app = HeadlessApp()
+    app.worker = MagicMock(running=False)
+    app.worker.is_alive.return_value = True
+    app.start_worker()
+    mock_create.assert_not_called()
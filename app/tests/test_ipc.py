@@ -0,0 +1,130 @@
+"""
+Tests for ipc.py and the single-instance lock/handoff built on it
+"""
+import os
+import socket
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import ipc
+import single_instance
+from config import APP_VERSION
+from ipc import ControlServer, send_command
+
+pytestmark = pytest.mark.skipif(ipc.TRANSPORT != "unix" or single_instance.IS_WINDOWS,
+                                reason="Unix-domain sockets and flock are POSIX-only")
+
+
+@pytest.fixture
+def sock_path(tmp_path, monkeypatch):
+    path = tmp_path / "c.sock"
+    monkeypatch.setattr(ipc, "SOCKET_PATH", path)
+    return path
+
+
+@pytest.fixture
+def server(sock_path):
+    calls = []
+    srv = ControlServer({"show": lambda req: calls.append(req) or {}}, path=sock_path)
+    srv.calls = calls
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def test_ping_reports_identity(server):
+    """Every reply names the serving process and version"""
+    reply = send_command("ping")
+    assert reply == {"ok": True, "pid": os.getpid(), "version": APP_VERSION}
+
+
+def test_command_reaches_handler(server):
+    """Arguments travel with the command"""
+    assert send_command("show", tab="log")["ok"] is True
+    assert server.calls == [{"cmd": "show", "tab": "log"}]
+
+
+def test_unknown_command(server):
+    """Unknown commands are refused, not dropped"""
+    reply = send_command("reboot")
+    assert reply["ok"] is False and "unknown command" in reply["error"]
+
+
+def test_handler_error_is_reported(sock_path):
+    """A failing handler answers with ok=false and keeps serving"""
+    srv = ControlServer({"boom": MagicMock(side_effect=RuntimeError("nope"))}, path=sock_path)
+    srv.start()
+    try:
+        assert send_command("boom") == {"ok": False, "error": "nope", "pid": os.getpid(), "version": APP_VERSION}
+        assert send_command("ping")["ok"] is True
+    finally:
+        srv.stop()
+
+
+def test_socket_is_owner_only(server, sock_path):
+    """Other users cannot connect to the control socket"""
+    assert sock_path.stat().st_mode & 0o077 == 0
+
+
+def test_bind_leaves_process_umask_alone(sock_path):
+    """Other threads keep creating files with the normal umask while the socket is bound"""
+    seen = []
+    real_umask = os.umask
+
+    def _umask(mask):
+        seen.append(mask)
+        return real_umask(mask)
+
+    srv = ControlServer({}, path=sock_path)
+    with patch("ipc.os.umask", side_effect=_umask):
+        srv.start()
+    try:
+        assert seen == []
+        assert sock_path.stat().st_mode & 0o077 == 0
+    finally:
+        srv.stop()
+
+
+def test_stale_socket_replaced(sock_path):
+    """A socket file left by a crashed instance does not block startup"""
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(sock_path))
+    stale.close()
+    srv = ControlServer({}, path=sock_path)
+    srv.start()
+    try:
+        assert send_command("ping")["ok"] is True
+    finally:
+        srv.stop()
+    assert not sock_path.exists()
+
+
+def test_nothing_listening(sock_path):
+    """No server means None, quickly"""
+    assert send_command("ping") is None
+
+
+def test_handoff_delivers_command(server):
+    """A second launch hands its request to a same-version instance"""
+    assert single_instance.handoff("show") is True
+    assert [c["cmd"] for c in server.calls] == ["show"]
+
+
+@patch("single_instance.APP_VERSION", "0.0.0-old")
+def test_handoff_skips_other_version(server):
+    """An instance of another version is not asked to do anything"""
+    assert single_instance.handoff("show") is False
+    assert server.calls == []
+
+
+def test_flock_is_exclusive(tmp_path, monkeypatch):
+    """Only one holder at a time; closing the fd releases the lock"""
+    monkeypatch.setattr(single_instance, "LOCK_PATH", tmp_path / "instance.lock")
+    first = single_instance._acquire_lock()
+    assert first is not None
+    assert single_instance._acquire_lock() is None
+    single_instance._release_instance_lock(first)
+    second = single_instance._acquire_lock()
+    assert second is not None
+    single_instance._release_instance_lock(second)
@@ -0,0 +1,81 @@
+"""
+Tests for the 127.0.0.1 transport of ipc.py (the control channel on Windows; runs everywhere)
+"""
+import json
+import os
+import socket
+
+import pytest
+
+import ipc
+from config import APP_VERSION
+from ipc import ControlServer, send_command
+
+
+@pytest.fixture
+def endpoint(tmp_path, monkeypatch):
+    path = tmp_path / "control.json"
+    monkeypatch.setattr(ipc, "TRANSPORT", "tcp")
+    monkeypatch.setattr(ipc, "ENDPOINT_PATH", path)
+    return path
+
+
+@pytest.fixture
+def server(endpoint):
+    calls = []
+    srv = ControlServer({"show": lambda req: calls.append(req) or {}})
+    srv.calls = calls
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def test_round_trip_with_token(server, endpoint):
+    """The client reads the port and token from the endpoint file; handlers never see the token"""
+    assert send_command("ping") == {"ok": True, "pid": os.getpid(), "version": APP_VERSION}
+    assert send_command("show", tab="log")["ok"] is True
+    assert server.calls == [{"cmd": "show", "tab": "log"}]
+    assert server.path == endpoint
+    assert json.loads(endpoint.read_text(encoding="utf-8"))["pid"] == os.getpid()
+
+
+def _raw_request(endpoint, msg):
+    port = json.loads(endpoint.read_text(encoding="utf-8"))["port"]
+    with socket.create_connection(("127.0.0.1", port), timeout=1.0) as sock:
+        sock.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+        return sock.recv(4096)
+
+
+def test_request_without_valid_token_dropped(server, endpoint):
+    """Another local user who can reach the port but not read the file gets nothing"""
+    assert _raw_request(endpoint, {"cmd": "show"}) == b""
+    assert _raw_request(endpoint, {"cmd": "show", "token": "0" * 32}) == b""
+    assert _raw_request(endpoint, {"cmd": "show", "token": "é"}) == b""
+    assert server.calls == []
+    assert send_command("ping")["ok"] is True
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX file modes")
+def test_endpoint_file_is_owner_only(server, endpoint):
+    """The token file is readable by the owner only"""
+    assert endpoint.stat().st_mode & 0o077 == 0
+
+
+def test_stop_removes_endpoint(endpoint):
+    """A stopped channel leaves no endpoint behind, so clients see 'not running'"""
+    srv = ControlServer({})
+    srv.start()
+    srv.stop()
+    assert not endpoint.exists()
+    assert send_command("ping") is None
+
+
+def test_stale_endpoint_is_not_running(endpoint):
+    """An endpoint left by a crashed instance, or garbage, means nothing is listening"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    endpoint.write_text(json.dumps({"port": port, "token": "x"}), encoding="utf-8")
+    assert send_command("ping", timeout=0.2) is None
+    endpoint.write_text("{not json", encoding="utf-8")
+    assert send_command("ping") is None
@@ -0,0 +1,124 @@
+"""
+Tests for metrics.py - counters, histograms and the timing hooks
+"""
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+import metrics
+from metrics import Histogram
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.set_enabled(True)
+    yield
+    metrics.set_enabled(False)
+    metrics.reset()
+
+
+def test_histogram_percentiles():
+    """Percentiles land in the right bucket and stay within min/max"""
+    h = Histogram("t")
+    for v in [3] * 90 + [40] * 8 + [800] * 2:
+        h.observe(v)
+
+    s = h.summary()
+    assert s["count"] == 100
+    assert 2 <= s["p50_ms"] <= 5
+    assert 25 <= s["p95_ms"] <= 50
+    assert 500 <= s["p99_ms"] <= 800
+    assert s["max_ms"] == 800
+
+
+def test_histogram_overflow_bucket():
+    """Values past the last bound are reported up to the observed max"""
+    h = Histogram("t", buckets=(1, 10))
+    h.observe(120)
+    assert h.percentile(0.99) == 120
+
+
+def test_timed_disabled_records_nothing():
+    """With metrics off the decorator only forwards the call"""
+    metrics.reset()
+
+    @metrics.timed("off")
+    def f(x):
+        return x * 2
+
+    assert f(4) == 8
+    assert metrics.snapshot()["histograms"] == {}
+
+
+def test_timed_records_calls_and_errors(enabled_metrics):
+    """Every call is timed; exceptions also bump name.errors"""
+
+    @metrics.timed("op")
+    def f(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return "ok"
+
+    f()
+    with pytest.raises(ValueError):
+        f(fail=True)
+
+    snap = metrics.snapshot()
+    assert snap["histograms"]["op"]["count"] == 2
+    assert snap["counters"]["op.errors"] == 1
+
+
+def test_timer_context_manager(enabled_metrics):
+    """timer() records loop bodies, including ones left with continue"""
+    for _ in range(3):
+        with metrics.timer("loop"):
+            continue
+    assert metrics.snapshot()["histograms"]["loop"]["count"] == 3
+
+
+def test_timer_disabled_is_shared_noop():
+    """The disabled timer allocates nothing per use"""
+    assert metrics.timer("a") is metrics.timer("b")
+
+
+@patch("net._session.post")
+def test_login_hook_counts_reasons(mock_post, enabled_metrics):
+    """login_with_diagnostics feeds net.login and a per-reason counter"""
+    import net
+    r = MagicMock(status_code=200, url="http://172.16.16.16/x", encoding="utf-8")
+    r.iter_content.return_value = [b"Your data quota has been exceeded."]
+    mock_post.return_value = r
+    cfg = {"login_url": "http://172.16.16.16/x", "post_timeout": 1,
+           "login_error_patterns": {"quota_exceeded": "quota.*exceeded"}}
+
+    net.login_with_diagnostics(cfg, "u", "p")
+
+    snap = metrics.snapshot()
+    assert snap["histograms"]["net.login"]["count"] == 1
+    assert snap["counters"]["net.login.reason.quota_exceeded"] == 1
+
+
+def test_format_summary(enabled_metrics):
+    """The log line names each histogram with its percentiles"""
+    metrics.observe("net.probe", 12.0)
+    assert "net.probe n=1 p50=12.0" in metrics.format_summary()
+
+
+def test_stats_sources_in_snapshot_and_summary(monkeypatch):
+    """Registered module counters show up even with metrics off, and errors in a source are contained"""
+    monkeypatch.setattr(metrics, "_stats_sources", {})
+    metrics.register_stats("cache", lambda: {"hits": 3, "misses": 1, "detail": {"a": 1}})
+    metrics.register_stats("broken", lambda: 1 / 0)
+    snap = metrics.snapshot()
+    assert snap["stats"] == {"cache": {"hits": 3, "misses": 1, "detail": {"a": 1}}}
+    assert metrics.format_summary(snap) == "cache hits=3 misses=1"
+
+
+def test_net_stats_registered():
+    """The net module's own counters are reachable through metrics.snapshot()"""
+    import net  # noqa: F401  (registers its sources on import)
+    stats = metrics.snapshot()["stats"]
+    assert set(stats["net.ssid_cache"]) == {"hits", "misses", "cached"}
+    assert {"requests", "new_connections", "reused", "mode"} <= set(stats["net.connections"])
+    assert {"races", "avg_ms", "busy_skips", "endpoints"} <= set(stats["net.probes"])
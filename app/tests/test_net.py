@@ -153,3 +153,158 @@ def test_portal_intercept_present_captive_marker(mock_probe):
     mock_probe.return_value = mock_response
     assert portal_intercept_present() is True
 
+
+
+@pytest.fixture
+def fresh_snapshot():
+    """Make sure each snapshot test starts without a cached result"""
+    from net import invalidate_snapshot
+    invalidate_snapshot()
+    yield
+    invalidate_snapshot()
+
+
+@patch("net.target_network_available")
+@patch("net._probe")
+def test_network_snapshot_single_probe(mock_probe, mock_target, fresh_snapshot):
+    """Test one probe answers online, captive and redirect together"""
+    from net import network_snapshot
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.url = "http://172.16.16.16/24online/login"
+    mock_response.text = ""
+    mock_probe.return_value = mock_response
+    mock_target.return_value = True
+
+    snap = network_snapshot({"ssid": "MDI"})
+    assert snap.online is False
+    assert snap.captive is True
+    assert snap.on_target is True
+    assert snap.redirect_url == "http://172.16.16.16/24online/login"
+    assert mock_probe.call_count == 1
+    assert mock_target.call_count == 1
+
+
+@patch("net.target_network_available")
+@patch("net._probe")
+def test_network_snapshot_cached_within_ttl(mock_probe, mock_target, fresh_snapshot):
+    """Test callers inside the TTL share one result"""
+    from net import network_snapshot
+    mock_response = MagicMock()
+    mock_response.status_code = 204
+    mock_response.url = "http://clients3.google.com/generate_204"
+    mock_probe.return_value = mock_response
+    mock_target.return_value = False
+
+    cfg = {"ssid": "MDI", "snapshot_ttl_s": 60}
+    first = network_snapshot(cfg)
+    second = network_snapshot(cfg)
+    assert first is second
+    assert first.online is True
+    assert first.redirect_url == ""
+    assert mock_probe.call_count == 1
+
+
+@patch("net.target_network_available")
+@patch("net._probe")
+def test_network_snapshot_invalidate(mock_probe, mock_target, fresh_snapshot):
+    """Test invalidation and ssid changes force a new probe"""
+    from net import network_snapshot, invalidate_snapshot
+    mock_probe.side_effect = Exception("Network error")
+    mock_target.return_value = False
+
+    cfg = {"ssid": "MDI", "snapshot_ttl_s": 60}
+    snap = network_snapshot(cfg)
+    assert snap.online is False
+    assert snap.captive is True
+    invalidate_snapshot()
+    network_snapshot(cfg)
+    network_snapshot({"ssid": "Other", "snapshot_ttl_s": 60})
+    assert mock_probe.call_count == 3
+
+
+@patch("net._current_ssids")
+def test_ssid_cache_hits_until_invalidated(mock_ssids):
+    """Test repeated SSID checks reuse one lookup until a network event"""
+    from net import SsidCache
+    mock_ssids.return_value = ["MDI"]
+    cache = SsidCache(ttl_s=60)
+    assert cache.get() == ["MDI"]
+    assert cache.get() == ["MDI"]
+    assert mock_ssids.call_count == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "cached": True}
+
+    mock_ssids.return_value = ["Other"]
+    cache.invalidate()
+    assert cache.get() == ["Other"]
+    assert cache.stats()["misses"] == 2
+
+
+@patch("net._current_ssids")
+def test_ssid_cache_ttl(mock_ssids):
+    """Test an expired entry triggers a new lookup"""
+    from net import SsidCache
+    mock_ssids.return_value = ["MDI"]
+    cache = SsidCache(ttl_s=60)
+    cache.get()
+    cache.get(max_age=0)
+    assert mock_ssids.call_count == 2
+
+
+@patch("net.gateway_is_campus", return_value=False)
+@patch("net._current_ssids")
+def test_target_network_available_uses_ssid_cache(mock_ssids, _mock_gateway):
+    """Test the worker's steady state does not rerun the SSID lookup"""
+    from net import invalidate_network_caches
+    mock_ssids.return_value = ["MDI"]
+    cfg = {"ssid": "MDI", "ssid_cache_ttl_s": 60}
+    assert target_network_available(cfg) is True
+    assert target_network_available(cfg) is True
+    assert mock_ssids.call_count == 1
+    invalidate_network_caches()
+    target_network_available(cfg)
+    assert mock_ssids.call_count == 2
+
+
+def test_login_classifier_cached_per_patterns():
+    """Test patterns are compiled once and recompiled when they change"""
+    from net import login_classifier
+    cfg = {"login_error_patterns": {"quota_exceeded": r"quota"}}
+    first = login_classifier(cfg)
+    assert login_classifier(dict(cfg)) is first
+    changed = {"login_error_patterns": {"quota_exceeded": r"quota\s+over"}}
+    assert login_classifier(changed) is not first
+
+
+def test_login_classifier_keeps_config_order():
+    """Test the first configured pattern wins when several match"""
+    cfg = {
+        "login_error_patterns": {
+            "too_many_devices": r"maximum",
+            "quota_exceeded": r"quota",
+        }
+    }
+    code, text = analyze_login_response(cfg, 200, "", "Maximum devices reached, quota fine")
+    assert code == "too_many_devices"
+    assert text == "Too Many Devices"
+
+
+def test_login_classifier_skips_invalid_pattern():
+    """Test a broken regex is ignored instead of failing every response"""
+    cfg = {"login_error_patterns": {"broken": r"(unclosed", "account_expired": r"expired"}}
+    code, _ = analyze_login_response(cfg, 200, "", "Your account has expired")
+    assert code == "account_expired"
+
+
+def test_login_classifier_scan_cap():
+    """Test only the first login_scan_max_chars of a page are scanned"""
+    cfg = {"login_error_patterns": {"quota_exceeded": r"quota"}, "login_scan_max_chars": 100}
+    page = "x" * 200 + " quota exceeded"
+    code, _ = analyze_login_response(cfg, 200, "", page)
+    assert code == "unknown"
+
+
+def test_analyze_login_response_http_error():
+    """Test non-2xx/3xx statuses are reported as such"""
+    code, text = analyze_login_response({}, 502, "", "")
+    assert (code, text) == ("unknown", "HTTP 502")
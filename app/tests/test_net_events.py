@@ -0,0 +1,176 @@
+"""
+Tests for net_events.py - Network change notifications
+"""
+import errno
+import socket
+import struct
+import threading
+import time
+from unittest.mock import MagicMock
+
+from net_events import (
+    _LinuxNetlinkWatcher,
+    _parse_netlink_events,
+    _RTM_DELADDR,
+    _RTM_DELLINK,
+    _RTM_DELROUTE,
+    _RTM_NEWADDR,
+    _RTM_NEWLINK,
+    _RTM_NEWROUTE,
+)
+
+
+def _nlmsg(msg_type, body):
+    return struct.pack("=IHHII", 16 + len(body), msg_type, 0, 0, 0) + body
+
+
+UP = 0x1 | 0x40  # IFF_UP | IFF_RUNNING
+
+
+def _link(flags, msg_type=_RTM_NEWLINK, change=UP, index=2):
+    return _nlmsg(msg_type, struct.pack("=BxHiII", 0, 1, index, flags, change))
+
+
+def _addr(msg_type=_RTM_NEWADDR, scope=0, address=b"\x0a\x00\x00\x05"):
+    attr = struct.pack("=HH", 4 + len(address), 1) + address
+    return _nlmsg(msg_type, struct.pack("=BBBBI", socket.AF_INET, 24, 0, scope, 2) + attr)
+
+
+def _route(msg_type=_RTM_NEWROUTE, dst_len=0, table=254):
+    return _nlmsg(msg_type, struct.pack("=BBBBBBBBI", socket.AF_INET, dst_len, 0, 0, table, 0, 0, 1, 0))
+
+
+class FakeNetlinkSocket:
+    """Replays queued datagrams, timing out like a real socket when empty"""
+
+    def __init__(self, datagrams):
+        self.datagrams = list(datagrams)
+        self.timeout = None
+        self.closed = False
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def recv(self, _size):
+        if self.datagrams:
+            item = self.datagrams.pop(0)
+            if isinstance(item, Exception):
+                raise item
+            return item
+        time.sleep(min(self.timeout or 0.01, 0.01))
+        raise socket.timeout()
+
+    def close(self):
+        self.closed = True
+
+
+def test_parse_link_up_and_down():
+    """Test link messages map to connected/disconnected"""
+    assert _parse_netlink_events(_link(UP)) == ["connected"]
+    assert _parse_netlink_events(_link(0x0)) == ["disconnected"]
+    assert _parse_netlink_events(_link(0x0, _RTM_DELLINK)) == ["disconnected"]
+
+
+def test_parse_ignores_link_updates_without_transition():
+    """Test a repeated NEWLINK on a link that is already running publishes nothing"""
+    seen = {}
+    assert _parse_netlink_events(_link(UP), seen) == ["connected"]
+    # Wireless scan / stats notifications: same flags, nothing changed
+    assert _parse_netlink_events(_link(UP, change=0), seen) == []
+    assert _parse_netlink_events(_link(UP), seen) == []
+    assert _parse_netlink_events(_link(UP, change=0, index=7)) == []
+    assert _parse_netlink_events(_link(0x1, change=0x40), seen) == ["disconnected"]
+    assert _parse_netlink_events(_link(UP, change=0x40), seen) == ["connected"]
+
+
+def test_parse_ignores_readded_address():
+    """Test a DHCP renewal re-adding the same address publishes nothing"""
+    seen = {}
+    assert _parse_netlink_events(_addr(), seen) == ["connected"]
+    assert _parse_netlink_events(_addr(), seen) == []
+    assert _parse_netlink_events(_addr(address=b"\x0a\x00\x00\x06"), seen) == ["connected"]
+    assert _parse_netlink_events(_addr(_RTM_DELADDR), seen) == ["disconnected"]
+    assert _parse_netlink_events(_addr(), seen) == ["connected"]
+
+
+def test_parse_ignores_loopback_and_host_scope():
+    """Test loopback noise does not wake the worker"""
+    assert _parse_netlink_events(_link(UP | 0x8)) == []
+    assert _parse_netlink_events(_addr(scope=254)) == []
+
+
+def test_parse_only_default_routes():
+    """Test only main-table default routes are reported"""
+    assert _parse_netlink_events(_route()) == ["connected"]
+    assert _parse_netlink_events(_route(_RTM_DELROUTE)) == ["disconnected"]
+    assert _parse_netlink_events(_route(dst_len=24)) == []
+    assert _parse_netlink_events(_route(table=255)) == []
+
+
+def test_parse_multiple_messages_in_one_datagram():
+    """Test batched messages are all decoded"""
+    data = _link(UP) + _addr() + _addr(_RTM_DELADDR)
+    assert _parse_netlink_events(data) == ["connected", "connected", "disconnected"]
+
+
+def _run_watcher(datagrams, wait_for_calls):
+    bus = MagicMock()
+    published = threading.Event()
+
+    def _publish(reason):
+        if bus.publish.call_count >= wait_for_calls:
+            published.set()
+
+    bus.publish.side_effect = _publish
+    sock = FakeNetlinkSocket(datagrams)
+    watcher = _LinuxNetlinkWatcher(bus, sock_factory=lambda: sock, debounce_s=0.05)
+    watcher.start()
+    assert published.wait(2)
+    watcher.stop()
+    watcher.join(timeout=2)
+    assert sock.closed
+    return bus
+
+
+def test_watcher_debounces_burst():
+    """Test a connect burst publishes a single event"""
+    bus = _run_watcher([_link(UP), _addr(), _route()], wait_for_calls=1)
+    time.sleep(0.1)
+    bus.publish.assert_called_once_with("connected")
+
+
+def test_watcher_publishes_last_reason():
+    """Test the final state of a burst wins"""
+    bus = _run_watcher([_route(), _route(_RTM_DELROUTE), _link(0x0)], wait_for_calls=1)
+    bus.publish.assert_called_once_with("disconnected")
+
+
+def test_watcher_resyncs_after_queue_overflow():
+    """Test ENOBUFS clears the link state, publishes a resync and keeps listening"""
+    overflow = OSError(errno.ENOBUFS, "No buffer space available")
+    bus = _run_watcher([_link(UP), overflow, _link(UP, change=0)], wait_for_calls=1)
+    bus.publish.assert_called_once_with("connected")
+    bus = _run_watcher([overflow, b"", _link(UP, change=0)], wait_for_calls=1)
+    bus.publish.assert_called_once_with("connected")
+
+
+def test_watcher_stops_on_other_receive_errors():
+    """Test a receive error other than ENOBUFS still ends the watcher"""
+    bus = MagicMock()
+    sock = FakeNetlinkSocket([OSError(errno.EBADF, "Bad file descriptor")])
+    watcher = _LinuxNetlinkWatcher(bus, sock_factory=lambda: sock)
+    watcher.start()
+    watcher.join(timeout=2)
+    assert not watcher.is_alive() and sock.closed
+    bus.publish.assert_not_called()
+
+
+def test_watcher_without_netlink_exits_quietly():
+    """Test the watcher gives up when the socket cannot be opened"""
+    def _fail():
+        raise OSError("not supported")
+
+    watcher = _LinuxNetlinkWatcher(MagicMock(), sock_factory=_fail)
+    watcher.start()
+    watcher.join(timeout=2)
+    assert not watcher.is_alive()
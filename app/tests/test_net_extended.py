@@ -3,6 +3,9 @@ Extended tests for net.py - Additional network and login functionality
 """
 import pytest
 from unittest.mock import patch, MagicMock
+import socket
+import struct
+import threading
 import time
 
 from net import (
@@ -78,38 +81,78 @@ def test_send_login_failure(mock_post):
     assert result is False
 
 
-@patch("net.online_now")
-def test_settle_until_online_immediate(mock_online):
+@patch("net._settle_probe")
+def test_settle_until_online_immediate(mock_probe):
     """Test settle_until_online when already online"""
-    mock_online.return_value = True
+    mock_probe.return_value = "online"
     
     result = settle_until_online(max_s=10.0, step=0.5)
     assert result is True
-    assert mock_online.call_count == 1
+    assert mock_probe.call_count == 1
 
 
-@patch("net.online_now")
+@patch("net._settle_probe")
 @patch("time.sleep")
-def test_settle_until_online_after_wait(mock_sleep, mock_online):
-    """Test settle_until_online when comes online after waiting"""
-    mock_online.side_effect = [False, False, True]
+def test_settle_until_online_after_wait(mock_sleep, mock_probe):
+    """Test settle_until_online backs off from a tight first interval"""
+    mock_probe.side_effect = ["pending", "pending", "pending", "online"]
     
-    result = settle_until_online(max_s=10.0, step=0.5)
+    result = settle_until_online(max_s=10.0, step=0.5, initial_step=0.05)
     assert result is True
-    assert mock_online.call_count == 3
-    assert mock_sleep.call_count == 2  # Sleep between checks
+    assert mock_probe.call_count == 4
+    assert [c.args[0] for c in mock_sleep.call_args_list] == pytest.approx([0.05, 0.1, 0.2])
 
 
-@patch("net.online_now")
-@patch("time.sleep")
-def test_settle_until_online_timeout(mock_sleep, mock_online):
-    """Test settle_until_online when timeout reached"""
-    mock_online.return_value = False
+@patch("net._settle_probe")
+def test_settle_until_online_timeout(mock_probe):
+    """Test settle_until_online keeps its wall-clock deadline"""
+    mock_probe.return_value = "pending"
     
-    # With max_s=1.0 and step=0.5, should check 3 times (0, 0.5, 1.0)
-    result = settle_until_online(max_s=1.0, step=0.5)
+    t0 = time.monotonic()
+    result = settle_until_online(max_s=0.3, step=0.1)
+    elapsed = time.monotonic() - t0
     assert result is False
-    assert mock_online.call_count >= 2
+    assert mock_probe.call_count >= 2
+    assert elapsed < 0.45
+
+
+@patch("net._settle_probe")
+def test_settle_until_online_deadline_counts_probe_time(mock_probe):
+    """Test slow probes eat into the deadline instead of extending it"""
+    def _slow(_timeout):
+        time.sleep(0.2)
+        return "pending"
+    mock_probe.side_effect = _slow
+    
+    t0 = time.monotonic()
+    assert settle_until_online(max_s=0.5, step=0.5) is False
+    assert time.monotonic() - t0 < 0.75
+
+
+@patch("net._settle_probe")
+def test_settle_until_online_stops_on_portal_redirect(mock_probe):
+    """Test a persistent portal redirect ends settling early"""
+    mock_probe.return_value = "portal"
+    
+    t0 = time.monotonic()
+    assert settle_until_online(max_s=5.0, step=0.05, portal_grace_s=0.1) is False
+    assert time.monotonic() - t0 < 1.0
+
+
+@patch("net._probe")
+def test_settle_probe_classifies(mock_probe):
+    """Test the settle probe tells online, portal and pending apart"""
+    from net import _settle_probe
+    r = MagicMock()
+    r.status_code = 204
+    r.url = "http://clients3.google.com/generate_204"
+    mock_probe.return_value = r
+    assert _settle_probe(1) == "online"
+    r.status_code = 200
+    r.url = "http://172.16.16.16/24online/webpages/client.jsp"
+    assert _settle_probe(1) == "portal"
+    mock_probe.side_effect = Exception("timeout")
+    assert _settle_probe(1) == "pending"
 
 
 @patch("net._session.post")
@@ -179,13 +222,132 @@ def test_login_with_diagnostics_connection_error(mock_post):
     assert result["reason_code"] == "network_error"  # Actual code returned
 
 
+def _streamed_response(chunks, status=200, encoding="utf-8"):
+    r = MagicMock()
+    r.status_code = status
+    r.url = "http://172.16.16.16/24online/servlet/E24onlineHTTPClient"
+    r.encoding = encoding
+    served = []
+
+    def iter_content(chunk_size=None):
+        for c in chunks:
+            served.append(c)
+            yield c
+
+    r.iter_content.side_effect = iter_content
+    r.served = served
+    return r
+
+
+_STREAM_CFG = {
+    "login_url": "http://example.com/login",
+    "post_timeout": 8,
+    "login_error_patterns": {"quota_exceeded": r"quota.*exceeded"},
+}
+
+
+@patch("net._session.post")
+def test_login_stream_stops_at_error_pattern(mock_post):
+    """Reading stops at the chunk that completes an error pattern; the rest is never pulled"""
+    chunks = [b"<html>" + b" " * 4090, b"your quota ", b"has been exceeded</p>", b"x" * 4096, b"y" * 4096]
+    r = _streamed_response(chunks)
+    mock_post.return_value = r
+
+    result = login_with_diagnostics(_STREAM_CFG, "u", "p")
+
+    assert result["reason_code"] == "quota_exceeded"
+    assert len(r.served) == 3
+    assert result["bytes_read"] == sum(len(c) for c in chunks[:3])
+    assert mock_post.call_args.kwargs["stream"] is True
+    r.close.assert_called_once()
+
+
+@patch("net._session.post")
+def test_login_stream_respects_byte_budget(mock_post):
+    """A huge page is read only up to login_max_bytes and still classified"""
+    chunks = [b"welcome to 24online " + b"a" * 4076] + [b"b" * 4096] * 100
+    r = _streamed_response(chunks)
+    mock_post.return_value = r
+    cfg = dict(_STREAM_CFG, login_max_bytes=10000)
+
+    result = login_with_diagnostics(cfg, "u", "p")
+
+    assert result["bytes_read"] == 10000
+    assert len(r.served) == 3
+    assert result["reason_code"] == "unknown"
+    r.close.assert_called_once()
+
+
+@patch("net._session.post")
+def test_login_stream_decodes_across_chunks(mock_post):
+    """Multi-byte characters split between chunks decode intact"""
+    body = "Login success – ✓".encode("utf-8")
+    r = _streamed_response([body[:15], body[15:]])
+    mock_post.return_value = r
+
+    result = login_with_diagnostics(_STREAM_CFG, "u", "p")
+
+    assert result["ok"] is True
+    assert result["bytes_read"] == len(body)
+
+
+@patch("net._session.post")
+def test_login_stream_keeps_config_priority(mock_post):
+    """A lower-priority match in an early chunk does not beat a higher-priority one later in the page"""
+    chunks = [b"account blocked? " + b" " * 4079, b"x" * 4096, b"your quota has been exceeded", b"tail"]
+    r = _streamed_response(chunks)
+    mock_post.return_value = r
+    cfg = dict(_STREAM_CFG, login_error_patterns={
+        "quota_exceeded": r"quota.*exceeded",
+        "account_expired": r"(expired|inactive|blocked)",
+    })
+
+    result = login_with_diagnostics(cfg, "u", "p")
+
+    assert result["reason_code"] == "quota_exceeded"
+    assert len(r.served) == 3  # stopped as soon as the top-priority code matched
+
+
+@patch("net._session.post")
+def test_login_stream_stops_at_scan_cap(mock_post):
+    """Nothing past login_scan_max_chars is read, since classify() would not look at it"""
+    chunks = [b"a" * 4096] * 10
+    r = _streamed_response(chunks)
+    mock_post.return_value = r
+    cfg = dict(_STREAM_CFG, login_scan_max_chars=5000)
+
+    result = login_with_diagnostics(cfg, "u", "p")
+
+    assert len(r.served) == 2
+    assert result["bytes_read"] == 8192
+
+
+@patch("net._session.post")
+def test_login_stream_closes_on_read_error(mock_post):
+    """A connection dropped mid-body is a network error and the response is closed"""
+    r = _streamed_response([])
+    r.iter_content.side_effect = Exception("connection reset")
+    mock_post.return_value = r
+
+    result = login_with_diagnostics(_STREAM_CFG, "u", "p")
+
+    assert result["reason_code"] == "network_error"
+    assert result["bytes_read"] == 0
+    r.close.assert_called_once()
+
+
 @patch("net._session.get")
 def test_probe_success(mock_get):
-    """Test _probe function"""
+    """Test _probe function with a single endpoint"""
+    from net import configure_probe
     mock_response = MagicMock()
     mock_get.return_value = mock_response
     
-    result = _probe()
+    configure_probe(["http://clients3.google.com/generate_204"])
+    try:
+        result = _probe()
+    finally:
+        configure_probe()
     assert result == mock_response
     mock_get.assert_called_once_with(
         "http://clients3.google.com/generate_204",
@@ -195,6 +357,95 @@ def test_probe_success(mock_get):
     )
 
 
+def _fake_get(delays, statuses=None, failing=()):
+    """Build a _session.get stand-in with per-URL latency and status"""
+    def _get(url, **_kwargs):
+        time.sleep(delays.get(url, 0))
+        if url in failing:
+            raise ConnectionError("unreachable")
+        r = MagicMock()
+        r.status_code = (statuses or {}).get(url, 204)
+        r.url = url
+        r.text = ""
+        return r
+    return _get
+
+
+def test_probe_race_fastest_endpoint_wins():
+    """Test a slow endpoint does not delay the answer"""
+    from net import configure_probe, probe_stats
+    slow, fast = "http://slow.test/generate_204", "http://fast.test/generate_204"
+    configure_probe([slow, fast], timeout=3)
+    try:
+        with patch("net._session.get", side_effect=_fake_get({slow: 1.0})):
+            t0 = time.perf_counter()
+            r = _probe()
+            elapsed = time.perf_counter() - t0
+    finally:
+        configure_probe()
+    assert r.url == fast
+    assert elapsed < 0.5
+    assert probe_stats()["endpoints"][fast]["wins"] >= 1
+
+
+def test_probe_race_hung_endpoint_holds_one_worker():
+    """Test repeated races never stack requests on an endpoint that has not answered yet"""
+    from net import _ProbeRacer
+    hung, fast = "http://hung.test/generate_204", "http://fast.test/generate_204"
+    release = threading.Event()
+    calls = []
+
+    def _get(url, **_kwargs):
+        calls.append(url)
+        if url == hung:
+            release.wait(5)
+        r = MagicMock(status_code=204, url=url, text="")
+        return r
+
+    racer = _ProbeRacer([hung, fast], timeout=3)
+    try:
+        with patch("net._session.get", side_effect=_get):
+            for _ in range(5):
+                assert racer.probe().url == fast
+            assert calls.count(hung) == 1
+            assert racer.stats()["busy_skips"] == 4
+            release.set()
+            deadline = time.monotonic() + 2
+            while racer._inflight and time.monotonic() < deadline:
+                time.sleep(0.01)
+            racer.probe()
+            assert calls.count(hung) == 2
+    finally:
+        release.set()
+
+
+def test_probe_race_skips_failed_endpoint():
+    """Test an unreachable endpoint is not taken as the answer"""
+    from net import configure_probe, portal_intercept_present
+    bad, good = "http://bad.test/generate_204", "http://good.test/generate_204"
+    configure_probe([bad, good], timeout=3)
+    try:
+        with patch("net._session.get", side_effect=_fake_get({good: 0.05}, failing={bad})):
+            assert online_now() is True
+            assert portal_intercept_present() is False
+    finally:
+        configure_probe()
+
+
+def test_probe_race_all_fail():
+    """Test the race raises when no endpoint answers"""
+    from net import configure_probe
+    a, b = "http://a.test/generate_204", "http://b.test/generate_204"
+    configure_probe([a, b], timeout=3)
+    try:
+        with patch("net._session.get", side_effect=_fake_get({}, failing={a, b})):
+            with pytest.raises(Exception):
+                _probe()
+            assert online_now() is False
+    finally:
+        configure_probe()
+
+
 @patch("subprocess.run")
 def test_run_cmd_success(mock_run):
     """Test _run_cmd with successful command"""
@@ -237,3 +488,130 @@ def test_any_connected_ssid_partial_match(mock_ssids):
     assert any_connected_ssid("MDI") is True
     assert any_connected_ssid("MDI-WiFi") is True
 
+
+
+def _proc_hex(ip):
+    """/proc/net/route prints the network-order address as a host-order integer"""
+    return "%08X" % struct.unpack("=I", socket.inet_aton(ip))[0]
+
+
+PROC_NET_ROUTE = (
+    "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+    f"wlan0\t00000000\t{_proc_hex('192.168.16.1')}\t0003\t0\t0\t600\t00000000\t0\t0\t0\n"
+    "wlan0\t0010A8C0\t00000000\t0001\t0\t0\t600\t00FFFFFF\t0\t0\t0\n"
+)
+
+
+def test_default_gateways_proc(tmp_path, monkeypatch):
+    """Test the kernel routing table is decoded without subprocesses"""
+    from net import _default_gateways_proc
+    route = tmp_path / "route"
+    route.write_text(PROC_NET_ROUTE, encoding="ascii")
+    monkeypatch.setattr("net._PROC_NET_ROUTE", str(route))
+    assert _default_gateways_proc() == ["192.168.16.1"]
+
+
+def test_default_gateways_proc_missing(tmp_path, monkeypatch):
+    """Test a missing /proc table defers to the next backend"""
+    from net import _default_gateways_proc
+    monkeypatch.setattr("net._PROC_NET_ROUTE", str(tmp_path / "missing"))
+    assert _default_gateways_proc() is None
+
+
+@patch("net._run_cmd")
+def test_default_gateways_ip_route(mock_run):
+    """Test the subprocess fallback parses ip route"""
+    from net import _default_gateways_ip_route
+    mock_run.return_value = "default via 172.16.0.1 dev wlan0\n172.16.0.0/16 dev wlan0\n"
+    assert _default_gateways_ip_route() == ["172.16.0.1"]
+
+
+def test_gateway_backend_fallback():
+    """Test the chain skips backends that cannot answer"""
+    from net import default_gateways, set_gateway_backends
+    broken = MagicMock(side_effect=OSError("boom"))
+    try:
+        set_gateway_backends([lambda: None, broken, lambda: ["10.0.0.1"]])
+        assert default_gateways() == ["10.0.0.1"]
+    finally:
+        set_gateway_backends()
+
+
+def test_gateway_is_campus_uses_network():
+    """Test the campus check uses a real network, not a string prefix"""
+    from net import gateway_is_campus, set_gateway_backends
+    try:
+        set_gateway_backends([lambda: ["172.16.5.1"]])
+        assert gateway_is_campus() is True
+        assert gateway_is_campus("10.0.0.0/8") is False
+        set_gateway_backends([lambda: ["172.160.0.1"]])
+        assert gateway_is_campus() is False
+        assert gateway_is_campus("not a network") is False
+    finally:
+        set_gateway_backends()
+
+
+@pytest.fixture
+def local_204_server():
+    """Tiny HTTP/1.1 server that answers every GET with 204"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/generate_204"
+    server.shutdown()
+    server.server_close()
+
+
+def _stats_delta(before, after):
+    return {k: after[k] - before[k] for k in ("requests", "new_connections", "reused")}
+
+
+def test_keepalive_reuses_connections(local_204_server):
+    """Test keep-alive mode serves repeat requests from one pooled socket"""
+    import net
+    net.configure_connections("keepalive")
+    net.reset_connections()
+    before = net.connection_stats()
+    for _ in range(3):
+        assert net._session.get(local_204_server, timeout=3).status_code == 204
+    delta = _stats_delta(before, net.connection_stats())
+    assert delta == {"requests": 3, "new_connections": 1, "reused": 2}
+
+
+def test_close_mode_opens_new_connections(local_204_server):
+    """Test close mode never reuses a socket"""
+    import net
+    try:
+        net.configure_connections("close")
+        before = net.connection_stats()
+        for _ in range(3):
+            net._session.get(local_204_server, timeout=3)
+        delta = _stats_delta(before, net.connection_stats())
+        assert delta["new_connections"] == 3
+        assert net.connection_stats()["mode"] == "close"
+    finally:
+        net.configure_connections("keepalive")
+
+
+def test_reset_connections_drops_pool(local_204_server):
+    """Test a network event closes pooled sockets"""
+    import net
+    net.configure_connections("keepalive")
+    net._session.get(local_204_server, timeout=3)
+    net.invalidate_network_caches()
+    before = net.connection_stats()
+    net._session.get(local_204_server, timeout=3)
+    assert _stats_delta(before, net.connection_stats())["new_connections"] == 1
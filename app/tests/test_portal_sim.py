@@ -0,0 +1,103 @@
+"""
+Tests for portal_sim.py and net.py running against it
+"""
+import time
+
+import pytest
+import requests
+
+import net
+from config import load_config
+from portal_sim import PortalSimulator, SimProfile
+
+
+@pytest.fixture
+def sim():
+    s = PortalSimulator().start()
+    yield s
+    s.stop()
+
+
+@pytest.fixture
+def sim_cfg(sim, temp_config_dir):
+    cfg = load_config()
+    cfg.update(sim.config_overrides())
+    cfg["post_timeout"] = 2
+    cfg["probe_timeout_s"] = 2
+    net.apply_net_config(cfg)
+    yield cfg
+    net.apply_net_config({})
+
+
+def test_probe_captive_until_login(sim, sim_cfg):
+    """Probe is redirected to the portal until a login succeeds"""
+    snap = net.network_snapshot(sim_cfg, max_age=0)
+    assert snap.online is False and snap.captive is True and snap.on_target is True
+    assert net._settle_probe(2) == "portal"
+
+    result = net.login_with_diagnostics(sim_cfg, "user", "pass")
+
+    assert result["ok"] is True
+    assert net.network_snapshot(sim_cfg, max_age=0).online is True
+    assert sim.stats.logins == 1
+
+
+@pytest.mark.parametrize("outcome", ["quota_exceeded", "too_many_devices", "bad_credentials", "account_expired"])
+def test_fatal_pages_match_default_patterns(sim, sim_cfg, outcome):
+    """Each simulated failure page is classified as the matching reason code"""
+    sim.reset(profile=SimProfile(outcome=outcome))
+
+    result = net.login_with_diagnostics(sim_cfg, "user", "pass")
+
+    assert result["reason_code"] == outcome
+    assert sim.online is False
+
+
+def test_online_delay(sim, sim_cfg):
+    """A good login turns the probe 204 only after online_delay_s"""
+    sim.reset(profile=SimProfile(online_delay_s=0.3))
+    net.login_with_diagnostics(sim_cfg, "user", "pass")
+    assert sim.online is False
+
+    assert net.settle_until_online(3, 0.1) is True
+    assert sim.online is True
+
+
+def test_fail_first_then_ok(sim, sim_cfg):
+    """The first fail_first logins get an unrecognized page"""
+    sim.reset(profile=SimProfile(fail_first=1))
+
+    assert net.login_with_diagnostics(sim_cfg, "user", "pass")["reason_code"] == "unknown"
+    assert net.login_with_diagnostics(sim_cfg, "user", "pass")["ok"] is True
+    assert sim.stats.login_outcomes == {"unknown": 1, "ok": 1}
+
+
+def test_drops_close_connection(sim):
+    """Dropped requests close the connection without a reply"""
+    sim.reset(profile=SimProfile(drop_rate=1.0))
+
+    with pytest.raises(requests.ConnectionError):
+        requests.get(sim.probe_url, timeout=2)
+    assert sim.stats.drops == 1
+
+
+def test_latency(sim):
+    """latency_s delays every reply"""
+    sim.reset(online=True, profile=SimProfile(latency_s=0.2))
+
+    t0 = time.monotonic()
+    r = requests.get(sim.probe_url, timeout=2)
+
+    assert r.status_code == 204
+    assert time.monotonic() - t0 >= 0.2
+
+
+def test_unknown_outcome_rejected():
+    """Unknown outcomes fail fast instead of serving a blank page"""
+    with pytest.raises(ValueError):
+        SimProfile(outcome="nope")
+
+
+def test_force_on_target_skips_ssid_lookup():
+    """force_on_target makes the target check succeed off campus"""
+    assert net.target_network_available({"ssid": "MDI", "force_on_target": True}) is True
@@ -0,0 +1,152 @@
+"""
+Tests for reconnect.py - the pure reconnect state machine and its simulator
+"""
+import random
+import time
+
+from reconnect import (
+    COOLDOWN, EXHAUSTED, FATAL, GRACE, LOGGED_IN, LOGIN, NO_CREDENTIALS, NOT_CAPTIVE, ONLINE, RETRY,
+    Probe, ReconnectMachine, RetryPolicy, VirtualClock, simulate,
+)
+
+CAPTIVE = (False, True, True)
+
+
+def _machine(**policy):
+    clock = VirtualClock(1000.0)
+    return ReconnectMachine(RetryPolicy(**policy), clock=clock, rng=random.Random(1)), clock
+
+
+def test_policy_from_config(sample_config):
+    """Config keys map onto the policy"""
+    p = RetryPolicy.from_config(sample_config)
+    assert (p.base_interval, p.post_grace_s, p.backoff_initial_s, p.backoff_max_s) == (5, 6, 2, 10)
+    assert p.max_consecutive == 3 and p.cooldown_on_fatal_s == 10
+
+
+def test_captive_posts_then_waits_out_grace():
+    """A second captive probe inside post_grace_s does not POST again"""
+    m, clock = _machine(post_grace_s=6, base_interval=5)
+    assert m.decide(*CAPTIVE).kind == LOGIN
+    clock.sleep(2)
+    d = m.decide(*CAPTIVE)
+    assert d.kind == GRACE and d.delay == 4
+    clock.sleep(4)
+    assert m.decide(*CAPTIVE).kind == LOGIN
+
+
+def test_not_captive_resets_failures():
+    """Being online or off-target clears backoff"""
+    m, _ = _machine()
+    m.record_failure()
+    assert m.decide(True, False, True).kind == ONLINE
+    assert m.backoff_s is None and m.fail_count == 0
+    assert m.decide(False, False, False).kind == NOT_CAPTIVE
+
+
+def test_missing_credentials_never_posts():
+    """Without credentials the machine waits a base interval"""
+    m, _ = _machine(base_interval=7)
+    d = m.decide(*CAPTIVE, has_credentials=False)
+    assert (d.kind, d.delay) == (NO_CREDENTIALS, 7)
+    assert d.at_portal
+
+
+def test_backoff_doubles_then_cools_down():
+    """Failures back off 2, 4, then the third in a row cools down"""
+    m, clock = _machine(backoff_initial_s=2, backoff_max_s=10, max_consecutive=3)
+    assert m.login_result(False, "unknown").kind == RETRY and m.idle_delay() == 2
+    assert m.login_result(False, "unknown").kind == RETRY and m.idle_delay() == 4
+    assert m.login_result(False, "unknown").kind == EXHAUSTED
+    assert m.cooldown_until == clock.now + 10
+    d = m.decide(*CAPTIVE)
+    assert d.kind == COOLDOWN and d.delay == 3
+
+
+def test_fatal_reason_cools_down():
+    """A fatal portal answer pauses for cooldown_on_fatal_s"""
+    m, clock = _machine(cooldown_on_fatal_s=30)
+    assert m.login_result(False, "quota_exceeded").kind == FATAL
+    assert m.cooling_down()
+    clock.sleep(30)
+    assert not m.cooling_down()
+
+
+def test_network_event_cancels_cooldown():
+    """A network change retries at once"""
+    m, _ = _machine()
+    m.login_result(False, "bad_credentials")
+    m.network_event()
+    assert m.decide(*CAPTIVE).kind == LOGIN
+
+
+def test_success_resets_and_starts_grace():
+    """A settled login clears failures and returns no delay"""
+    m, _ = _machine()
+    m.record_failure()
+    d = m.login_result(True, "ok")
+    assert (d.kind, d.delay) == (LOGGED_IN, 0.0)
+    assert m.fail_count == 0 and m.backoff_s is None
+
+
+def test_idle_delay_jitter_is_seeded():
+    """Jitter comes from the injected RNG and stays within bounds"""
+    a = ReconnectMachine(rng=random.Random(7))
+    b = ReconnectMachine(rng=random.Random(7))
+    delays = [a.idle_delay() for _ in range(50)]
+    assert delays == [b.idle_delay() for _ in range(50)]
+    assert all(4.0 <= d <= 6.0 for d in delays)
+
+
+def _flaky_portal(clock, failures, reason="unknown", post_s=0.3):
+    state = {"left": failures}
+
+    def prober():
+        return Probe(False, True, True)
+
+    def transport():
+        clock.sleep(post_s)
+        if state["left"]:
+            state["left"] -= 1
+            return False, reason
+        return True, "ok"
+
+    return prober, transport
+
+
+def test_simulate_recovers_after_failures():
+    """Two failed POSTs back off 2 s then 4 s before the third succeeds"""
+    m, clock = _machine(post_grace_s=0)
+    prober, transport = _flaky_portal(clock, failures=2)
+    res = simulate(m, prober, transport, clock, record=True)
+    assert res.posts == 3
+    assert round(res.time_to_online_s, 6) == 6.9
+    assert [k for _, k in res.decisions].count(RETRY) == 2
+
+
+def test_simulate_gives_up_at_horizon():
+    """Bad credentials never get online; the result says so"""
+    m, clock = _machine()
+    prober, transport = _flaky_portal(clock, failures=10 ** 6, reason="bad_credentials")
+    res = simulate(m, prober, transport, clock, horizon_s=120)
+    assert res.time_to_online_s is None
+    assert 1 <= res.posts <= 13
+
+
+def test_thousands_of_scenarios_per_second():
+    """The machine is cheap enough to sweep retry settings in CI"""
+    t0 = time.perf_counter()
+    for seed in range(2000):
+        m, clock = _machine(post_grace_s=0)
+        prober, transport = _flaky_portal(clock, failures=seed % 5)
+        simulate(m, prober, transport, clock)
+    assert time.perf_counter() - t0 < 2.0
+
+
+def test_simulate_survives_float_remainders():
+    """A grace period ending 7e-15 s from now does not stall the virtual clock"""
+    m, clock = _machine(post_grace_s=6)
+    clock.now = 65.70516960281324
+    m.last_post_ts = 59.70516960281325  # grace_left is below half an ulp of clock.now
+    prober, transport = _flaky_portal(clock, failures=0)
+    assert simulate(m, prober, transport, clock, horizon_s=5).time_to_online_s is not None
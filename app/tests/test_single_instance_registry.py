@@ -0,0 +1,160 @@
+"""
+Tests for the instance registry in single_instance.py (runs on every platform)
+"""
+import json
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import psutil
+import pytest
+
+import single_instance
+from single_instance import (
+    _acquire_lock_after_exit,
+    _clear_registry,
+    _read_registry,
+    _registered_instances,
+    _write_registry,
+    enforce_single_instance,
+    release_single_instance,
+)
+from config import APP_VERSION
+
+
+def _record(pid, started, exe="/opt/mdi/MDI AutoLogin", version="0.0.0"):
+    return {"pid": pid, "exe": exe, "started": started, "version": version}
+
+
+def test_write_then_read_registry(tmp_path):
+    """The record names this process with its start time"""
+    _write_registry(str(tmp_path / "MDI AutoLogin"))
+    rec = _read_registry()
+    assert rec["pid"] == os.getpid()
+    assert rec["started"] == pytest.approx(psutil.Process().create_time())
+    assert rec["exe"].endswith("MDI AutoLogin")
+
+
+def test_read_registry_ignores_garbage():
+    """A corrupt record counts as no record"""
+    single_instance.INSTANCE_PATH.write_text("{not json", encoding="utf-8")
+    assert _read_registry() is None
+
+
+@patch("single_instance.psutil.Process")
+def test_registered_instance_found(mock_process):
+    """A live PID with a matching start time is the running instance"""
+    proc = MagicMock(pid=4321)
+    proc.create_time.return_value = 1000.2
+    mock_process.return_value = proc
+    assert _registered_instances(_record(4321, 1000.0), "/opt/mdi/MDI AutoLogin") == [proc]
+
+
+@patch("single_instance.psutil.Process")
+def test_registered_pid_reused(mock_process):
+    """A start time mismatch means the PID now belongs to something else"""
+    mock_process.return_value.create_time.return_value = 5000.0
+    assert _registered_instances(_record(4321, 1000.0), "/x") == []
+
+
+@patch("single_instance.psutil.Process", side_effect=psutil.NoSuchProcess(4321))
+def test_registered_pid_gone(mock_process):
+    """A dead PID is a stale record"""
+    assert _registered_instances(_record(4321, 1000.0), "/x") == []
+
+
+def test_registered_self_ignored():
+    """The record of the current process is not another instance"""
+    assert _registered_instances(_record(os.getpid(), 0.0), "/x") == []
+
+
+@patch("single_instance._find_old_instances")
+@patch("single_instance._acquire_instance_lock", return_value=7)
+def test_registry_skips_process_scan(mock_mutex, mock_find):
+    """With a usable record the full process scan never runs"""
+    single_instance.INSTANCE_PATH.write_text(json.dumps(_record(2 ** 22 + 17, 1.0)), encoding="utf-8")
+    is_first, handle = enforce_single_instance("/opt/mdi/MDI AutoLogin")
+    assert (is_first, handle) == (True, 7)
+    mock_find.assert_not_called()
+    assert _read_registry()["pid"] == os.getpid()
+
+
+@patch("single_instance._find_old_instances", return_value=[])
+@patch("single_instance._acquire_instance_lock", return_value=7)
+def test_missing_registry_falls_back_to_scan(mock_mutex, mock_find):
+    """Without a record the process scan still runs"""
+    enforce_single_instance("/opt/mdi/MDI AutoLogin")
+    mock_find.assert_called_once()
+
+
+@patch("single_instance._kill_old_instances", return_value=1)
+@patch("single_instance._find_old_instances")
+@patch("single_instance._acquire_instance_lock")
+def test_unregistered_mutex_holder_scanned(mock_mutex, mock_find, mock_kill):
+    """If the mutex is held by a process the record doesn't know, scan and replace it"""
+    single_instance.INSTANCE_PATH.write_text(json.dumps(_record(2 ** 22 + 17, 1.0)), encoding="utf-8")
+    old = MagicMock(pid=99)
+    mock_find.return_value = [old]
+    mock_mutex.side_effect = [None, 7]
+
+    assert enforce_single_instance("/opt/mdi/MDI AutoLogin") == (True, 7)
+    mock_kill.assert_called_once_with([old])
+
+
+@patch("single_instance._bring_existing_to_front")
+@patch("single_instance._kill_old_instances")
+@patch("single_instance._acquire_instance_lock")
+@patch("single_instance.psutil.Process")
+def test_same_build_instance_is_kept(mock_process, mock_mutex, mock_kill, mock_front, tmp_path):
+    """A second launch of the same exe and version leaves the running instance alone and exits"""
+    exe = str(tmp_path / "MDI AutoLogin")
+    rec = _record(4321, 1000.0, exe=str(Path(exe).resolve()), version=APP_VERSION)
+    single_instance.INSTANCE_PATH.write_text(json.dumps(rec), encoding="utf-8")
+    mock_process.return_value = MagicMock(pid=4321, **{"create_time.return_value": 1000.0})
+
+    assert enforce_single_instance(exe) == (False, None)
+    mock_kill.assert_not_called()
+    mock_mutex.assert_not_called()
+    mock_front.assert_called_once()
+    assert _read_registry()["pid"] == 4321
+
+
+@patch("single_instance._kill_old_instances", return_value=1)
+@patch("single_instance._acquire_instance_lock", return_value=7)
+@patch("single_instance.psutil.Process")
+def test_other_version_same_path_is_replaced(mock_process, mock_mutex, mock_kill, tmp_path):
+    """An older version updated in place is still terminated"""
+    exe = str(tmp_path / "MDI AutoLogin")
+    rec = _record(4321, 1000.0, exe=str(Path(exe).resolve()))
+    single_instance.INSTANCE_PATH.write_text(json.dumps(rec), encoding="utf-8")
+    proc = MagicMock(pid=4321, **{"create_time.return_value": 1000.0})
+    mock_process.return_value = proc
+
+    assert enforce_single_instance(exe) == (True, 7)
+    mock_kill.assert_called_once_with([proc])
+
+
+@patch("single_instance._release_instance_lock")
+def test_clean_shutdown_removes_record(mock_release, tmp_path):
+    """The record goes away with the instance, before the lock is released"""
+    _write_registry(str(tmp_path / "MDI AutoLogin"))
+    record_at_release = []
+    mock_release.side_effect = lambda _h: record_at_release.append(single_instance.INSTANCE_PATH.exists())
+    release_single_instance(7)
+    mock_release.assert_called_once_with(7)
+    assert record_at_release == [False]
+
+
+def test_clear_registry_keeps_other_instances_record():
+    """A record rewritten by another process is not ours to delete"""
+    single_instance.INSTANCE_PATH.write_text(json.dumps(_record(4321, 1.0)), encoding="utf-8")
+    _clear_registry()
+    assert _read_registry()["pid"] == 4321
+
+
+@patch("single_instance.time.sleep")
+@patch("single_instance._acquire_instance_lock", side_effect=[None, None, 7])
+def test_mutex_retried_until_released(mock_mutex, mock_sleep):
+    """After a kill the lock is retried briefly instead of a fixed sleep"""
+    assert _acquire_lock_after_exit(timeout=5) == 7
+    assert mock_sleep.call_count == 2
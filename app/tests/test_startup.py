@@ -61,3 +61,61 @@ def test_current_executable_frozen(monkeypatch):
         exe = current_executable()
         assert exe == "C:\\app\\MDI AutoLogin.exe"
 
+
+
+@patch("startup.ctypes")
+@patch("startup.current_executable", return_value="C:\\app\\MDI AutoLogin.exe")
+@patch("startup.enable_startup", return_value=True)
+def test_elevated_helper_enables_and_resumes(mock_enable, mock_exe, mock_ctypes):
+    """--elevate-autostart registers startup and reopens the resume target"""
+    from startup import handle_elevated_flags
+    assert handle_elevated_flags(["--elevate-autostart", "C:\\x.exe"]) is True
+    mock_enable.assert_called_once_with("C:\\app\\MDI AutoLogin.exe", prefer_task=True)
+    mock_ctypes.windll.shell32.ShellExecuteW.assert_called_once_with(None, "open", "C:\\x.exe", "", None, 1)
+
+
+@patch("startup.ctypes")
+@patch("startup.disable_startup", return_value=True)
+def test_elevated_helper_disables(mock_disable, mock_ctypes):
+    """--disable-autostart removes startup; no resume target means nothing is reopened"""
+    from startup import handle_elevated_flags
+    assert handle_elevated_flags(["--disable-autostart"]) is True
+    mock_disable.assert_called_once_with()
+    mock_ctypes.windll.shell32.ShellExecuteW.assert_not_called()
+
+
+def test_elevated_helper_ignores_normal_launch():
+    """Without a helper flag nothing happens"""
+    from startup import handle_elevated_flags
+    with patch("startup.enable_startup") as mock_enable, patch("startup.disable_startup") as mock_disable:
+        assert handle_elevated_flags(["--headless"]) is False
+    mock_enable.assert_not_called()
+    mock_disable.assert_not_called()
+
+
+@pytest.mark.parametrize("flag", ["--elevate-autostart", "--disable-autostart"])
+def test_main_runs_elevated_helper_before_parsing(flag):
+    """app.py hands the helper flags to startup before argparse sees them"""
+    import app
+    argv = [flag, "C:\\x.exe"]
+    with patch("startup.handle_elevated_flags", return_value=True) as mock_helper, \
+            patch("app._parse_args") as mock_parse, patch("app.setup_logger") as mock_logger:
+        app.main(argv)
+    mock_helper.assert_called_once_with(argv)
+    mock_parse.assert_not_called()
+    mock_logger.assert_not_called()
+
+
+def test_parse_args_accepts_elevated_flags():
+    """The strict parser knows the helper flags, with or without a resume target"""
+    import app
+    args = app._parse_args(["--elevate-autostart", "C:\\x.exe"])
+    assert args.elevate_autostart == "C:\\x.exe" and args.disable_autostart is None
+    assert app._parse_args(["--disable-autostart"]).disable_autostart == ""
+
+
+def test_elevated_flags_in_sync():
+    """app.py's copy of the helper flags matches startup's"""
+    import app
+    import startup
+    assert app.ELEVATED_FLAGS == startup.ELEVATED_FLAGS
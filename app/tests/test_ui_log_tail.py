@@ -0,0 +1,85 @@
+"""
+Tests for ui/log_tail.py - Incremental log reading for the control panel
+"""
+import os
+
+from ui.log_tail import LogTailer
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8", newline="") as fh:
+        fh.write(text)
+
+
+def test_first_read_returns_last_lines(tmp_path):
+    """Test the first read shows only the tail of an existing log"""
+    log_file = tmp_path / "app.log"
+    _append(log_file, "".join(f"line {i}\n" for i in range(10)))
+    reset, lines = LogTailer(log_file, max_lines=3).read_new()
+    assert reset is True
+    assert lines == ["line 7", "line 8", "line 9"]
+
+
+def test_reads_only_appended_lines(tmp_path):
+    """Test later reads return just what was appended"""
+    log_file = tmp_path / "app.log"
+    _append(log_file, "one\n")
+    tailer = LogTailer(log_file)
+    tailer.read_new()
+    assert tailer.read_new() == (False, [])
+
+    _append(log_file, "two\nthree\n")
+    assert tailer.read_new() == (False, ["two", "three"])
+
+
+def test_partial_line_held_until_complete(tmp_path):
+    """Test a line without its newline yet is not shown half-written"""
+    log_file = tmp_path / "app.log"
+    log_file.write_text("", encoding="utf-8")
+    tailer = LogTailer(log_file)
+    tailer.read_new()
+
+    _append(log_file, "hal")
+    assert tailer.read_new() == (False, [])
+    _append(log_file, "f done\n")
+    assert tailer.read_new() == (False, ["half done"])
+
+
+def test_first_read_skips_cut_line(tmp_path):
+    """Test a large log does not start mid-line"""
+    log_file = tmp_path / "app.log"
+    _append(log_file, "x" * 50 + "\n" + "tail\n")
+    reset, lines = LogTailer(log_file, initial_bytes=20).read_new()
+    assert lines == ["tail"]
+
+
+def test_truncation_resets(tmp_path):
+    """Test clearing the log (Reset log) starts over"""
+    log_file = tmp_path / "app.log"
+    _append(log_file, "old line\nanother\n")
+    tailer = LogTailer(log_file)
+    tailer.read_new()
+
+    log_file.write_text("new\n", encoding="utf-8")
+    assert tailer.read_new() == (True, ["new"])
+
+
+def test_rotation_resets(tmp_path):
+    """Test a RotatingFileHandler rollover is followed to the new file"""
+    log_file = tmp_path / "app.log"
+    _append(log_file, "before rotation\n")
+    tailer = LogTailer(log_file)
+    tailer.read_new()
+
+    os.replace(log_file, tmp_path / "app.log.1")
+    _append(log_file, "after rotation, a longer first line\n")
+    assert tailer.read_new() == (True, ["after rotation, a longer first line"])
+
+
+def test_missing_file(tmp_path):
+    """Test a missing log yields nothing until it appears"""
+    log_file = tmp_path / "app.log"
+    tailer = LogTailer(log_file)
+    assert tailer.read_new() == (False, [])
+    _append(log_file, "hello\n")
+    assert tailer.read_new() == (True, ["hello"])
@@ -0,0 +1,130 @@
+"""
+Tests for ui/sessions.py - reconnect sessions and their phase timeline
+"""
+from unittest.mock import MagicMock, patch
+
+from ui.sessions import (
+    CAPTIVE, EVENT, ONLINE, POST_RESPONSE, POST_SENT, SESSION_MAX_MARKS,
+    SessionTracker, format_session,
+)
+from ui.status import sample_panel_status
+
+
+class FakeClock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+    def advance(self, s):
+        self.t += s
+
+
+def test_full_reconnect_phases():
+    """A reconnect records every phase with monotonic offsets"""
+    clock = FakeClock()
+    tr = SessionTracker(clock=clock)
+
+    tr.network_event("wifi")
+    clock.advance(0.12); tr.captive()
+    clock.advance(0.01); tr.post_sent()
+    clock.advance(0.30); tr.post_response("ok")
+    clock.advance(1.40); tr.online()
+
+    [s] = tr.history()
+    assert [p for p, _ in s.marks] == [EVENT, CAPTIVE, POST_SENT, POST_RESPONSE, ONLINE]
+    assert s.trigger == "wifi" and s.outcome == ONLINE
+    assert round(s.total_ms()) == 1830
+    assert round(s.durations_ms()[ONLINE]) == 1400
+    assert tr.current() is None
+
+
+def test_session_without_portal_is_dropped():
+    """An event that ends online without the portal is not a reconnect"""
+    tr = SessionTracker(clock=FakeClock())
+    tr.network_event("addr")
+    tr.online()
+    assert tr.history() == []
+
+
+def test_new_event_restarts_idle_session():
+    """A later event restarts timing if the earlier one never reached the portal"""
+    clock = FakeClock()
+    tr = SessionTracker(clock=clock)
+    tr.network_event("wifi")
+    clock.advance(3600)
+    tr.network_event("wifi")
+    clock.advance(0.2); tr.captive()
+    tr.online()
+    assert round(tr.history()[0].phase_offsets_ms()[1][1]) == 200
+
+
+def test_retries_counted():
+    """Repeated POSTs in one reconnect add attempts and keep the last reason"""
+    tr = SessionTracker(clock=FakeClock())
+    tr.captive()
+    tr.post_sent(); tr.post_response("unknown")
+    tr.post_sent(); tr.post_response("ok")
+    tr.online()
+    s = tr.history()[0]
+    assert s.trigger == "poll" and s.attempts == 2 and s.last_reason == "ok"
+    assert "2 attempts" in format_session(s)
+
+
+def test_marks_capped_in_long_captive_period():
+    """Hundreds of attempts keep a bounded timeline: the first marks, a count, and the latest"""
+    clock = FakeClock()
+    tr = SessionTracker(clock=clock)
+    tr.network_event("wifi")
+    clock.advance(0.1); tr.captive()
+    for _ in range(200):
+        clock.advance(1.0); tr.post_sent()
+        clock.advance(0.5); tr.post_response("too_many_devices")
+    clock.advance(2.0); tr.online()
+
+    s = tr.history()[0]
+    assert len(s.marks) == SESSION_MAX_MARKS
+    assert s.marks[:2] == [(EVENT, 100.0), (CAPTIVE, 100.1)]
+    assert s.marks[-1][0] == ONLINE
+    assert s.skipped_marks == 2 + 400 + 1 - SESSION_MAX_MARKS
+    assert round(s.total_ms()) == 302100
+    assert round(s.durations_ms()[POST_SENT]) == 200000
+    line = format_session(s)
+    assert f"… ({s.skipped_marks} more) → online +" in line
+    assert line.count("→") == SESSION_MAX_MARKS
+
+
+def test_ring_buffer_bounded():
+    """Only the newest maxlen sessions are kept"""
+    tr = SessionTracker(maxlen=3, clock=FakeClock())
+    for _ in range(5):
+        tr.captive()
+        tr.online()
+    assert len(tr.history()) == 3
+
+
+def test_timeline_newest_first_with_in_progress():
+    """timeline() lists the open reconnect first, then finished ones"""
+    clock = FakeClock()
+    tr = SessionTracker(clock=clock)
+    tr.captive(); tr.online()
+    tr.network_event("wifi"); tr.captive()
+    lines = tr.timeline()
+    assert len(lines) == 2
+    assert lines[0].endswith("…") and "wifi" in lines[0]
+    assert "online +" in lines[1]
+
+
+@patch("ui.status.network_snapshot")
+def test_sample_includes_timeline(mock_snap):
+    """The panel sample carries the reconnect timeline"""
+    mock_snap.return_value = MagicMock(online=True, captive=False, on_target=True)
+    tailer = MagicMock()
+    tailer.read_new.return_value = (False, [])
+    tr = SessionTracker(clock=FakeClock())
+    tr.captive(); tr.online()
+
+    status = sample_panel_status({"ssid": "MDI"}, True, tailer, tr)
+
+    assert status.sessions == tuple(tr.timeline())
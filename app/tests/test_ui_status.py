@@ -0,0 +1,69 @@
+"""
+Tests for ui/status.py - Background status sampling for the control panel
+"""
+import threading
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from net import NetworkSnapshot
+from ui.status import PanelStatus, StatusSampler, sample_panel_status
+
+
+class FakeRoot:
+    """Stands in for tk.Tk: runs after() callbacks immediately"""
+
+    def __init__(self):
+        self.delivered = threading.Event()
+
+    def after(self, _ms, fn, *args):
+        fn(*args)
+        self.delivered.set()
+
+
+@patch("ui.status.network_snapshot")
+def test_sample_panel_status(mock_snapshot):
+    """Test a sample combines snapshot, config, worker state and new log lines"""
+    mock_snapshot.return_value = NetworkSnapshot(False, False, True, "", 0.0)
+    tailer = MagicMock()
+    tailer.read_new.return_value = (True, ["a", "b"])
+    status = sample_panel_status({"ssid": "MDI", "username": "alice"}, True, tailer)
+    assert status == PanelStatus(
+        online=False, captive=True, ssid="MDI", username="alice", running=True,
+        log_reset=True, log_lines=("a", "b"),
+    )
+
+
+def test_panel_status_is_immutable():
+    """Test statuses handed to the Tk thread cannot be mutated"""
+    status = PanelStatus(True, False, "MDI", "", False, False, ())
+    with pytest.raises(Exception):
+        status.online = False
+
+
+@patch("ui.status.sample_panel_status")
+def test_sampler_delivers_on_tk_thread(mock_sample):
+    """Test the sampler hands statuses to the panel through root.after"""
+    status = PanelStatus(True, False, "MDI", "", False, False, ())
+    mock_sample.return_value = status
+    root = FakeRoot()
+    deliver = MagicMock()
+
+    sampler = StatusSampler(root, lambda: {}, lambda: False, deliver, interval=60)
+    sampler.start()
+    assert root.delivered.wait(2)
+    sampler.stop()
+    sampler.join(timeout=2)
+
+    deliver.assert_called_with(status)
+    assert sampler.last_status is status
+    assert not sampler.is_alive()
+
+
+def test_sampler_skips_delivery_after_stop():
+    """Test no status is painted once the panel has closed"""
+    deliver = MagicMock()
+    sampler = StatusSampler(FakeRoot(), lambda: {}, lambda: False, deliver)
+    sampler.stop()
+    sampler._deliver(PanelStatus(True, False, "MDI", "", False, False, ()))
+    deliver.assert_not_called()
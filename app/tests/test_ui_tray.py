@@ -0,0 +1,89 @@
+"""
+Tests for ui/tray.py - Engine switching and reset actions
+"""
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from ui.tray import TrayApp
+
+
+class SlowWorker(threading.Thread):
+    """Worker that takes a while to notice stop(), like one in the middle of a login POST"""
+
+    engine = "thread"
+
+    def __init__(self, exit_after):
+        super().__init__(daemon=True)
+        self.running = True
+        self.exit_after = exit_after
+        self.stopped = threading.Event()
+
+    def run(self):
+        self.stopped.wait()
+        time.sleep(self.exit_after)
+        self.running = False
+
+    def stop(self):
+        self.stopped.set()
+
+
+def _tray_with(worker):
+    tray = MagicMock()
+    tray.worker = worker
+    tray._restart_worker = lambda: TrayApp._restart_worker(tray)
+    return tray
+
+
+def test_set_engine_does_not_block_and_waits_for_old_worker(temp_config_dir, sample_config):
+    """Test switching engines returns at once and starts the new worker only after the old one exited"""
+    old = SlowWorker(exit_after=0.3)
+    old.start()
+    tray = _tray_with(old)
+    started = threading.Event()
+
+    def _start_worker():
+        assert not old.is_alive()
+        started.set()
+
+    tray.start_worker.side_effect = _start_worker
+    with patch("ui.tray.load_config", return_value=dict(sample_config, engine="thread")), \
+            patch("config.save_config"):
+        t0 = time.monotonic()
+        TrayApp.set_engine(tray, "asyncio")
+        assert time.monotonic() - t0 < 0.2
+    assert started.wait(2)
+    assert tray.worker is None
+
+
+def test_restart_skipped_when_stopped_meanwhile():
+    """Test a swap does not restart auto-login the user stopped while the old worker was exiting"""
+    old = SlowWorker(exit_after=0.1)
+    old.start()
+    tray = _tray_with(old)
+
+    def _stop():
+        SlowWorker.stop(old)
+        tray.worker = None  # Stop auto-login from the menu during the swap
+
+    old.stop = _stop
+    TrayApp._restart_worker(tray)
+    assert not old.is_alive()
+    tray.start_worker.assert_not_called()
+
+
+@patch("ui.tray.msg_info")
+@patch("ui.tray.delete_password")
+@patch("ui.tray.delete_config")
+@patch("ui.tray.load_config", return_value={"username": "u1"})
+def test_resets_remove_stored_password(mock_cfg, mock_delete_cfg, mock_delete_pw, mock_info):
+    """Both reset actions drop the config and the saved user's password"""
+    for action in (TrayApp.reset_settings, TrayApp.reset_app):
+        tray = MagicMock()
+        tray._confirm.return_value = True
+        tray._reset_config_and_credentials = lambda: TrayApp._reset_config_and_credentials(tray)
+        with patch("config.save_config") as mock_save:
+            action(tray)
+        mock_save.assert_called_once_with({"username": "u1"})
+    assert mock_delete_cfg.call_count == 2
+    assert [c.args for c in mock_delete_pw.call_args_list] == [("u1",), ("u1",)]
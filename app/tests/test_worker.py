@@ -38,15 +38,16 @@ def test_worker_initialization(worker, sample_config):
 def test_worker_config_refresh(worker, temp_config_dir, sample_config):
     """Test worker refreshes config when file changes"""
     import time
-    from config import CONFIG_PATH, save_config
+    from config import CONFIG_PATH, flush_config, save_config
     
     # Initial config
     assert worker.cfg["ssid"] == "MDI"
     
-    # Modify config file
+    # Modify config file (the debounced write lands on flush)
     new_config = sample_config.copy()
     new_config["ssid"] = "MDI-New"
     save_config(new_config)
+    flush_config()
     
     # Wait a tiny bit for mtime to change
     time.sleep(0.1)
@@ -56,26 +57,33 @@ def test_worker_config_refresh(worker, temp_config_dir, sample_config):
     assert worker.cfg["ssid"] == "MDI-New"
 
 
-@patch("ui.worker.online_now")
-@patch("ui.worker.portal_intercept_present")
-def test_worker_log_state_online(mock_portal, mock_online, worker):
-    """Test worker logs state correctly when online"""
-    mock_online.return_value = True
-    mock_portal.return_value = False
-    
-    worker._log_once_per_state(True, False)
+def _snap(online, captive, on_target=True):
+    from net import NetworkSnapshot
+    return NetworkSnapshot(online, captive, on_target, "", time.monotonic())
+
+
+@patch("ui.worker.network_snapshot")
+def test_worker_log_state_online(mock_snapshot, worker):
+    """Test worker logs state correctly when the probe says online"""
+    mock_snapshot.return_value = _snap(True, False)
+
+    worker._iteration()
     assert worker.last_online_state == "online"
+    mock_snapshot.assert_called_once_with(worker.cfg)
 
 
-@patch("ui.worker.online_now")
-@patch("ui.worker.portal_intercept_present")
-def test_worker_log_state_captive(mock_portal, mock_online, worker):
-    """Test worker logs state correctly when captive"""
-    mock_online.return_value = False
-    mock_portal.return_value = True
-    
-    worker._log_once_per_state(False, True)
+@patch("ui.worker.invalidate_snapshot")
+@patch("ui.worker.settle_until_online", return_value=True)
+@patch("ui.worker.login_with_diagnostics", return_value={"reason_code": "ok"})
+@patch("ui.worker.network_snapshot")
+def test_worker_log_state_captive(mock_snapshot, mock_login, _mock_settle, _mock_invalidate, worker):
+    """Test worker logs state correctly when the probe sees the portal, and logs in"""
+    mock_snapshot.return_value = _snap(False, True)
+    worker.cfg["post_probe_delay_s"] = 0
+
+    worker._iteration()
     assert worker.last_online_state == "captive"
+    mock_login.assert_called_once()
 
 
 def test_worker_backoff_fatal(worker, sample_config):
@@ -93,3 +101,72 @@ def test_worker_backoff_non_fatal(worker, sample_config):
     assert worker.fail_count == initial_fail + 1
     assert worker.backoff_s is not None
 
+
+
+def test_create_worker_engines(mock_tray, temp_config_dir, sample_config, mock_keyring):
+    """Test the engine setting picks the worker class"""
+    from ui.worker import create_worker
+    from ui.async_worker import AsyncAutoLoginWorker
+    with patch("ui.worker.load_config", return_value=sample_config):
+        with patch("ui.worker.get_password", return_value="test_pass"):
+            with patch("ui.worker.get_event_bus"):
+                assert type(create_worker(mock_tray, "thread")) is AutoLoginWorker
+                assert isinstance(create_worker(mock_tray, "asyncio"), AsyncAutoLoginWorker)
+                assert type(create_worker(mock_tray, "bogus")) is AutoLoginWorker
+
+
+def test_worker_refresh_skips_keyring_when_unchanged(worker, sample_config):
+    """Config reloads only go to the keyring when the username or stored password changed"""
+    with patch("ui.worker.load_config", return_value=sample_config), \
+            patch("ui.worker.get_password", return_value="test_pass") as get_pw:
+        worker._refresh_config_if_needed()  # no change announced
+        worker._on_config_changed(sample_config, 2)
+        worker._refresh_config_if_needed()
+        assert get_pw.call_count == 0
+
+        worker._config_store.credentials_changed()
+        worker._refresh_config_if_needed()
+        assert get_pw.call_count == 1
+
+    other = dict(sample_config, username="someone_else")
+    with patch("ui.worker.load_config", return_value=other), \
+            patch("ui.worker.get_password", return_value="pw2") as get_pw:
+        worker._on_config_changed(other, 3)
+        worker._refresh_config_if_needed()
+        assert get_pw.call_count == 1
+        assert worker.username == "someone_else" and worker.password == "pw2"
+
+
+def test_worker_state_is_plain_data(worker):
+    """state() reports the reconnect state without touching the network"""
+    worker.last_online_state = "captive"
+    worker.fail_count = 2
+    worker.cooldown_until = time.time() + 30
+    state = worker.state()
+    assert state["engine"] == "thread" and state["state"] == "captive"
+    assert state["fail_count"] == 2
+    assert 29 <= state["cooldown_s"] <= 30
+    assert state["last_post_age_s"] is None
+
+
+@patch("ui.worker.invalidate_network_caches")
+def test_worker_login_now_clears_backoff(mock_invalidate, worker):
+    """login_now() drops backoff and cooldown and wakes the loop"""
+    worker.backoff_s = 8.0
+    worker.cooldown_until = time.time() + 60
+    worker.login_now()
+    assert worker.backoff_s is None and worker.cooldown_until == 0.0
+    assert worker.wake_event.is_set()
+
+
+def test_worker_running_as_soon_as_started(worker):
+    """running is set by start(), before the thread reaches run()"""
+    import threading
+    release = threading.Event()
+    seen = []
+    with patch.object(AutoLoginWorker, "run", lambda self: release.wait(2)):
+        worker.start()
+        seen.append(worker.running)
+        release.set()
+        worker.join(2)
+    assert seen == [True]
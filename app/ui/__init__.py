@@ -1,4 +1,10 @@
 # ui/__init__.py
-from .tray import run_app
-
 __all__ = ["run_app"]
+
+
+def __getattr__(name):
+    # Lazy so that importing ui.worker or ui.status does not pull in Tk, pystray and PIL.
+    if name == "run_app":
+        from .tray import run_app
+        return run_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
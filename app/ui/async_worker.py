@@ -0,0 +1,152 @@
+# ui/async_worker.py
+import asyncio
+import concurrent.futures
+import functools
+import logging
+
+import metrics
+from config import get_password
+from net import invalidate_snapshot, login_with_diagnostics, network_snapshot, settle_until_online
+from reconnect import LOGIN
+from .worker import AutoLoginWorker
+
+log = logging.getLogger("mdi.ui")
+
+
+class AsyncAutoLoginWorker(AutoLoginWorker):
+    """
+    Same reconnect policy as AutoLoginWorker, driven by an asyncio loop on the
+    worker thread. Blocking probes, the login POST and settling run in executor threads
+    under asyncio timeouts; waits are a single asyncio.Event wait instead of
+    0.2–5 s polling slices, so network events and stop() take effect at once.
+    """
+
+    engine = "asyncio"
+
+    def __init__(self, tray_ref):
+        super().__init__(tray_ref)
+        self._loop = None
+        self._wake = None
+        self._main_task = None
+
+    # ---- thread entry ----
+    def _run_loop(self, coro):
+        """
+        Like asyncio.run, but abandoned blocking calls (a probe stuck in its
+        socket timeout) do not hold up shutdown.
+        """
+        loop = asyncio.new_event_loop()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="autologin-io")
+        loop.set_default_executor(executor)
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            loop.close()
+
+    def run(self):
+        try:
+            self._run_loop(self._main())
+        except Exception as e:
+            log.info("⚠️ Async worker stopped unexpectedly: %s", e)
+        finally:
+            self.running = False
+            self._detach()
+            self.tray_ref.update_tooltip(False)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._main_task = asyncio.current_task()
+        self.tray_ref.update_tooltip(True)
+        self.running = True
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    with metrics.timer("worker.iteration"):
+                        delay = await self._iteration()
+                except asyncio.TimeoutError:
+                    log.info("⚠️ Worker step timed out.")
+                    delay = None
+                except Exception as e:
+                    log.info("⚠️ Worker loop error: %s", e)
+                    delay = None
+                metrics.maybe_log_summary(self.cfg)
+                await self._sleep(self.reconnect.idle_delay() if delay is None else delay)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.running = False
+
+    # ---- helpers ----
+    async def _call(self, fn, *args, timeout: float):
+        """Run a blocking net/config call off the loop with a hard deadline."""
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(loop.run_in_executor(None, functools.partial(fn, *args)), timeout)
+
+    def _step_timeout(self, cfg) -> float:
+        return float(cfg.get("probe_timeout_s", 3)) + 2.0
+
+    async def _sleep(self, seconds: float):
+        """Sleep until the deadline or a network event, whichever comes first."""
+        if seconds <= 0 or self.stop_event.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._wake.wait(), seconds)
+        except asyncio.TimeoutError:
+            return
+        self._wake.clear()
+
+    async def _iteration(self):
+        """One pass of the reconnect policy. Returns the delay before the next pass (None = default)."""
+        self._refresh_config_if_needed()
+        cfg = self.cfg
+        step_timeout = self._step_timeout(cfg)
+
+        snap = await self._call(network_snapshot, cfg, timeout=step_timeout)
+        if self._needs_password(snap):
+            self.password = await self._call(get_password, self.username, timeout=step_timeout)
+        d = self._decide(cfg, snap)
+        if d.kind != LOGIN:
+            return d.delay
+
+        self.sessions.post_sent()
+        diag = await self._call(
+            login_with_diagnostics, cfg, self.username, self.password,
+            timeout=float(cfg.get("post_timeout", 8)) + 2.0,
+        )
+        self.sessions.post_response(diag.get("reason_code", "unknown"))
+        await asyncio.sleep(float(cfg.get("post_probe_delay_s", 1.5)))
+        settle_max = float(cfg["settle_max"])
+        settled = await self._call(
+            settle_until_online, settle_max, float(cfg["settle_step"]),
+            timeout=settle_max + step_timeout,
+        )
+        invalidate_snapshot()
+        return self._login_finished(settled, diag).delay
+
+    # ---- cross-thread signals ----
+    def _wake_loop(self):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            pass
+
+    def _on_network_event(self, reason: str):
+        super()._on_network_event(reason)
+        self._wake_loop()
+
+    def stop(self):
+        super().stop()
+        # Wake first: a cancel that races with a finishing step can be swallowed by wait_for.
+        self._wake_loop()
+        loop, task = self._loop, self._main_task
+        if loop is None or task is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            pass
@@ -0,0 +1,80 @@
+# ui/control_api.py
+"""
+Scripting commands served on the control channel (see ipc.py).
+
+Everything here reads state the app already has: the worker's reconnect state,
+the shared network snapshot and the session timeline. Nothing probes the portal,
+so status bars can poll "status" as often as they like.
+
+    status     worker state, cached network snapshot, recent reconnects
+    login-now  skip backoff/cooldown and check the portal now
+    start      start auto-login
+    stop       stop auto-login
+    metrics    counters, latency histograms and module stats (see metrics.py)
+"""
+import logging
+import threading
+from typing import Dict, Optional
+
+import metrics
+from config import DEFAULT_SSID, load_config
+from ipc import Handler
+from net import NetworkSnapshot, cached_snapshot
+from .sessions import get_session_tracker
+
+log = logging.getLogger("mdi.ui")
+
+STATUS_SESSIONS = 5
+
+
+def _snapshot_dict(snap: Optional[NetworkSnapshot]) -> Optional[dict]:
+    if snap is None:
+        return None
+    return {
+        "online": snap.online,
+        "captive": snap.captive,
+        "on_target": snap.on_target,
+        "redirect_url": snap.redirect_url,
+        "age_s": round(snap.age(), 1),
+    }
+
+
+def build_handlers(app) -> Dict[str, Handler]:
+    """
+    Commands for an app object with .worker, start_worker(), stop_worker() and
+    manual_login(), i.e. TrayApp.
+    """
+
+    def _running() -> bool:
+        return bool(app.worker and app.worker.running)
+
+    def status(_req):
+        cfg = load_config()
+        return {
+            "running": _running(),
+            "worker": app.worker.state() if app.worker else None,
+            "network": _snapshot_dict(cached_snapshot()),
+            "ssid": cfg.get("ssid", DEFAULT_SSID),
+            "username": cfg.get("username", ""),
+            "sessions": get_session_tracker().timeline()[:STATUS_SESSIONS],
+        }
+
+    def login_now(_req):
+        if _running():
+            app.worker.login_now()
+            return {"via": "worker"}
+        threading.Thread(target=app.manual_login, name="mdi-manual-login", daemon=True).start()
+        return {"via": "manual"}
+
+    def start(_req):
+        app.start_worker()
+        return {"running": _running()}
+
+    def stop(_req):
+        app.stop_worker()
+        return {"running": _running()}
+
+    def metrics_snapshot(_req):
+        return metrics.snapshot()
+
+    return {"status": status, "login-now": login_now, "start": start, "stop": stop, "metrics": metrics_snapshot}
@@ -5,13 +5,11 @@ from tkinter import ttk
 from .settings_window import SettingsWindow
 
 from config import (
-    APP_NAME, APP_VERSION, DEVELOPER_NAME, DEFAULT_SSID, LOG_PATH, CONFIG_PATH, SERVICE_NAME,
-    load_config, save_config, get_password, set_password,
-)
-from net import (
-    connected_to_target, online_now, portal_intercept_present,
-    settle_until_online, login_with_diagnostics, target_network_available
+    APP_NAME, APP_VERSION, DEVELOPER_NAME, DEFAULT_SSID, ENGINES, LOG_PATH, CONFIG_PATH, SERVICE_NAME,
+    get_config_store, load_config, save_config, get_password, set_password,
 )
+from net import network_snapshot, invalidate_snapshot, settle_until_online, login_with_diagnostics
+from .status import LOG_TAIL_LINES, PanelStatus, StatusSampler
 from .theme import apply_theme, ui_bg
 from .messages import msg_info, msg_error, ask_yes_no
 
@@ -88,8 +86,8 @@ class ControlPanel:
         self.tray_app = tray_app
         self.root = tk.Toplevel(parent_root)
         self.root.title(f"{APP_NAME} v{APP_VERSION} — Control Panel")
-        self.root.geometry("820x500")
-        self.root.minsize(700, 420)
+        self.root.geometry("820x580")
+        self.root.minsize(700, 500)
 
         self.cfg = load_config()
         apply_theme(self.root, self.cfg.get("dark_mode", False))
@@ -150,6 +148,11 @@ class ControlPanel:
         self.btn_toggle.pack(side="left", padx=(0,8))
         ttk.Button(row, text="Manual login now", command=self._manual_login).pack(side="left", padx=(0,8))
         ttk.Button(row, text="Settings…", command=self._open_settings).pack(side="left", padx=(0,8))
+        ttk.Label(row, text="Engine:").pack(side="left", padx=(4,4))
+        self.engine_var = tk.StringVar(value=self.cfg.get("engine", "thread"))
+        self.cmb_engine = ttk.Combobox(row, textvariable=self.engine_var, values=ENGINES, state="readonly", width=8)
+        self.cmb_engine.pack(side="left", padx=(0,8))
+        self.cmb_engine.bind("<<ComboboxSelected>>", self._on_engine_selected)
 
         util = ttk.Frame(row)
         util.pack(side="right")
@@ -164,12 +167,22 @@ class ControlPanel:
         self.reset_button.pack(side="right", padx=(0, 10))
         self.reset_button["menu"] = self.reset_menu
 
+        # Recent reconnects: when each phase was reached, relative to the trigger.
+        timeline = ttk.Frame(self.root, padding=(12,0,12,0)); timeline.pack(fill="x")
+        ttk.Label(timeline, text="Reconnects (newest first):").pack(side="top", anchor="w")
+        self.lst_sessions = tk.Listbox(timeline, height=4, font=("Consolas", 9), activestyle="none",
+                                       borderwidth=1, relief="solid")
+        self.lst_sessions.pack(side="top", fill="x")
+        self._sessions_shown = None
+
         mid = ttk.Frame(self.root, padding=(12,4,12,12)); mid.pack(fill="both", expand=True)
         self.txt = tk.Text(mid, wrap="none", undo=False, font=("Consolas", 10), borderwidth=1, relief="solid")
         if self.cfg.get("dark_mode", False):
             self.txt.configure(bg="#0f0f0f", fg="#eaeaea", insertbackground="#eaeaea")
+            self.lst_sessions.configure(bg="#0f0f0f", fg="#eaeaea")
         else:
             self.txt.configure(bg="white", fg="#111111", insertbackground="black")
+            self.lst_sessions.configure(bg="white", fg="#111111")
         self.scroll_y = ttk.Scrollbar(mid, orient="vertical", command=self.txt.yview)
         self.txt.configure(yscrollcommand=self.scroll_y.set)
         self.txt.pack(side="left", fill="both", expand=True)
@@ -187,13 +200,16 @@ class ControlPanel:
         )
         footer_label.pack(side="left", anchor="w")
 
-        self._refresh_status()
-        self._refresh_log()
-        self._log_timer = None
-        self._schedule_log_refresh()
+        self._log_has_text = False
+        self._set_badge(self.lbl_state, "Checking…", "#999999")
+        self._sampler = StatusSampler(self.root, get_config_store().get, self._worker_running, self._apply_status)
+        self._sampler.start()
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
     # ---- helpers / UI reactions ----
+    def _worker_running(self) -> bool:
+        return self.tray_app.worker is not None and self.tray_app.worker.running
+
     def _status_text(self):
         running = self.tray_app.worker is not None and self.tray_app.worker.running
         return f"SSID: {self.cfg.get('ssid', DEFAULT_SSID)}   |   Username: {self.cfg.get('username','') or '(not set)'}   |   Auto-login: {'Running' if running else 'Stopped'}"
@@ -236,17 +252,19 @@ class ControlPanel:
         if not user or not pwd:
             msg_info(APP_NAME, "Set username/password in Settings first.")
             return
-        if online_now():
+        snap = network_snapshot(cfg)
+        if snap.online:
             self._set_status_color("#28a745")
             msg_info(APP_NAME, "Already online.")
             return
-        if not target_network_available(cfg):
+        if not snap.on_target:
             self._set_status_color("#FFA000")
             msg_info(APP_NAME, f"Not on {cfg['ssid']} yet.")
             return
         diag = login_with_diagnostics(cfg, user, pwd)
         time.sleep(float(cfg.get("post_probe_delay_s", 1.5)))
         settled = settle_until_online(cfg["settle_max"], cfg["settle_step"])
+        invalidate_snapshot()
         if settled or diag.get("ok"):
             self._set_status_color("#28a745" if settled else "#FFA000")
             msg_info(APP_NAME, "Login successful." + (" Online." if settled else " Waiting for portal…"))
@@ -264,14 +282,21 @@ class ControlPanel:
                 msg_info(APP_NAME, f"Login not finalized: {text}")
         self._refresh_log()
 
+    def _on_engine_selected(self, _event=None):
+        self.tray_app.set_engine(self.engine_var.get())
+        self.cfg = load_config()
+        self._refresh_status()
+
     def _open_settings(self):
         SettingsWindow(self.root, first_run=False)
         self.cfg = load_config()
         self._refresh_status()
         if self.cfg.get("dark_mode", False):
             self.txt.configure(bg="#0f0f0f", fg="#eaeaea", insertbackground="#eaeaea")
+            self.lst_sessions.configure(bg="#0f0f0f", fg="#eaeaea")
         else:
             self.txt.configure(bg="white", fg="#111111", insertbackground="black")
+            self.lst_sessions.configure(bg="white", fg="#111111")
         self.dark_switch.set(self.cfg.get("dark_mode", False))
 
     def _open_log(self):
@@ -287,35 +312,46 @@ class ControlPanel:
 
         if self.cfg["dark_mode"]:
             self.txt.configure(bg="#0f0f0f", fg="#eaeaea", insertbackground="#eaeaea")
+            self.lst_sessions.configure(bg="#0f0f0f", fg="#eaeaea")
         else:
             self.txt.configure(bg="white", fg="#111111", insertbackground="black")
+            self.lst_sessions.configure(bg="white", fg="#111111")
         self.dark_switch.set(self.cfg.get("dark_mode", False))
 
     def _quit_app(self):
         self.tray_app.stop_worker()
-        self._cancel_log_refresh()
+        self._sampler.stop()
         try: self.root.destroy()
         except Exception: pass
         try: self.tray_app.icon.stop()
         except Exception: pass
 
     def _refresh_status(self):
-        online = online_now()
-        captive = portal_intercept_present() or connected_to_target(self.cfg)
+        # Network I/O happens on the sampler thread; just ask it for a fresh sample.
+        self._sampler.poke()
+        try:
+            self.btn_toggle.config(text=self._toggle_text())
+        except Exception:
+            pass
 
-        if online:
+    def _refresh_log(self):
+        self._sampler.poke()
+
+    def _apply_status(self, status: PanelStatus):
+        if not self.root.winfo_exists():
+            return
+        if status.online:
             color = "#28a745"; state = "Online"
-        elif captive:
+        elif status.captive:
             color = "#FFA000"; state = "Captive portal"
         else:
             color = "#999999"; state = "Not connected"
 
         # Badges
-        ssid = self.cfg.get('ssid', DEFAULT_SSID)
-        user_txt = self.cfg.get('username','') or "(not set)"
-        running = self.tray_app.worker is not None and self.tray_app.worker.running
+        user_txt = status.username or "(not set)"
+        running = status.running
 
-        self._set_badge(self.lbl_net,   f"SSID: {ssid}", "#3b82f6" if (captive or online) else "#999999")
+        self._set_badge(self.lbl_net,   f"SSID: {status.ssid}", "#3b82f6" if (status.captive or status.online) else "#999999")
         self._set_badge(self.lbl_user,  f"User: {user_txt}", "#e0e0e0")
         self._set_badge(self.lbl_auto,  f"Auto-login: {'Running' if running else 'Stopped'}", "#10b981" if running else "#9e9e9e")
         self._set_badge(self.lbl_state, f"{state}", color)
@@ -325,37 +361,35 @@ class ControlPanel:
         except Exception:
             pass
 
-    def _refresh_log(self):
-        try:
-            txt = LOG_PATH.read_text(encoding="utf-8", errors="ignore")
-        except Exception:
-            txt = "(log not available yet)"
-        lines = txt.splitlines()
-        txt = "\n".join(lines[-400:])
-        self.txt.delete("1.0", "end")
-        self.txt.insert("1.0", txt)
-        self.txt.see("end")
-
-    def _schedule_log_refresh(self):
-        self._log_timer = self.root.after(2000, self._on_log_tick)
-
-    def _on_log_tick(self):
-        try:
-            self._refresh_log()
-            self._refresh_status()
-        finally:
-            if self.root.winfo_exists():
-                self._schedule_log_refresh()
+        self._show_sessions(status.sessions)
+        self._append_log(status.log_reset, status.log_lines)
 
-    def _cancel_log_refresh(self):
-        try:
-            if self._log_timer:
-                self.root.after_cancel(self._log_timer)
-        except Exception:
-            pass
+    def _show_sessions(self, sessions):
+        if sessions == self._sessions_shown:
+            return
+        self._sessions_shown = sessions
+        self.lst_sessions.delete(0, "end")
+        if not sessions:
+            self.lst_sessions.insert("end", "No reconnects recorded yet.")
+        for line in sessions:
+            self.lst_sessions.insert("end", line)
+
+    def _append_log(self, reset: bool, lines):
+        if reset:
+            self.txt.delete("1.0", "end")
+            self._log_has_text = False
+        if not lines:
+            return
+        self.txt.insert("end", ("\n" if self._log_has_text else "") + "\n".join(lines))
+        self._log_has_text = True
+        # Keep the widget bounded no matter how long the panel stays open.
+        total = int(self.txt.index("end-1c").split(".")[0])
+        if total > LOG_TAIL_LINES:
+            self.txt.delete("1.0", f"{total - LOG_TAIL_LINES + 1}.0")
+        self.txt.see("end")
 
     def _on_close(self):
-        self._cancel_log_refresh()
+        self._sampler.stop()
         try: self.root.destroy()
         except Exception: pass
         
\ No newline at end of file
@@ -0,0 +1,77 @@
+# ui/log_tail.py
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# How far back the first read looks; enough for a few hundred log lines.
+INITIAL_TAIL_BYTES = 64 * 1024
+
+
+class LogTailer:
+    """
+    Follows a log file by byte offset, returning only lines appended since the
+    previous call. Rotation by RotatingFileHandler (new inode) or truncation
+    (file shrank, e.g. "Reset log") restarts reading from the top of the new file.
+    """
+
+    def __init__(self, path: Path, max_lines: int = 400, initial_bytes: int = INITIAL_TAIL_BYTES):
+        self.path = Path(path)
+        self.max_lines = max_lines
+        self.initial_bytes = initial_bytes
+        self._offset: Optional[int] = None
+        self._inode: Optional[int] = None
+        self._partial = b""
+
+    def _reset(self):
+        self._offset = None
+        self._inode = None
+        self._partial = b""
+
+    def read_new(self) -> Tuple[bool, List[str]]:
+        """
+        Returns (reset, lines). When reset is True the caller should clear what
+        it already shows before appending lines. At most max_lines are returned.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            was_open = self._offset is not None
+            self._reset()
+            return was_open, []
+
+        reset = False
+        start = self._offset
+        if start is not None and (st.st_ino != self._inode or st.st_size < start):
+            # Rotated or truncated underneath us.
+            self._partial = b""
+            start = 0
+            reset = True
+        skip_first = False
+        if start is None:
+            reset = True
+            start = max(0, st.st_size - self.initial_bytes)
+            skip_first = start > 0  # first line is most likely cut in half
+
+        if st.st_size == start:
+            self._offset, self._inode = start, st.st_ino
+            return reset, []
+
+        try:
+            with open(self.path, "rb") as fh:
+                fh.seek(start)
+                data = fh.read(st.st_size - start)
+        except OSError:
+            return reset, []
+
+        self._offset = start + len(data)
+        self._inode = st.st_ino
+        buf = self._partial + data
+        cut = buf.rfind(b"\n")
+        if cut < 0:
+            self._partial = buf
+            return reset, []
+        self._partial = buf[cut + 1:]
+        lines = buf[:cut].decode("utf-8", errors="ignore").splitlines()
+        if skip_first and lines:
+            lines = lines[1:]
+        return reset, lines[-self.max_lines:]
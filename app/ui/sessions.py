@@ -0,0 +1,162 @@
+# ui/sessions.py
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Reconnect phases, in the order they normally happen.
+EVENT = "event"  # network event received (Wi-Fi joined, address changed, ...)
+CAPTIVE = "captive"  # probe saw the portal
+POST_SENT = "post_sent"
+POST_RESPONSE = "post_response"
+ONLINE = "online"  # settled online
+PHASES = (EVENT, CAPTIVE, POST_SENT, POST_RESPONSE, ONLINE)
+_PHASE_LABELS = {EVENT: "event", CAPTIVE: "captive", POST_SENT: "POST", POST_RESPONSE: "reply", ONLINE: "online"}
+
+SESSION_HISTORY = 20
+SESSION_MAX_MARKS = 12  # first 11 marks and the latest; a long captive period repeats POST/reply
+
+
+@dataclass
+class ReconnectSession:
+    """One trip from "something changed" to online. Timestamps are time.monotonic()."""
+
+    started: float
+    wall_started: float  # time.time() at start, for display only
+    trigger: str
+    marks: List[Tuple[str, float]] = field(default_factory=list)
+    attempts: int = 0
+    last_reason: str = ""
+    outcome: Optional[str] = None  # "online" once finished
+    skipped_marks: int = 0  # marks dropped from the middle to stay within SESSION_MAX_MARKS
+    _durations: Dict[str, float] = field(default_factory=dict, repr=False)
+
+    def mark(self, phase: str, t: float):
+        prev = self.marks[-1][1] if self.marks else self.started
+        self._durations[phase] = self._durations.get(phase, 0.0) + (t - prev) * 1000
+        if len(self.marks) < SESSION_MAX_MARKS:
+            self.marks.append((phase, t))
+        else:
+            self.marks[-1] = (phase, t)
+            self.skipped_marks += 1
+
+    def has(self, phase: str) -> bool:
+        return any(p == phase for p, _ in self.marks)
+
+    def phase_offsets_ms(self) -> List[Tuple[str, float]]:
+        return [(p, (t - self.started) * 1000) for p, t in self.marks]
+
+    def total_ms(self) -> Optional[float]:
+        return self.phase_offsets_ms()[-1][1] if self.outcome and self.marks else None
+
+    def durations_ms(self) -> Dict[str, float]:
+        """Time spent reaching each phase from the previous one (repeat attempts add up)."""
+        return dict(self._durations)
+
+
+def format_session(s: ReconnectSession) -> str:
+    """One timeline line, e.g. "12:03:05 wifi  event +0ms → captive +120ms → … online +1.8s"."""
+    steps = [f"{_PHASE_LABELS.get(p, p)} +{_fmt_ms(ms)}" for p, ms in s.phase_offsets_ms()]
+    if s.skipped_marks:
+        steps.insert(len(steps) - 1, f"… ({s.skipped_marks} more)")
+    steps = " → ".join(steps)
+    when = datetime.fromtimestamp(s.wall_started).strftime("%H:%M:%S")
+    extra = f"  ({s.attempts} attempts, last: {s.last_reason})" if s.attempts > 1 else ""
+    return f"{when} {s.trigger:<8} {steps}{extra}"
+
+
+def _fmt_ms(ms: float) -> str:
+    return f"{ms:.0f}ms" if ms < 1000 else f"{ms / 1000:.1f}s"
+
+
+class SessionTracker:
+    """
+    Records reconnects as sessions with per-phase timestamps. Finished sessions
+    go to a bounded ring buffer. Fed by the worker, read by the control panel.
+    Sessions that never saw the portal are dropped: nothing needed fixing.
+    """
+
+    def __init__(self, maxlen: int = SESSION_HISTORY, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._history: deque = deque(maxlen=maxlen)
+        self._current: Optional[ReconnectSession] = None
+
+    def _session(self, trigger: str) -> ReconnectSession:
+        if self._current is None:
+            self._current = ReconnectSession(self.clock(), time.time(), trigger)
+        return self._current
+
+    def network_event(self, reason: str):
+        with self._lock:
+            if self._current is not None and not self._current.has(CAPTIVE):
+                self._current = None  # earlier event led nowhere; time from this one
+            s = self._session(reason)
+            s.mark(EVENT, self.clock())
+
+    def captive(self):
+        with self._lock:
+            s = self._session("poll")
+            if not s.has(CAPTIVE):
+                s.mark(CAPTIVE, self.clock())
+
+    def post_sent(self):
+        with self._lock:
+            s = self._session("poll")
+            s.attempts += 1
+            s.mark(POST_SENT, self.clock())
+
+    def post_response(self, reason_code: str):
+        with self._lock:
+            s = self._session("poll")
+            s.last_reason = reason_code
+            s.mark(POST_RESPONSE, self.clock())
+
+    def online(self):
+        """Close the open session. Kept only if the portal was involved."""
+        with self._lock:
+            s, self._current = self._current, None
+            if s is None or not s.has(CAPTIVE):
+                return
+            s.mark(ONLINE, self.clock())
+            s.outcome = ONLINE
+            self._history.append(s)
+
+    def current(self) -> Optional[ReconnectSession]:
+        with self._lock:
+            return self._current
+
+    def history(self) -> List[ReconnectSession]:
+        with self._lock:
+            return list(self._history)
+
+    def timeline(self) -> List[str]:
+        """Newest first, including the reconnect still in progress."""
+        with self._lock:
+            sessions = list(self._history)
+            current = self._current
+        lines = [format_session(s) for s in reversed(sessions)]
+        if current is not None and current.has(CAPTIVE):
+            lines.insert(0, format_session(current) + "  …")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._history.clear()
+            self._current = None
+
+
+_tracker: Optional[SessionTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_session_tracker() -> SessionTracker:
+    """Process-wide tracker, so history survives worker restarts."""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = SessionTracker()
+    return _tracker
@@ -0,0 +1,101 @@
+# ui/status.py
+import logging
+import threading
+import tkinter as tk
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from config import DEFAULT_SSID, LOG_PATH
+from net import network_snapshot
+from .log_tail import LogTailer
+from .sessions import SessionTracker, get_session_tracker
+
+log = logging.getLogger("mdi.ui")
+
+LOG_TAIL_LINES = 400
+
+
+@dataclass(frozen=True)
+class PanelStatus:
+    """Everything the control panel paints on one tick. Built off the Tk thread."""
+
+    online: bool
+    captive: bool
+    ssid: str
+    username: str
+    running: bool
+    log_reset: bool  # clear the log view before appending log_lines
+    log_lines: Tuple[str, ...]
+    sessions: Tuple[str, ...] = ()  # reconnect timeline, newest first
+
+
+def sample_panel_status(
+    cfg, running: bool, tailer: LogTailer, sessions: Optional[SessionTracker] = None
+) -> PanelStatus:
+    snap = network_snapshot(cfg)
+    reset, lines = tailer.read_new()
+    return PanelStatus(
+        online=snap.online,
+        captive=snap.captive or snap.on_target,
+        ssid=cfg.get("ssid", DEFAULT_SSID),
+        username=cfg.get("username", ""),
+        running=running,
+        log_reset=reset,
+        log_lines=tuple(lines),
+        sessions=tuple(sessions.timeline()) if sessions else (),
+    )
+
+
+class StatusSampler(threading.Thread):
+    """
+    Samples network state and the log on a background thread and hands each
+    PanelStatus to `deliver` on the Tk thread via root.after, so the panel
+    never waits on probes or subprocesses.
+    """
+
+    def __init__(
+        self,
+        tk_root,
+        get_cfg: Callable[[], dict],
+        is_running: Callable[[], bool],
+        deliver: Callable[[PanelStatus], None],
+        interval: float = 2.0,
+    ):
+        super().__init__(name="panel-status", daemon=True)
+        self.tk_root = tk_root
+        self.get_cfg = get_cfg
+        self.is_running = is_running
+        self.deliver = deliver
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.last_status: Optional[PanelStatus] = None
+        self.tailer = LogTailer(LOG_PATH, max_lines=LOG_TAIL_LINES)
+        self.sessions = get_session_tracker()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                status = sample_panel_status(self.get_cfg(), self.is_running(), self.tailer, self.sessions)
+                self.last_status = status
+                self.tk_root.after(0, self._deliver, status)
+            except (RuntimeError, tk.TclError):
+                # Tk main loop is gone; nothing left to paint.
+                break
+            except Exception as e:
+                log.debug("Status sampling failed: %s", e)
+            if self.wake_event.wait(self.interval):
+                self.wake_event.clear()
+
+    def _deliver(self, status: PanelStatus):
+        if self.stop_event.is_set():
+            return
+        self.deliver(status)
+
+    def poke(self):
+        """Sample again right away (e.g. after start/stop or a manual login)."""
+        self.wake_event.set()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
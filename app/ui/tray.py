@@ -4,18 +4,10 @@ import tkinter as tk
 from PIL import Image, ImageDraw
 import pystray
 
-from config import APP_NAME, LOG_PATH, CONFIG_PATH, SERVICE_NAME, load_config, get_password
-from net import (
-    target_network_available,
-    settle_until_online,
-    login_with_diagnostics,
-    online_now,
-)
-from .controls import ControlPanel
-from .settings_window import SettingsWindow
+from config import APP_NAME, ENGINES, LOG_PATH, delete_config, delete_password, load_config, get_password
 from .messages import ask_yes_no, msg_info, msg_error
-from .worker import AutoLoginWorker
-import keyring
+# net (requests/urllib3), the worker, the control panel and the settings window
+# are imported where they are first needed, so the tray icon comes up sooner.
 
 log = logging.getLogger("mdi.ui")
 
@@ -25,6 +17,7 @@ class TrayApp:
         self.panel = None
         self.icon = pystray.Icon("mdi_tray")
         self.worker = None
+        self.control = None
         self.icon.icon = self._build_icon()
         self.icon.title = APP_NAME
         self.update_tooltip(False)
@@ -33,6 +26,15 @@ class TrayApp:
             pystray.MenuItem("Start auto-login", self.start_worker),
             pystray.MenuItem("Stop auto-login", self.stop_worker),
             pystray.MenuItem("Manual login now", self.manual_login),
+            pystray.MenuItem("Engine", pystray.Menu(*[
+                pystray.MenuItem(
+                    name.capitalize(),
+                    self._engine_action(name),
+                    checked=self._engine_checked(name),
+                    radio=True,
+                )
+                for name in ENGINES
+            ])),
             pystray.MenuItem("Settings…", self.open_settings),
             pystray.MenuItem("Open log", self.open_log),
             pystray.MenuItem("Reset log", lambda _: self.reset_log_file()),
@@ -64,17 +66,56 @@ class TrayApp:
                 except Exception:
                     pass
                 return
+            from .controls import ControlPanel
             self.panel = ControlPanel(self.tk_root, self)
         self.tk_root.after(0, _show_panel)
 
     def start_worker(self, _=None):
-        if self.worker and self.worker.running:
+        if self.worker and self.worker.is_alive():
             return
-        self.worker = AutoLoginWorker(self)
+        engine = load_config().get("engine", "thread")
+        from .worker import create_worker
+        self.worker = create_worker(self, engine)
         self.worker.start()
-        log.info("▶️ Auto-login started.")
+        log.info("▶️ Auto-login started (%s engine).", engine)
         self.update_tooltip(True)
 
+    def set_engine(self, engine: str):
+        """Persist the worker engine and restart auto-login on it if it was running."""
+        if engine not in ENGINES:
+            return
+        from config import save_config
+        cfg = load_config()
+        if cfg.get("engine", "thread") == engine:
+            return
+        cfg["engine"] = engine
+        save_config(cfg)
+        log.info("🔧 Worker engine set to %s.", engine)
+        if self.worker and self.worker.running:
+            # Joining the old worker can take a whole login attempt; keep it off the Tk thread.
+            threading.Thread(target=self._restart_worker, name="mdi-engine-swap", daemon=True).start()
+
+    def _restart_worker(self):
+        """Stop the current worker, wait until it has exited, then start one on the configured engine."""
+        old = self.worker
+        if old is None:
+            return
+        old.stop()
+        while old.is_alive():
+            old.join(timeout=2.0)
+            if old.is_alive():
+                log.info("⏳ Waiting for the %s worker to finish before switching engines.", old.engine)
+        if self.worker is not old:
+            return  # stopped or restarted from the menu meanwhile
+        self.worker = None
+        self.start_worker()
+
+    def _engine_action(self, engine: str):
+        return lambda _icon=None, _item=None: self.set_engine(engine)
+
+    def _engine_checked(self, engine: str):
+        return lambda _item: load_config().get("engine", "thread") == engine
+
     def stop_worker(self, _=None):
         if self.worker:
             self.worker.stop()
@@ -84,21 +125,24 @@ class TrayApp:
         self.update_tooltip(False)
 
     def manual_login(self, _=None):
+        from net import invalidate_snapshot, login_with_diagnostics, network_snapshot, settle_until_online
         cfg = load_config()
         user = cfg.get("username",""); pwd = get_password(user)
         if not user or not pwd:
             msg_info(APP_NAME, "Please set username/password in Settings first.")
             return
-        if online_now():
+        snap = network_snapshot(cfg)
+        if snap.online:
             msg_info(APP_NAME, "Already online.")
             return
-        if not target_network_available(cfg):
+        if not snap.on_target:
             msg_info(APP_NAME, f"Not on {cfg['ssid']} yet.")
             return
 
         diag = login_with_diagnostics(cfg, user, pwd)
         time.sleep(float(cfg.get("post_probe_delay_s", 1.5)))
         settled = settle_until_online(cfg["settle_max"], cfg["settle_step"])
+        invalidate_snapshot()
         if settled or diag.get("ok"):
             msg_info(APP_NAME, "Login successful." + (" Online." if settled else " Waiting for portal…"))
             return
@@ -110,8 +154,27 @@ class TrayApp:
         else:
             msg_error(APP_NAME, f"Login failed: {text}")
 
+    def control_handlers(self):
+        """Commands served on the control channel (see ui.control_api)."""
+        from .control_api import build_handlers
+
+        def _show(_req):
+            self.open_control_panel()
+            return {}
+
+        def _login(_req):
+            threading.Thread(target=self.manual_login, name="mdi-manual-login", daemon=True).start()
+            return {}
+
+        return {**build_handlers(self), "show": _show, "login": _login}
+
+    def start_control_server(self):
+        from ipc import serve
+        self.control = serve(self.control_handlers())
+
     def open_settings(self, _=None):
         def _open():
+            from .settings_window import SettingsWindow
             SettingsWindow(self.tk_root, first_run=False)
         self.tk_root.after(0, _open)
 
@@ -137,22 +200,23 @@ class TrayApp:
             if not silent:
                 msg_error(APP_NAME, f"Could not clear log: {e}")
 
+    def _reset_config_and_credentials(self):
+        """Delete the config and the stored password, then write fresh defaults."""
+        # Read the username before the config is gone, or its password is never removed.
+        username = load_config().get("username", "")
+        try:
+            delete_config()
+        except Exception:
+            pass
+        delete_password(username)
+        from config import save_config  # import local to avoid confusion
+        save_config(load_config())
+
     def reset_settings(self):
         if not self._confirm(APP_NAME, "Reset settings to defaults? This will remove saved username and settings."):
             return
         try:
-            try:
-                if CONFIG_PATH.exists(): CONFIG_PATH.unlink()
-            except Exception:
-                pass
-            try:
-                cfg = load_config()
-                if cfg.get("username"):
-                    keyring.delete_password(SERVICE_NAME, cfg.get("username"))
-            except Exception:
-                pass
-            from config import save_config  # import local to avoid confusion
-            save_config(load_config())
+            self._reset_config_and_credentials()
             log.info("⚙️ Settings reset to defaults.")
             msg_info(APP_NAME, "Settings reset to defaults.")
         except Exception as e:
@@ -167,18 +231,7 @@ class TrayApp:
             # Reset log file
             self.reset_log_file(silent=True)
             # Reset config and credentials
-            try:
-                if CONFIG_PATH.exists(): CONFIG_PATH.unlink()
-            except Exception:
-                pass
-            try:
-                cfg = load_config()
-                if cfg.get("username"):
-                    keyring.delete_password(SERVICE_NAME, cfg.get("username"))
-            except Exception:
-                pass
-            from config import save_config
-            save_config(load_config())
+            self._reset_config_and_credentials()
             log.info("🔄 App reset performed.")
             msg_info(APP_NAME, "App reset complete. Restart the app to apply changes.")
         except Exception as e:
@@ -187,6 +240,9 @@ class TrayApp:
 
     def quit(self, _=None):
         self.stop_worker()
+        if self.control:
+            self.control.stop()
+            self.control = None
         try:
             self.icon.stop()
         except Exception:
@@ -201,6 +257,7 @@ class TrayApp:
         first = cfg.get("first_run", True) or not cfg.get("username")
 
         if first:
+            from .settings_window import SettingsWindow
             win = SettingsWindow(self.tk_root, first_run=True)
             self.tk_root.wait_window(win.root)
             # Re-read config because first run may have updated flags
@@ -221,6 +278,7 @@ class TrayApp:
         # Start tray icon thread
         t = threading.Thread(target=self.icon.run, daemon=True)
         t.start()
+        self.start_control_server()
 
         try:
             cfg = load_config()
@@ -241,3 +299,5 @@ def run_app():
         try: app.icon.stop()
         except Exception:
             pass
+        if app.control:
+            app.control.stop()
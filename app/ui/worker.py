@@ -1,24 +1,49 @@
 # ui/worker.py
 import logging
-import random
 import threading
 import time
 
-from config import CONFIG_PATH, get_password, load_config
+import metrics
+from config import get_config_store, get_password, load_config
 from net import (
-    connected_to_target,
+    apply_net_config,
+    invalidate_network_caches,
+    invalidate_snapshot,
     login_with_diagnostics,
-    online_now,
-    portal_intercept_present,
+    network_snapshot,
     settle_until_online,
-    target_network_available,  # new import
 )
 from net_events import get_event_bus
+from reconnect import (
+    COOLDOWN, EXHAUSTED, FATAL, LOGGED_IN, LOGIN, NO_CREDENTIALS,
+    Decision, ReconnectMachine, RetryPolicy,
+)
+from .sessions import get_session_tracker
 
 log = logging.getLogger("mdi.ui")
 
 
+def _machine_attr(name: str):
+    """Worker attribute kept on its ReconnectMachine."""
+    return property(
+        lambda self: getattr(self.reconnect, name),
+        lambda self, value: setattr(self.reconnect, name, value),
+    )
+
+
 class AutoLoginWorker(threading.Thread):
+    """
+    Runs the reconnect policy (reconnect.ReconnectMachine) against the real
+    network: probes, POSTs, settles and waits, then reports back to the machine.
+    """
+
+    engine = "thread"
+
+    fail_count = _machine_attr("fail_count")
+    backoff_s = _machine_attr("backoff_s")
+    cooldown_until = _machine_attr("cooldown_until")
+    last_post_ts = _machine_attr("last_post_ts")
+
     def __init__(self, tray_ref):
         super().__init__(daemon=True)
         self.tray_ref = tray_ref
@@ -27,35 +52,49 @@ class AutoLoginWorker(threading.Thread):
 
         self.running = False
         self.last_online_state = None
-        self.fail_count = 0
-        self.cooldown_until = 0.0
-        self.backoff_s = None
-        self.last_post_ts = 0.0
+        self.reconnect = ReconnectMachine()
         self._credentials_warned = False  # Only warn once about missing credentials
+        self.sessions = get_session_tracker()
 
         self.cfg = load_config()
-        self._cfg_mtime = self._config_mtime()
+        apply_net_config(self.cfg)
+        metrics.configure(self.cfg)
         self.username = self.cfg.get("username", "")
         self.password = get_password(self.username)
         self._net_bus = get_event_bus()
         self._unsubscribe = self._net_bus.subscribe(self._on_network_event)
+        # The store tells us about saves and external edits; no per-tick stat of config.json.
+        self._config_store = get_config_store()
+        self._cfg_dirty = False
+        self._credentials_version = self._config_store.credentials_version
+        self._unsubscribe_config = self._config_store.subscribe(self._on_config_changed)
 
-    def _config_mtime(self) -> float:
-        try:
-            return CONFIG_PATH.stat().st_mtime
-        except FileNotFoundError:
-            return 0.0
+    def _on_config_changed(self, _cfg, _version):
+        self._cfg_dirty = True
 
     def _refresh_config_if_needed(self):
-        mtime = self._config_mtime()
-        if mtime != self._cfg_mtime:
-            self.cfg = load_config()
-            self._cfg_mtime = mtime
-            self.username = self.cfg.get("username", "")
+        if not self._cfg_dirty:
+            return
+        self._cfg_dirty = False
+        self.cfg = load_config()
+        apply_net_config(self.cfg)
+        metrics.configure(self.cfg)
+        username = self.cfg.get("username", "")
+        creds_version = self._config_store.credentials_version
+        # Keyring round-trips only when the account or its stored password changed.
+        if username != self.username or creds_version != self._credentials_version or not self.password:
+            self.username = username
+            self._credentials_version = creds_version
             self.password = get_password(self.username)
-            # Reset warning flag if credentials are now available
-            if self.username and self.password:
-                self._credentials_warned = False
+        # Reset warning flag if credentials are now available
+        if self.username and self.password:
+            self._credentials_warned = False
+
+    def _detach(self):
+        if self._unsubscribe:
+            self._unsubscribe()
+        if self._unsubscribe_config:
+            self._unsubscribe_config()
 
     def _log_once_per_state(self, now_online: bool, captive: bool):
         state = "online" if now_online else ("captive" if captive else "offline")
@@ -69,28 +108,51 @@ class AutoLoginWorker(threading.Thread):
                 log.info("📶 Not connected to target network yet.")
 
     def _apply_backoff_and_cooldown(self, cfg, fatal=False):
-        retry_cfg = cfg.get("retry", {})
-        if fatal:
-            cooldown = float(retry_cfg.get("cooldown_on_fatal_s", 10))
-            self.cooldown_until = time.time() + cooldown
-            self.backoff_s = None
-            self.fail_count = 0
-            log.info("⏸️ Fatal portal response; pausing retries for %ss.", int(cooldown))
-            return
-
-        self.fail_count += 1
-        if self.backoff_s is None:
-            self.backoff_s = float(retry_cfg.get("backoff_initial_s", 2))
-        else:
-            self.backoff_s = min(self.backoff_s * 2, float(retry_cfg.get("backoff_max_s", 10)))
-
-        max_consec = int(retry_cfg.get("max_consecutive", 3))
-        if self.fail_count >= max_consec:
-            cd = float(retry_cfg.get("backoff_max_s", 10))
-            self.cooldown_until = time.time() + cd
-            self.fail_count = 0
-            self.backoff_s = None
-            log.info("🧊 Too many consecutive failures; cooling down for %ss.", int(cd))
+        self.reconnect.policy = RetryPolicy.from_config(cfg)
+        self._log_failure(self.reconnect.record_failure(fatal))
+
+    def _log_failure(self, d: Decision):
+        policy = self.reconnect.policy
+        if d.kind == FATAL:
+            log.info("⏸️ Fatal portal response; pausing retries for %ss.", int(policy.cooldown_on_fatal_s))
+        elif d.kind == EXHAUSTED:
+            log.info("🧊 Too many consecutive failures; cooling down for %ss.", int(policy.backoff_max_s))
+
+    def _needs_password(self, snap) -> bool:
+        """At the portal with no password loaded: worth asking the keyring again."""
+        return snap.captive and snap.on_target and not snap.online and not (self.username and self.password)
+
+    def _decide(self, cfg, snap) -> Decision:
+        """Ask the machine what to do about this probe, and log/record what it saw."""
+        self.reconnect.policy = RetryPolicy.from_config(cfg)
+        d = self.reconnect.decide(snap.online, snap.captive, snap.on_target, bool(self.username and self.password))
+        if d.kind == COOLDOWN:
+            self._log_once_per_state(snap.online, snap.captive)
+            return d
+        self._log_once_per_state(snap.online, snap.captive if snap.on_target else False)
+        if snap.online:
+            self.sessions.online()
+        if d.at_portal:
+            self.sessions.captive()
+        if d.kind == NO_CREDENTIALS:
+            # Only log once to avoid spam
+            if not self._credentials_warned:
+                log.warning("⚠️ No credentials configured. Please set username and password in Settings.")
+                self._credentials_warned = True
+        elif d.at_portal:
+            self._credentials_warned = False
+        return d
+
+    def _login_finished(self, settled: bool, diag: dict) -> Decision:
+        reason = diag.get("reason_code", "unknown")
+        d = self.reconnect.login_result(settled, reason)
+        if d.kind == LOGGED_IN:
+            self.sessions.online()
+            log.info("🌐 Online confirmed after login.")
+            return d
+        log.info("🚫 Login not established: %s (%s)", reason, diag.get("reason_text", "Unknown"))
+        self._log_failure(d)
+        return d
 
     def _wait_with_event(self, seconds: float):
         if seconds <= 0:
@@ -105,79 +167,82 @@ class AutoLoginWorker(threading.Thread):
 
     def _on_network_event(self, reason: str):
         log.debug("Network event: %s", reason)
-        self.backoff_s = None
-        self.cooldown_until = 0.0
+        self.sessions.network_event(reason)
+        invalidate_network_caches()
+        self.reconnect.network_event()
         self.wake_event.set()
 
+    def login_now(self):
+        """Drop backoff and cooldown and check the portal right away."""
+        self._on_network_event("control")
+
+    def state(self) -> dict:
+        """Plain-data view of the reconnect state, for the control channel."""
+        now = time.time()
+        return {
+            "engine": self.engine,
+            "running": self.running,
+            "state": self.last_online_state,  # "online", "captive", "offline" or None before the first check
+            "fail_count": self.fail_count,
+            "backoff_s": self.backoff_s,
+            "cooldown_s": round(max(0.0, self.cooldown_until - now), 1),
+            "last_post_age_s": round(now - self.last_post_ts, 1) if self.last_post_ts is not None else None,
+        }
+
+    def start(self):
+        # Count as running from here, so a start/status right after us sees it.
+        self.running = True
+        super().start()
+
     def run(self):
         self.tray_ref.update_tooltip(True)
         self.running = True
 
         while not self.stop_event.is_set():
+            delay = None
             try:
-                self._refresh_config_if_needed()
-                cfg = self.cfg
-                now = time.time()
-
-                if self.cooldown_until and now < self.cooldown_until:
-                    self._log_once_per_state(online_now(), portal_intercept_present())
-                    self._wait_with_event(3.0)
-                    continue
-
-                on = online_now()
-                capt = portal_intercept_present()
-                on_target = target_network_available(cfg)
-
-                self._log_once_per_state(on, capt if on_target else False)
-
-                if capt and on_target and not on:
-                    if not self.username or not self.password:
-                        self.password = get_password(self.username)
-                    if not self.username or not self.password:
-                        # Only log once to avoid spam
-                        if not self._credentials_warned:
-                            log.warning("⚠️ No credentials configured. Please set username and password in Settings.")
-                            self._credentials_warned = True
-                        # Don't attempt login without credentials
-                        self._wait_with_event(float(cfg.get("base_interval", 5)))
-                        continue
-                    else:
-                        # Reset warning flag if credentials are now available
-                        self._credentials_warned = False
-                        if time.time() - self.last_post_ts >= float(cfg.get("post_grace_s", 6)):
-                            self.last_post_ts = time.time()
-                            diag = login_with_diagnostics(cfg, self.username, self.password)
-                            self._wait_with_event(float(cfg.get("post_probe_delay_s", 1.5)))
-                            settled = settle_until_online(cfg["settle_max"], cfg["settle_step"])
-                            if settled:
-                                log.info("🌐 Online confirmed after login.")
-                                self.fail_count = 0
-                                self.backoff_s = None
-                                self.last_post_ts = time.time()
-                                continue
-
-                            reason = diag.get("reason_code", "unknown")
-                            text = diag.get("reason_text", "Unknown")
-                            log.info("🚫 Login not established: %s (%s)", reason, text)
-                            if reason in {"quota_exceeded", "too_many_devices", "account_expired", "bad_credentials"}:
-                                self._apply_backoff_and_cooldown(cfg, fatal=True)
-                            else:
-                                self._apply_backoff_and_cooldown(cfg, fatal=False)
-                else:
-                    self.fail_count = 0
-                    self.backoff_s = None
-
+                with metrics.timer("worker.iteration"):
+                    delay = self._iteration()
             except Exception as e:
                 log.info("⚠️ Worker loop error: %s", e)
 
-            sleep_t = self.backoff_s if self.backoff_s else max(1.0, self.cfg["base_interval"] + random.uniform(-1, 1))
-            self._wait_with_event(sleep_t)
+            metrics.maybe_log_summary(self.cfg)
+            self._wait_with_event(self.reconnect.idle_delay() if delay is None else delay)
 
         self.running = False
-        if self._unsubscribe:
-            self._unsubscribe()
+        self._detach()
         self.tray_ref.update_tooltip(False)
 
+    def _iteration(self):
+        """One pass of the reconnect policy. Returns the delay before the next pass (None = default)."""
+        self._refresh_config_if_needed()
+        cfg = self.cfg
+
+        snap = network_snapshot(cfg)
+        if self._needs_password(snap):
+            self.password = get_password(self.username)
+        d = self._decide(cfg, snap)
+        if d.kind != LOGIN:
+            return d.delay
+
+        self.sessions.post_sent()
+        diag = login_with_diagnostics(cfg, self.username, self.password)
+        self.sessions.post_response(diag.get("reason_code", "unknown"))
+        self._wait_with_event(float(cfg.get("post_probe_delay_s", 1.5)))
+        settled = settle_until_online(cfg["settle_max"], cfg["settle_step"])
+        invalidate_snapshot()
+        return self._login_finished(settled, diag).delay
+
     def stop(self):
         self.stop_event.set()
-        self.wake_event.set()
\ No newline at end of file
+        self.wake_event.set()
+
+
+def create_worker(tray_ref, engine: str = "thread") -> AutoLoginWorker:
+    """Build the worker for the configured engine ("thread" or "asyncio")."""
+    if engine == "asyncio":
+        from .async_worker import AsyncAutoLoginWorker
+        return AsyncAutoLoginWorker(tray_ref)
+    if engine != "thread":
+        log.info("⚠️ Unknown engine %r; using thread.", engine)
+    return AutoLoginWorker(tray_ref)
@@ -48,15 +48,9 @@ for module in ['json', 'json.encoder', 'json.decoder', 'csv', 'pickle']:
     except ImportError:
         pass
 
-# Third-party packages
-for module in ['certifi', 'urllib3', 'requests', 'keyring', 
-               'jaraco.context', 'jaraco.classes', 'jaraco.functools',
-               'backports.tarfile', 'psutil', 'pystray', 'PIL',
-               'idna', 'charset_normalizer', 'importlib_metadata', 'zipp']:
-    try:
-        _import_safely(module)
-    except ImportError:
-        pass
+# Third-party packages (requests, keyring, pystray, PIL, psutil, ...) are not
+# imported here: build.spec bundles them through hiddenimports/collect_submodules,
+# and the app imports them lazily so the headless and --ctl paths never load them.
 
 # Clean up
 del _import_safely